@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 from agents import Agent
@@ -26,9 +28,17 @@ class WebSearchPlan(BaseModel):
         description="A list of web searches to perform to best answer the query. 2-5 items are recommended."
     )
 
-planner_agent = Agent(
-    name="Planner Agent",
-    instructions=PROMPT,
-    model="gpt-4o-mini",
-    output_type=WebSearchPlan,
-)
\ No newline at end of file
+
+_planner_agent: Optional[Agent] = None
+
+
+def get_planner_agent() -> Agent:
+    global _planner_agent
+    if _planner_agent is None:
+        _planner_agent = Agent(
+            name="Planner Agent",
+            instructions=PROMPT,
+            model="gpt-4o-mini",
+            output_type=WebSearchPlan,
+        )
+    return _planner_agent
@@ -2,19 +2,24 @@ from agents import Agent, WebSearchTool, FunctionTool
 from agents.model_settings import ModelSettings
 from agents.run_context import RunContextWrapper
 from tavily import AsyncTavilyClient
-import os
+import asyncio
 from pydantic import BaseModel, Field
 import logging
-from dotenv import load_dotenv, find_dotenv
-from app.utils.logger import setup_logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from app.config import get_settings
+# Imported before the caches: `sqlite3` registers its Row type with `collections.abc`, which resets the ABC caches the
+# schema build fills and makes `import app.manager` measurably slower.
 from app.schemas.competitor import CompetitorAnalysisResponse
-setup_logging(
-    None,
-    level=logging.INFO
-)
-
-load_dotenv(find_dotenv('.env'))
-
+from app.utils.cache import TieredCache, build_cache, make_cache_key
+from app.utils.http import get_http_client, http_timeout
+from app.utils.output_schema import json_schema
+from app.utils.ranking import SeenResults, process_search_responses
+from app.utils.scheduler import get_tavily_scheduler
+from app.utils.singleflight import SingleFlight
+from app.utils.metrics import record_cache_hit, stage
+from app.utils.resilience import hedged, tavily_hedge_after, tavily_latency, tavily_retry_policy, with_retries
 INSTRUCTIONS = (
     "You are a research assistant. Given a search term, you must:"
     "\nUse the search_tavily tool to search the web for the term"
@@ -24,58 +29,190 @@ INSTRUCTIONS = (
     "\For the pricing plan if the competitor its an ecommerce use the one-time-purchase"
 )
 
-# Initialize Tavily client outside the function to reuse it
-tavily_api_key = os.getenv("KEY_TAVILY")
-print(f"Tavily API key: {tavily_api_key}")
-if not tavily_api_key:
-    logging.warning("No Tavily API key found. The search tool will not work without an API key.")
 
-tavily_client = AsyncTavilyClient(api_key=tavily_api_key)
+
+class PooledTavilyClient(AsyncTavilyClient):
+    """`AsyncTavilyClient` whose requests share one keep-alive connection pool.
+
+    The stock client opens (and closes) a new `httpx.AsyncClient`, with its own TLS handshake,
+    for every search.
+    """
+
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(api_key=api_key, **kwargs)
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+
+        @asynccontextmanager
+        async def shared_client():
+            # Borrowed, not owned: leaving the `async with` must not close the pool.
+            yield get_http_client(
+                "tavily",
+                headers=headers,
+                base_url="https://api.tavily.com",
+                timeout=http_timeout(180),
+            )
+
+        self._client_creator = shared_client
+
+
+# Created on first use and reused by every search of the process.
+tavily_client: Optional[AsyncTavilyClient] = None
+_search_cache: Optional[TieredCache] = None
+
+
+def get_tavily_client() -> AsyncTavilyClient:
+    global tavily_client
+    if tavily_client is None:
+        tavily_client = PooledTavilyClient(api_key=get_settings().tavily_api_key)
+    return tavily_client
+
+
+def get_search_cache() -> TieredCache:
+    """Tavily responses are cached in memory and on disk so repeated queries skip the API call.
+
+    Set SEARCH_CACHE_PATH to an empty string to keep the cache in memory only.
+    """
+    global _search_cache
+    if _search_cache is None:
+        settings = get_settings()
+        _search_cache = build_cache(
+            disk_path=settings.search_cache_path,
+            ttl=settings.search_cache_ttl,
+            memory_entries=settings.search_cache_memory_entries,
+            disk_entries=settings.search_cache_disk_entries,
+        )
+    return _search_cache
+
+
+# Concurrent identical searches share one in-flight Tavily call, keyed like the cache.
+search_flights = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+async def cached_tavily_search(
+    query: str,
+    include_domains: list[str] | str | None = None,
+    search_depth: str = "basic",
+    max_results: int = 5,
+    refresh: bool = False,
+) -> dict:
+    """Call the Tavily client's `search`, reusing a cached response for the same normalized request.
+
+    With `refresh=True` the cache is not read, but the fresh response still replaces the entry.
+    """
+    if isinstance(include_domains, str):
+        include_domains = [include_domains]
+    include_domains = sorted(include_domains or [])
+    key = make_cache_key(
+        "tavily",
+        query=normalize_query(query),
+        include_domains=include_domains,
+        search_depth=search_depth,
+        max_results=max_results,
+    )
+    with stage("tavily", query):
+        cached = None if refresh else get_search_cache().get(key)
+        if cached is not None:
+            logging.info(f"Search cache hit for query: {query}")
+            record_cache_hit()
+            return cached
+
+        async def timed_search(admitted: asyncio.Event) -> dict:
+            admitted.set()
+            started = time.perf_counter()
+            response = await get_tavily_client().search(
+                query=query,
+                search_depth=search_depth,
+                max_results=max_results,
+                include_answer=True,
+                include_domains=include_domains,
+            )
+            tavily_latency.record(time.perf_counter() - started)
+            return response
+
+        async def search_once() -> dict:
+            # Once enough latencies are known, a duplicate request is sent when the first one is slower than the p95.
+            # The p95 is measured from admission by the scheduler, so the hedge timer starts there too, and no
+            # duplicate is sent while the scheduler is saturated.
+            admitted = asyncio.Event()
+            scheduler = get_tavily_scheduler()
+            return await hedged(
+                lambda: scheduler.call(timed_search, admitted),
+                tavily_hedge_after(),
+                started=admitted,
+                can_hedge=lambda: not scheduler.saturated,
+            )
+
+        async def fetch() -> dict:
+            response = await with_retries(
+                search_once,
+                tavily_retry_policy(),
+                stage="tavily_search",
+            )
+            # Empty responses are not cached so a transient miss does not stick for the whole TTL.
+            if response.get("results"):
+                get_search_cache().set(key, response)
+            return response
+
+        return await search_flights.do(key, fetch)
+
+def format_search_response(response: dict) -> str:
+    """Format a Tavily response as the plain-text block the agents read."""
+    formatted_results = []
+
+    # Include Tavily's generated answer at the top if available
+    if response.get("answer"):
+        formatted_results.append(f"Tavily Summary: {response.get('answer')}\n")
+
+    # Include individual results
+    for i, result in enumerate(response.get("results", [])):
+        title = result.get("title", "")
+        content = result.get("content", "")
+        url = result.get("url", "")
+        formatted_results.append(f"Source {i+1}: Url:{url}\nTitle: {title}\nContent: {content}\n")
+
+    return "\n".join(formatted_results)
+
 
 async def search_tavily(
     query: str,
-    self_domain_url: str
+    self_domain_url: str,
+    description: Optional[str] = None,
+    search_depth: str = "basic",
+    seen: Optional[SeenResults] = None,
 ) -> str:
     """Search the web using Tavily's API and return relevant results.
     
     Args:
         query: The search query to use for retrieving information from the web.
+        search_depth: "basic", or "advanced" for follow-up searches (twice the Tavily credits).
+        seen: Results already passed on by other searches of the same report, which are skipped.
     """
-    if not tavily_api_key:
+    if tavily_client is None and not get_settings().tavily_api_key:
         return "Error: Tavily API key is not configured. Please set the TAVILY_API_KEY environment variable."
     
     if not query:
         return "Error: No search query provided."
     
     try:
-        response = await tavily_client.search(
+        response = await cached_tavily_search(
             query=query,
-            search_depth="basic",
+            include_domains=self_domain_url,
+            search_depth=search_depth,
             max_results=5,
-            include_answer=True,
-            include_domains=self_domain_url
         )
         
-        if not response.get("results"):
+        # Only the most relevant, distinct results are passed to the agent.
+        processed = process_search_responses([{**response, "query": query}], description, seen=seen)
+        if not processed or not processed[0].get("results"):
             return "No results found for your query."
         else:
             logging.info(f"Search completed for query: {response.get('query')} in {response.get('response_time')} seconds")
         
-        # Format the results
-        formatted_results = []
-        
-        # Include Tavily's generated answer at the top if available
-        if response.get("answer"):
-            formatted_results.append(f"Tavily Summary: {response.get('answer')}\n")
-            
-        # Include individual results
-        for i, result in enumerate(response.get("results", [])):
-            title = result.get("title", "")
-            content = result.get("content", "")
-            url = result.get("url", "")
-            formatted_results.append(f"Source {i+1}: Url:{url}\nTitle: {title}\nContent: {content}\n")
-        
-        return "\n".join(formatted_results)
+        return format_search_response(processed[0])
     
     except Exception as e:
         logging.error(f"Error searching Tavily: {str(e)}")
@@ -98,40 +235,47 @@ async def run_function(ctx: RunContextWrapper, args: str) -> str:
             if domain:
                 include_domains = [domain]
                 logging.info(f"Using domain filter from context: {domain}")
-        print(f"Query: {parsed.query}")
-        print(f"Include domains: {include_domains}")
+        logging.debug(f"Search tool query: {parsed.query}, include domains: {include_domains}")
         result = await search_tavily(
             query=parsed.query,
             self_domain_url=include_domains,
+            description=ctx.context.get("description") if ctx.context else None,
+            search_depth=(ctx.context.get("search_depth") if ctx.context else None) or "basic",
+            seen=ctx.context.get("_seen_results") if ctx.context else None,
         )
         logging.info(f"Search completed for query: {parsed.query}")
         return result
     except Exception as e:
-        import sys
-        sys.exit(1)
+        # The error goes back to the model as the tool output instead of aborting the process.
         logging.error(f"Error in run_function: {str(e)}")
         return f"Error performing search: {str(e)}"
 
 
-tool = FunctionTool(
-    name="search_tavily",
-    description="Search the web using Tavily's API and return relevant results.",
-    params_json_schema={
-        **FunctionArgs.model_json_schema(),
-        "additionalProperties": False
-    },
-    on_invoke_tool=run_function,
-)
+_search_agent: Optional[Agent] = None
+
 
-# Create the search agent with Tavily search tool
-search_agent = Agent(
-    name="Search agent",
-    instructions=INSTRUCTIONS,
-    tools=[tool],
-    model_settings=ModelSettings(
-        temperature=0.3,
-        tool_choice="auto",
-    ),
-    model="gpt-4o-mini",
-    output_type=CompetitorAnalysisResponse,
-)
\ No newline at end of file
+def get_search_agent() -> Agent:
+    """The search agent with the Tavily search tool, created on first use."""
+    global _search_agent
+    if _search_agent is None:
+        tool = FunctionTool(
+            name="search_tavily",
+            description="Search the web using Tavily's API and return relevant results.",
+            params_json_schema={
+                **json_schema(FunctionArgs),
+                "additionalProperties": False
+            },
+            on_invoke_tool=run_function,
+        )
+        _search_agent = Agent(
+            name="Search agent",
+            instructions=INSTRUCTIONS,
+            tools=[tool],
+            model_settings=ModelSettings(
+                temperature=0.3,
+                tool_choice="auto",
+            ),
+            model="gpt-4o-mini",
+            output_type=CompetitorAnalysisResponse,
+        )
+    return _search_agent
\ No newline at end of file
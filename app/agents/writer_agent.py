@@ -1,8 +1,10 @@
 # Agent used to synthesize a final report from the individual summaries.
-from pydantic import BaseModel
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
 from agents import Agent
 from agents.model_settings import ModelSettings
-from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.competitor import Competitor, CompetitorAnalysisResponse, Market, Product, SwotAnalysis
 
 PROMPT = (
     "You are a senior researcher tasked with writing a cohesive report for a research query. "
@@ -14,13 +16,98 @@ PROMPT = (
     "The data to put in the self_analysis field is the same as the Original query website.\n"
 )
 
-writer_agent = Agent(
-    name="WriterAgent",
-    instructions=PROMPT,
-    model="gpt-4o-mini",
-    output_type=CompetitorAnalysisResponse,
-    model_settings=ModelSettings(
-        temperature=0.25,
-        max_tokens=6_000,
-    ),
-)
\ No newline at end of file
+_writer_agent: Optional[Agent] = None
+_writer_shard_agents: Optional[dict[str, Agent]] = None
+
+
+def get_writer_agent() -> Agent:
+    global _writer_agent
+    if _writer_agent is None:
+        _writer_agent = Agent(
+            name="WriterAgent",
+            instructions=PROMPT,
+            model="gpt-4o-mini",
+            output_type=CompetitorAnalysisResponse,
+            model_settings=ModelSettings(
+                temperature=0.25,
+                max_tokens=6_000,
+            ),
+        )
+    return _writer_agent
+
+
+# Sharded writer: each section of the self analysis is written by its own, smaller call, and the
+# sections are merged into one `CompetitorAnalysisResponse`.
+class OverviewSection(BaseModel):
+    name: str = Field(..., description="The name of the original query company.")
+    website: str = Field(..., description="The website of the original query company.")
+    description: str = Field(..., description="A short description of the original query company.")
+    score_affinity: None | int = Field(..., description="A score between 10 and 100 indicating the affinity of the company to the query.")
+
+
+class ProductSection(BaseModel):
+    product: Optional[Product] = Field(..., description="Details about the product of the original query company.")
+
+
+class MarketSection(BaseModel):
+    market: Optional[Market] = Field(..., description="Details about the market of the original query company.")
+
+
+class SwotSection(BaseModel):
+    swot_analysis: Optional[SwotAnalysis] = Field(..., description="The SWOT analysis of the original query company.")
+
+
+SHARD_PROMPT = (
+    PROMPT
+    + "Only write the {section} part of the self analysis; other parts are written separately.\n"
+)
+
+WRITER_SHARDS = {
+    "overview": (OverviewSection, "overview (name, website, description and affinity score)"),
+    "product": (ProductSection, "product (features, use cases and pricing)"),
+    "market": (MarketSection, "market (target audience, market presence and business segments)"),
+    "swot_analysis": (SwotSection, "SWOT analysis"),
+}
+
+
+def get_writer_shard_agents() -> dict[str, Agent]:
+    """One agent per section of `WRITER_SHARDS`, in section order."""
+    global _writer_shard_agents
+    if _writer_shard_agents is None:
+        _writer_shard_agents = {
+            shard: get_writer_agent().clone(
+                name=f"WriterAgent {shard}",
+                instructions=SHARD_PROMPT.format(section=section),
+                output_type=output_type,
+                model_settings=ModelSettings(temperature=0.25, max_tokens=2_000),
+            )
+            for shard, (output_type, section) in WRITER_SHARDS.items()
+        }
+    return _writer_shard_agents
+
+
+def _dedupe_lists(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _dedupe_lists(item) for key, item in value.items()}
+    if isinstance(value, list):
+        seen = set()
+        deduped = []
+        for item in value:
+            marker = " ".join(item.lower().split()) if isinstance(item, str) else repr(item)
+            if marker not in seen:
+                seen.add(marker)
+                deduped.append(_dedupe_lists(item))
+        return deduped
+    return value
+
+
+def merge_sections(sections: dict[str, BaseModel]) -> CompetitorAnalysisResponse:
+    """Merge the sections written by the shard agents into one validated response.
+
+    Missing sections are left empty. Repeated list entries, which separately written sections
+    tend to produce, are dropped.
+    """
+    self_analysis: dict[str, Any] = {"product": None, "market": None, "swot_analysis": None}
+    for section in sections.values():
+        self_analysis.update(section.model_dump(mode="json"))
+    return CompetitorAnalysisResponse(self_analysis=Competitor.model_validate(_dedupe_lists(self_analysis)))
@@ -0,0 +1,72 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.config import get_settings
+from app.jobs import Job, JobQueue
+from app.schemas.job import JobResponse
+from app.schemas.request import CompetitorAnalysisRequest
+from app.utils.commons import get_attributes_from_pyproject
+from app.utils.http import aclose_http_clients
+from app.utils.metrics import get_prometheus_sink
+
+
+def create_app(job_queue: JobQueue | None = None) -> FastAPI:
+    """Build the HTTP API. Each uvicorn worker gets its own job queue and shares its clients across jobs."""
+    settings = get_settings()
+    job_queue = job_queue or JobQueue(concurrency=settings.api_concurrency, max_jobs=settings.api_max_jobs)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await job_queue.start()
+        yield
+        await job_queue.stop()
+        await aclose_http_clients()
+
+    project = get_attributes_from_pyproject()
+    app = FastAPI(
+        title=project.get("name", "Competitor Analysis"),
+        description=project.get("description", ""),
+        version=project.get("version", "0.0.0"),
+        lifespan=lifespan,
+    )
+    app.state.job_queue = job_queue
+
+    def get_job(job_id: str) -> Job:
+        job = job_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return PlainTextResponse(get_prometheus_sink().render(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/jobs", response_model=JobResponse, status_code=202)
+    async def submit_job(request: CompetitorAnalysisRequest, refresh: bool = False, direct_search: bool = False):
+        return job_queue.submit(request, refresh=refresh, direct_search=direct_search).to_response()
+
+    @app.get("/jobs/{job_id}", response_model=JobResponse)
+    async def get_job_status(job_id: str):
+        return get_job(job_id).to_response()
+
+    @app.get("/jobs/{job_id}/events")
+    async def stream_job_events(job_id: str, start: int = 0):
+        job = get_job(job_id)
+
+        async def event_stream():
+            async for event in job.stream_events(start):
+                yield f"id: {event.sequence}\nevent: {event.item}\ndata: {event.model_dump_json()}\n\n"
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return app
@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from pydantic import ValidationError
+
+from app.job_store import JobCheckpoints, JobStore, get_default_job_store
+from app.schemas.batch import BatchResult, BatchSummary
+from app.schemas.request import CompetitorAnalysisRequest
+from app.utils.printer import BatchProgressView, JsonLinesPrinter, NullPrinter, resolve_progress_mode
+
+DEFAULT_CONCURRENCY = 8
+
+# How often the result writer checks that the worker processes are still alive.
+_WORKER_POLL_INTERVAL = 1.0
+# How often a request whose job another worker holds checks whether it is free.
+_JOB_POLL_INTERVAL = 1.0
+
+
+class BatchRunner:
+    """Runs many analyses from a JSONL file concurrently and streams the results to a JSONL file.
+
+    Each input line is a `CompetitorAnalysisRequest`. Each output line is a `BatchResult`, written
+    as soon as its analysis finishes, so output order follows completion order; use `index` to
+    match results back to input lines.
+
+    `progress` is `none` (the default), `json` for one JSON line per step of every analysis on
+    stderr, or `rich` for a single live view of the whole batch.
+
+    Every analysis is a job in the job store, which checkpoints its stages. Without `resume` a
+    request's job starts over; with it, completed jobs return their stored result and unfinished
+    ones continue from their checkpoints, so a batch that died can be run again at little cost.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        refresh: bool = False,
+        direct_search: bool = False,
+        progress: str = "none",
+        resume: bool = False,
+        job_store: JobStore | None = None,
+        sharded_writer: bool | None = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.refresh = refresh
+        self.direct_search = direct_search
+        self.resume = resume
+        # None leaves the choice to WRITER_SHARDED.
+        self.sharded_writer = sharded_writer
+        self.jobs = job_store or get_default_job_store()
+        # Claims in the job store are held under this name, unique to the runner.
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.progress = resolve_progress_mode(progress)
+        self.view: Optional[BatchProgressView] = None
+        self.summary = BatchSummary()
+
+    async def run(self, input_path: str | Path, output_path: str | Path) -> BatchSummary:
+        self.summary = BatchSummary()
+        started = time.perf_counter()
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # The semaphore is acquired before a task is created, so at most `concurrency` requests
+        # are held in memory no matter how large the input file is.
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending: set[asyncio.Task] = set()
+        if self.progress == "rich":
+            self.view = BatchProgressView(total=0)
+            self.view.start()
+
+        with open(output_path, "w", encoding="utf-8") as output:
+            for index, request, error in self._read_requests(input_path):
+                self.summary.total += 1
+                if self.view is not None:
+                    self.view.total = self.summary.total
+                if error is not None:
+                    self._write_result(output, BatchResult(index=index, error=error))
+                    continue
+
+                await semaphore.acquire()
+                task = asyncio.create_task(self._analyze(index, request))
+                task.add_done_callback(lambda t: self._write_result(output, t.result()))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+
+            if pending:
+                await asyncio.gather(*pending)
+
+        if self.view is not None:
+            self.view.stop()
+            self.view = None
+        self.summary.elapsed = time.perf_counter() - started
+        logging.info(
+            f"Batch finished: {self.summary.succeeded}/{self.summary.total} succeeded, "
+            f"{self.summary.failed} failed in {self.summary.elapsed:.1f} seconds"
+        )
+        return self.summary
+
+    async def _analyze(self, index: int, request: CompetitorAnalysisRequest) -> BatchResult:
+        """Run one analysis. Never raises: any failure, including building the manager, is the result's `error`."""
+        # Imported here so that a process batch's parent, which only reads and writes files,
+        # does not load the agents SDK.
+        from app.utils.resilience import error_detail
+
+        job_id, checkpoints, stored = await self._claim_job(request)
+        if stored is not None:
+            return stored.model_copy(update={"index": index})
+        manager = None
+        heartbeat = asyncio.create_task(self._keep_claim(job_id)) if checkpoints is not None else None
+        try:
+            from app.manager import ResearchManager
+
+            manager = ResearchManager(
+                refresh=self.refresh,
+                direct_search=self.direct_search,
+                sharded_writer=self.sharded_writer,
+                printer=self._printer(index, request),
+                checkpoints=checkpoints,
+            )
+            report = await manager.run(request)
+            result = BatchResult(
+                index=index, request=request, report=report, errors=manager.errors, metrics=manager.metrics
+            )
+        except Exception as e:
+            logging.error(f"Error analyzing {request.website}: {str(e)}")
+            errors = (manager.errors if manager is not None else []) + [error_detail("research", e)]
+            result = BatchResult(
+                index=index,
+                request=request,
+                error=str(e),
+                errors=errors,
+                metrics=manager.metrics if manager is not None else None,
+            )
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+        if checkpoints is not None:
+            self._finish_job(job_id, result)
+        return result
+
+    async def _claim_job(
+        self, request: CompetitorAnalysisRequest
+    ) -> tuple[str | None, JobCheckpoints | None, BatchResult | None]:
+        """The request's job id, with its checkpoints once this runner holds it, or with its stored result.
+
+        A job another worker holds (a duplicate request, or a worker that died less than a lease
+        ago) is waited for: its result is reused if it completes, and it is claimed if the other
+        claim lapses or the job fails.
+        """
+        if self.jobs is None:
+            return None, None, None
+        try:
+            job_id = self.jobs.submit(request, self.direct_search, restart=not self.resume)
+            if self.resume:
+                stored = self.jobs.result(job_id)
+                if stored is not None:
+                    logging.info(f"Reusing the result of completed job {job_id} for {request.website}")
+                    return job_id, None, BatchResult.model_validate_json(stored)
+            while not self.jobs.claim(job_id, self.owner):
+                stored = self.jobs.result(job_id)
+                if stored is not None:
+                    logging.info(f"Reusing the result of job {job_id} completed by another worker for {request.website}")
+                    return job_id, None, BatchResult.model_validate_json(stored)
+                wait = min(max(self.jobs.lease_remaining(job_id), 0.1), _JOB_POLL_INTERVAL)
+                logging.info(f"Job {job_id} for {request.website} is claimed by another worker, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+            return job_id, self.jobs.checkpoints(job_id, self.owner), None
+        except Exception as e:
+            logging.warning(f"Error reading the job store: {str(e)}")
+            return None, None, None
+
+    async def _keep_claim(self, job_id: str) -> None:
+        # Renews the claim while the analysis runs, so that only a dead worker's claim lapses.
+        while True:
+            await asyncio.sleep(self.jobs.lease / 3)
+            try:
+                if not self.jobs.renew(job_id, self.owner):
+                    logging.warning(f"Lost the claim on job {job_id}")
+                    return
+            except Exception as e:
+                logging.warning(f"Error renewing the claim on job {job_id}: {str(e)}")
+
+    def _finish_job(self, job_id: str, result: BatchResult) -> None:
+        try:
+            if result.error is None:
+                self.jobs.complete(job_id, self.owner, result.model_dump_json())
+            else:
+                self.jobs.fail(job_id, self.owner, result.error)
+        except Exception as e:
+            logging.warning(f"Error updating the job store: {str(e)}")
+
+    def _printer(self, index: int, request: CompetitorAnalysisRequest):
+        label = f"#{index} {request.website}"
+        if self.progress == "json":
+            return JsonLinesPrinter(label=label)
+        if self.view is not None:
+            return self.view.printer(label)
+        return NullPrinter()
+
+    def _write_result(self, output, result: BatchResult) -> None:
+        if result.error is None:
+            self.summary.succeeded += 1
+        else:
+            self.summary.failed += 1
+        if self.view is not None:
+            self.view.record(result.error is None)
+        output.write(result.model_dump_json() + "\n")
+        output.flush()
+
+    @staticmethod
+    def _read_requests(
+        input_path: str | Path,
+    ) -> Iterator[tuple[int, CompetitorAnalysisRequest | None, str | None]]:
+        with open(input_path, "r", encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield index, CompetitorAnalysisRequest.model_validate_json(line), None
+                except ValidationError as e:
+                    logging.error(f"Invalid request on line {index}: {str(e)}")
+                    yield index, None, f"Invalid request: {str(e)}"
+
+
+async def _serve_tasks(
+    task_queue,
+    result_queue,
+    concurrency: int,
+    refresh: bool,
+    direct_search: bool,
+    progress: str,
+    resume: bool,
+    sharded_writer: Optional[bool],
+) -> None:
+    runner = BatchRunner(
+        concurrency=concurrency,
+        refresh=refresh,
+        direct_search=direct_search,
+        progress=progress,
+        resume=resume,
+        sharded_writer=sharded_writer,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    pending: set[asyncio.Task] = set()
+    loop = asyncio.get_running_loop()
+
+    def send(index: int, task: asyncio.Task) -> None:
+        result: BatchResult = task.result()
+        result_queue.put((index, result.error is None, result.model_dump_json()))
+
+    while True:
+        await semaphore.acquire()
+        item = await loop.run_in_executor(None, task_queue.get)
+        if item is None:
+            break
+        index, line = item
+        task = asyncio.create_task(runner._analyze(index, CompetitorAnalysisRequest.model_validate_json(line)))
+        task.add_done_callback(lambda t, index=index: send(index, t))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        task.add_done_callback(lambda _: semaphore.release())
+    if pending:
+        await asyncio.gather(*pending)
+
+
+def _process_worker(
+    task_queue,
+    result_queue,
+    concurrency: int,
+    refresh: bool,
+    direct_search: bool,
+    progress: str,
+    resume: bool,
+    sharded_writer: Optional[bool],
+    initializer: Optional[Callable[[], None]],
+) -> None:
+    # Each worker process has its own event loop and module-level clients, reused for all of its
+    # requests. The disk tiers of the caches, the report store, the competitor index and the job
+    # store are SQLite files shared by every worker.
+    from app.config import configure
+
+    configure()
+    if initializer is not None:
+        initializer()
+    try:
+        asyncio.run(
+            _serve_tasks(task_queue, result_queue, concurrency, refresh, direct_search, progress, resume, sharded_writer)
+        )
+    finally:
+        result_queue.put(None)
+
+
+class ProcessBatchRunner:
+    """Runs a batch across several worker processes, each running `concurrency` analyses at once.
+
+    Use it when a single process becomes CPU-bound (validation, serialization) rather than waiting
+    on the APIs. The input is read by a feeder thread into a bounded queue. Results come back
+    through a second queue to a single writer, which writes them in input order, so the output
+    file lines up with the input file. `initializer` runs once in every worker before its first
+    request and must be picklable.
+
+    With `progress="json"` every worker writes its own JSON progress lines to stderr; `rich` shows
+    the batch totals in the parent process only. `resume` works as in `BatchRunner`; requests lost
+    with a crashed worker are picked up from their checkpoints by the next resumed run.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        refresh: bool = False,
+        direct_search: bool = False,
+        initializer: Optional[Callable[[], None]] = None,
+        progress: str = "none",
+        resume: bool = False,
+        sharded_writer: Optional[bool] = None,
+    ):
+        workers = workers or os.cpu_count() or 1
+        if workers < 1 or concurrency < 1:
+            raise ValueError("workers and concurrency must be at least 1")
+        self.workers = workers
+        self.concurrency = concurrency
+        self.refresh = refresh
+        self.direct_search = direct_search
+        self.initializer = initializer
+        self.resume = resume
+        self.sharded_writer = sharded_writer
+        self.progress = resolve_progress_mode(progress)
+        self.view: Optional[BatchProgressView] = None
+        self.summary = BatchSummary()
+
+    async def run(self, input_path: str | Path, output_path: str | Path) -> BatchSummary:
+        return await asyncio.to_thread(self._run, input_path, output_path)
+
+    def _run(self, input_path: str | Path, output_path: str | Path) -> BatchSummary:
+        self.summary = BatchSummary()
+        started = time.perf_counter()
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Spawned workers do not inherit the parent's threads, event loop or open SQLite connections.
+        context = multiprocessing.get_context("spawn")
+        in_flight = self.workers * self.concurrency
+        task_queue = context.Queue(maxsize=in_flight)
+        result_queue = context.Queue()
+        processes = [
+            context.Process(
+                target=_process_worker,
+                args=(
+                    task_queue,
+                    result_queue,
+                    self.concurrency,
+                    self.refresh,
+                    self.direct_search,
+                    "json" if self.progress == "json" else "none",
+                    self.resume,
+                    self.sharded_writer,
+                    self.initializer,
+                ),
+                daemon=True,
+            )
+            for _ in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        if self.progress == "rich":
+            self.view = BatchProgressView(total=0)
+            self.view.start()
+
+        # Input indexes in file order, and a cap on results waiting for an earlier, slower one.
+        expected: deque[int] = deque()
+        unwritten = threading.Semaphore(in_flight * 4)
+        feeder_done = threading.Event()
+        invalid: queue.SimpleQueue[tuple[int, bool, str]] = queue.SimpleQueue()
+
+        def feed() -> None:
+            try:
+                for index, request, error in self._read_requests(input_path):
+                    unwritten.acquire()
+                    expected.append(index)
+                    if self.view is not None:
+                        self.view.total = len(expected) + self.summary.total
+                    if error is not None:
+                        invalid.put((index, False, BatchResult(index=index, error=error).model_dump_json()))
+                    else:
+                        task_queue.put((index, request.model_dump_json()))
+            finally:
+                feeder_done.set()
+                for _ in processes:
+                    task_queue.put(None)
+
+        feeder = threading.Thread(target=feed, name="batch-feeder", daemon=True)
+        feeder.start()
+
+        buffered: dict[int, tuple[bool, str]] = {}
+        finished_workers = 0
+        with open(output_path, "w", encoding="utf-8") as output:
+
+            def flush() -> None:
+                while not invalid.empty():
+                    index, ok, line = invalid.get()
+                    buffered[index] = (ok, line)
+                while expected and expected[0] in buffered:
+                    ok, line = buffered.pop(expected.popleft())
+                    self._write_line(output, ok, line)
+                    unwritten.release()
+
+            while finished_workers < len(processes):
+                try:
+                    item = result_queue.get(timeout=_WORKER_POLL_INTERVAL)
+                except queue.Empty:
+                    flush()
+                    if not any(process.is_alive() for process in processes):
+                        logging.error("All batch workers exited before finishing their requests")
+                        break
+                    continue
+                if item is not None:
+                    index, ok, line = item
+                    buffered[index] = (ok, line)
+                else:
+                    finished_workers += 1
+                flush()
+
+            # Requests lost with crashed workers are reported as failed. After a crash of every
+            # worker the rest of the input is not read.
+            if not feeder_done.wait(timeout=_WORKER_POLL_INTERVAL):
+                logging.error("Stopped reading the batch input because no worker is left")
+            flush()
+            for index in list(expected):
+                if index not in buffered:
+                    buffered[index] = (
+                        False,
+                        BatchResult(index=index, error="Worker process exited before finishing the request").model_dump_json(),
+                    )
+            flush()
+
+        for process in processes:
+            process.join(timeout=5)
+        if self.view is not None:
+            self.view.stop()
+            self.view = None
+        self.summary.elapsed = time.perf_counter() - started
+        logging.info(
+            f"Batch finished on {self.workers} workers: {self.summary.succeeded}/{self.summary.total} succeeded, "
+            f"{self.summary.failed} failed in {self.summary.elapsed:.1f} seconds"
+        )
+        return self.summary
+
+    def _write_line(self, output, ok: bool, line: str) -> None:
+        self.summary.total += 1
+        if ok:
+            self.summary.succeeded += 1
+        else:
+            self.summary.failed += 1
+        if self.view is not None:
+            self.view.record(ok)
+        output.write(line + "\n")
+        output.flush()
+
+    _read_requests = staticmethod(BatchRunner._read_requests)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import get_settings
+from app.schemas.competitor import Competitor, CompetitorIndexEntry, Market, Product, SwotAnalysis
+from app.utils.compaction import canonical_domain
+
+# Competitors whose data is older than this are searched for again.
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+
+_SECTIONS = ("product", "market", "swot_analysis")
+
+
+def _name_key(name: str) -> str:
+    return " ".join(re.sub(r"[^\w\s.-]", " ", name.lower()).split())
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+
+class CompetitorIndex:
+    """Latest known data of every competitor, keyed by canonical domain and shared by all reports.
+
+    Product, market and SWOT data are stored with their own timestamps, so a search that only
+    filled some sections does not discard the others. The index also remembers which competitor
+    each search query found for the website it was run for, and is looked up by query before a
+    search is run. The same query run for another website (another `include_domains` filter and
+    company description) may find another competitor, so it is not answered from that mapping.
+    """
+
+    def __init__(self, path: str, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competitors ("
+                "domain TEXT PRIMARY KEY, id TEXT NOT NULL, name TEXT NOT NULL, name_key TEXT NOT NULL, "
+                "website TEXT NOT NULL, description TEXT NOT NULL, score_affinity INTEGER, "
+                "product TEXT, product_updated_at REAL, market TEXT, market_updated_at REAL, "
+                "swot_analysis TEXT, swot_analysis_updated_at REAL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_competitors_name_key ON competitors (name_key)")
+            # Query mappings of earlier versions were not scoped to a website and answered other sites' searches.
+            conn.execute("DROP TABLE IF EXISTS competitor_queries")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS competitor_searches ("
+                "scope TEXT NOT NULL, query TEXT NOT NULL, domain TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (scope, query))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def normalize_scope(scope: Optional[str]) -> str:
+        return (canonical_domain(scope) if scope else None) or ""
+
+    def upsert(self, competitor: Competitor, query: Optional[str] = None, scope: Optional[str] = None) -> Optional[str]:
+        """Store `competitor` under its canonical domain and return the domain.
+
+        Sections that are empty in `competitor` keep their stored value and timestamp. Competitors
+        without a website are not indexed. `query` is the search that found it, run for the website
+        `scope`.
+        """
+        domain = canonical_domain(competitor.website)
+        if domain is None:
+            return None
+        now = time.time()
+        sections = {}
+        for section in _SECTIONS:
+            value = getattr(competitor, section)
+            sections[section] = value.model_dump_json(exclude_none=True) if value is not None else None
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO competitors (domain, id, name, name_key, website, description, score_affinity, "
+                "product, product_updated_at, market, market_updated_at, swot_analysis, swot_analysis_updated_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (domain) DO UPDATE SET name = excluded.name, name_key = excluded.name_key, "
+                "website = excluded.website, description = excluded.description, "
+                "score_affinity = COALESCE(excluded.score_affinity, score_affinity), "
+                + ", ".join(
+                    f"{section} = COALESCE(excluded.{section}, {section}), "
+                    f"{section}_updated_at = COALESCE(excluded.{section}_updated_at, {section}_updated_at)"
+                    for section in _SECTIONS
+                )
+                + ", updated_at = excluded.updated_at",
+                (
+                    domain,
+                    competitor.id,
+                    competitor.name,
+                    _name_key(competitor.name),
+                    competitor.website,
+                    competitor.description,
+                    competitor.score_affinity,
+                    *(
+                        value
+                        for section in _SECTIONS
+                        for value in (sections[section], now if sections[section] is not None else None)
+                    ),
+                    now,
+                ),
+            )
+            if query:
+                conn.execute(
+                    "INSERT OR REPLACE INTO competitor_searches (scope, query, domain, updated_at) VALUES (?, ?, ?, ?)",
+                    (self.normalize_scope(scope), self.normalize_query(query), domain, now),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return domain
+
+    def get(self, domain: str) -> Optional[CompetitorIndexEntry]:
+        row = self._connection().execute(
+            "SELECT domain, id, name, website, description, score_affinity, product, product_updated_at, "
+            "market, market_updated_at, swot_analysis, swot_analysis_updated_at, updated_at "
+            "FROM competitors WHERE domain = ?",
+            (domain,),
+        ).fetchone()
+        if row is None:
+            return None
+        (
+            domain, id, name, website, description, score_affinity,
+            product, product_updated_at, market, market_updated_at, swot, swot_updated_at, updated_at,
+        ) = row
+        competitor = Competitor(
+            id=id,
+            name=name,
+            website=website,
+            description=description,
+            score_affinity=score_affinity,
+            product=Product.model_validate_json(product) if product else None,
+            market=Market.model_validate_json(market) if market else None,
+            swot_analysis=SwotAnalysis.model_validate_json(swot) if swot else None,
+        )
+        return CompetitorIndexEntry(
+            domain=domain,
+            competitor=competitor,
+            product_updated_at=_timestamp(product_updated_at),
+            market_updated_at=_timestamp(market_updated_at),
+            swot_updated_at=_timestamp(swot_updated_at),
+            updated_at=_timestamp(updated_at),
+        )
+
+    def _find_domain(self, query: str, scope: Optional[str]) -> Optional[str]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT domain FROM competitor_searches WHERE scope = ? AND query = ?",
+            (self.normalize_scope(scope), self.normalize_query(query)),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+
+        # A query that is nothing but a known website or company name is answered by that competitor.
+        # Queries that merely mention one ("alternatives to Stripe") are about other companies.
+        text = query.strip()
+        domain = canonical_domain(text) if "." in text.strip(".") and len(text.split()) == 1 else None
+        row = conn.execute(
+            "SELECT domain FROM competitors WHERE domain = ? OR name_key = ? ORDER BY domain = ? DESC",
+            (domain, _name_key(query), domain),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def lookup(
+        self, query: str, scope: Optional[str] = None, max_age: Optional[float] = None
+    ) -> Optional[CompetitorIndexEntry]:
+        """The competitor a search for `query` run for the website `scope` would find.
+
+        None unless it is known and none of its data is older than `max_age` (by default the index's).
+        """
+        max_age = self.max_age if max_age is None else max_age
+        domain = self._find_domain(query, scope)
+        if domain is None:
+            return None
+        entry = self.get(domain)
+        if entry is None:
+            return None
+        oldest = min(
+            (
+                updated_at
+                for updated_at in (entry.product_updated_at, entry.market_updated_at, entry.swot_updated_at)
+                if updated_at is not None
+            ),
+            default=entry.updated_at,
+        )
+        if (datetime.now(timezone.utc) - oldest).total_seconds() > max_age:
+            return None
+        return entry
+
+
+_default_competitor_index: Optional[CompetitorIndex] = None
+
+
+def get_default_competitor_index() -> Optional[CompetitorIndex]:
+    """Process-wide index at COMPETITOR_INDEX_PATH. An empty path disables it."""
+    global _default_competitor_index
+    settings = get_settings()
+    path = settings.competitor_index_path
+    if not path:
+        return None
+    if _default_competitor_index is None:
+        try:
+            _default_competitor_index = CompetitorIndex(path, max_age=settings.competitor_index_max_age)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not open competitor index {path}: {str(e)}")
+            return None
+    return _default_competitor_index
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from app.utils.logger import setup_logging
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if default:
+        return value.lower() not in ("0", "false", "no")
+    return value.lower() in ("1", "true", "yes")
+
+
+def _env_optional_float(name: str, default: Optional[float]) -> Optional[float]:
+    # An empty value turns the setting off.
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return float(value) if value else None
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Process settings, read from the environment (and `.env`) on first use rather than at import time.
+
+    Every knob of the app lives here; the modules read it when they build their clients, caches and
+    agents. The README lists the environment variables.
+    """
+
+    openai_api_key: Optional[str] = None
+    tavily_api_key: Optional[str] = None
+    log_level: str = "INFO"
+    log_file: Optional[str] = None
+    progress: str = "auto"
+
+    # Connection pools shared by every OpenAI and Tavily request.
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http2: bool = False
+
+    # Provider rate limits and adaptive concurrency.
+    openai_rpm: float = 500
+    openai_tpm: float = 200_000
+    openai_max_concurrency: int = 32
+    openai_target_latency: float = 60
+    tavily_rps: float = 10
+    tavily_max_concurrency: int = 16
+    tavily_target_latency: float = 10
+
+    # Attempts and per-attempt deadlines (None for no deadline), and Tavily request hedging.
+    tavily_max_attempts: int = 3
+    tavily_timeout: Optional[float] = 20.0
+    agent_max_attempts: int = 3
+    agent_timeout: Optional[float] = 120.0
+    writer_max_attempts: int = 2
+    writer_timeout: Optional[float] = 300.0
+    tavily_hedging: bool = False
+    tavily_hedge_quantile: float = 0.95
+
+    # Model routing.
+    model_tiers: tuple[str, ...] = ("gpt-4o-mini", "gpt-4o")
+    model_routing: bool = True
+    routing_large_input_tokens: int = 20_000
+    routing_min_confidence: float = 0.5
+    routing_latency_slo: Optional[float] = None
+
+    # Search: the Tavily response cache, result ranking and adaptive follow-up searches.
+    search_cache_path: str = ".cache/search_cache.sqlite"
+    search_cache_ttl: float = 24 * 3600
+    search_cache_memory_entries: int = 1024
+    search_cache_disk_entries: int = 100_000
+    search_top_k: int = 3
+    search_near_duplicate_similarity: float = 0.8
+    search_adaptive: bool = True
+    search_followup_credits: int = 4
+    search_time_budget: float = 90
+
+    # Cached agent outputs.
+    agent_cache_enabled: bool = True
+    agent_cache_path: str = ".cache/agent_cache.sqlite"
+    agent_cache_ttl: float = 24 * 3600
+    agent_cache_memory_entries: int = 256
+    agent_cache_disk_entries: int = 10_000
+
+    # Report writing.
+    writer_sharded: bool = False
+    writer_input_token_budget: int = 12_000
+
+    # SQLite stores; an empty path disables a store.
+    report_store_path: str = "output/reports.sqlite"
+    report_max_age: float = 7 * 24 * 3600
+    competitor_index_path: str = "output/competitors.sqlite"
+    competitor_index_max_age: float = 7 * 24 * 3600
+    job_store_path: str = "output/jobs.sqlite"
+    job_lease_seconds: float = 60
+
+    metrics_jsonl_path: Optional[str] = None
+    api_concurrency: int = 4
+    api_max_jobs: int = 1000
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        defaults = cls()
+        return cls(
+            openai_api_key=os.getenv("KEY_OPENAI"),
+            tavily_api_key=os.getenv("KEY_TAVILY"),
+            log_level=os.getenv("LOG_LEVEL", defaults.log_level).upper(),
+            log_file=os.getenv("LOG_FILE") or None,
+            progress=os.getenv("PROGRESS", defaults.progress).lower(),
+            http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", defaults.http_max_connections)),
+            http_max_keepalive_connections=int(
+                os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", defaults.http_max_keepalive_connections)
+            ),
+            http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", defaults.http_keepalive_expiry)),
+            http_connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", defaults.http_connect_timeout)),
+            http2=_env_flag("HTTP2", defaults.http2),
+            openai_rpm=float(os.getenv("OPENAI_RPM", defaults.openai_rpm)),
+            openai_tpm=float(os.getenv("OPENAI_TPM", defaults.openai_tpm)),
+            openai_max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", defaults.openai_max_concurrency)),
+            openai_target_latency=float(os.getenv("OPENAI_TARGET_LATENCY", defaults.openai_target_latency)),
+            tavily_rps=float(os.getenv("TAVILY_RPS", defaults.tavily_rps)),
+            tavily_max_concurrency=int(os.getenv("TAVILY_MAX_CONCURRENCY", defaults.tavily_max_concurrency)),
+            tavily_target_latency=float(os.getenv("TAVILY_TARGET_LATENCY", defaults.tavily_target_latency)),
+            tavily_max_attempts=int(os.getenv("TAVILY_MAX_ATTEMPTS", defaults.tavily_max_attempts)),
+            tavily_timeout=_env_optional_float("TAVILY_TIMEOUT", defaults.tavily_timeout),
+            agent_max_attempts=int(os.getenv("AGENT_MAX_ATTEMPTS", defaults.agent_max_attempts)),
+            agent_timeout=_env_optional_float("AGENT_TIMEOUT", defaults.agent_timeout),
+            writer_max_attempts=int(os.getenv("WRITER_MAX_ATTEMPTS", defaults.writer_max_attempts)),
+            writer_timeout=_env_optional_float("WRITER_TIMEOUT", defaults.writer_timeout),
+            tavily_hedging=_env_flag("TAVILY_HEDGING", defaults.tavily_hedging),
+            tavily_hedge_quantile=float(os.getenv("TAVILY_HEDGE_QUANTILE", defaults.tavily_hedge_quantile)),
+            model_tiers=tuple(
+                tier.strip()
+                for tier in os.getenv("MODEL_TIERS", ",".join(defaults.model_tiers)).split(",")
+                if tier.strip()
+            ),
+            model_routing=_env_flag("MODEL_ROUTING", defaults.model_routing),
+            routing_large_input_tokens=int(
+                os.getenv("ROUTING_LARGE_INPUT_TOKENS", defaults.routing_large_input_tokens)
+            ),
+            routing_min_confidence=float(os.getenv("ROUTING_MIN_CONFIDENCE", defaults.routing_min_confidence)),
+            routing_latency_slo=_env_optional_float("ROUTING_LATENCY_SLO", defaults.routing_latency_slo),
+            search_cache_path=os.getenv("SEARCH_CACHE_PATH", defaults.search_cache_path),
+            search_cache_ttl=float(os.getenv("SEARCH_CACHE_TTL", defaults.search_cache_ttl)),
+            search_cache_memory_entries=int(
+                os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", defaults.search_cache_memory_entries)
+            ),
+            search_cache_disk_entries=int(os.getenv("SEARCH_CACHE_DISK_ENTRIES", defaults.search_cache_disk_entries)),
+            search_top_k=int(os.getenv("SEARCH_TOP_K", defaults.search_top_k)),
+            search_near_duplicate_similarity=float(
+                os.getenv("SEARCH_NEAR_DUPLICATE_SIMILARITY", defaults.search_near_duplicate_similarity)
+            ),
+            search_adaptive=_env_flag("SEARCH_ADAPTIVE", defaults.search_adaptive),
+            search_followup_credits=int(os.getenv("SEARCH_FOLLOWUP_CREDITS", defaults.search_followup_credits)),
+            search_time_budget=float(os.getenv("SEARCH_TIME_BUDGET", defaults.search_time_budget)),
+            agent_cache_enabled=_env_flag("AGENT_CACHE_ENABLED", defaults.agent_cache_enabled),
+            agent_cache_path=os.getenv("AGENT_CACHE_PATH", defaults.agent_cache_path),
+            agent_cache_ttl=float(os.getenv("AGENT_CACHE_TTL", defaults.agent_cache_ttl)),
+            agent_cache_memory_entries=int(
+                os.getenv("AGENT_CACHE_MEMORY_ENTRIES", defaults.agent_cache_memory_entries)
+            ),
+            agent_cache_disk_entries=int(os.getenv("AGENT_CACHE_DISK_ENTRIES", defaults.agent_cache_disk_entries)),
+            writer_sharded=_env_flag("WRITER_SHARDED", defaults.writer_sharded),
+            writer_input_token_budget=int(os.getenv("WRITER_INPUT_TOKEN_BUDGET", defaults.writer_input_token_budget)),
+            report_store_path=os.getenv("REPORT_STORE_PATH", defaults.report_store_path),
+            report_max_age=float(os.getenv("REPORT_MAX_AGE", defaults.report_max_age)),
+            competitor_index_path=os.getenv("COMPETITOR_INDEX_PATH", defaults.competitor_index_path),
+            competitor_index_max_age=float(os.getenv("COMPETITOR_INDEX_MAX_AGE", defaults.competitor_index_max_age)),
+            job_store_path=os.getenv("JOB_STORE_PATH", defaults.job_store_path),
+            job_lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", defaults.job_lease_seconds)),
+            metrics_jsonl_path=os.getenv("METRICS_JSONL_PATH") or None,
+            api_concurrency=int(os.getenv("API_CONCURRENCY", defaults.api_concurrency)),
+            api_max_jobs=int(os.getenv("API_MAX_JOBS", defaults.api_max_jobs)),
+        )
+
+
+_settings: Optional[Settings] = None
+_configured = False
+
+
+def load_env(filename: str = ".env") -> None:
+    """Add the variables of the nearest `filename` to the environment, without overriding set ones."""
+    from dotenv import find_dotenv, load_dotenv
+
+    load_dotenv(find_dotenv(filename))
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        load_env()
+        _settings = Settings.from_env()
+    return _settings
+
+
+def configure(settings: Optional[Settings] = None) -> Settings:
+    """Set up logging and the OpenAI client once per process. Entry points call this before any work.
+
+    Modules only read their settings when first used, so importing them stays cheap and free of
+    side effects.
+    """
+    global _settings, _configured
+    if settings is not None:
+        _settings = settings
+    settings = get_settings()
+    if not _configured:
+        setup_logging(settings.log_file, level=logging.getLevelName(settings.log_level))
+        from app.utils.http import configure_openai_client
+
+        configure_openai_client(settings.openai_api_key)
+        _configured = True
+    return settings
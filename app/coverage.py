@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.agents.planner_agent import WebSearchItem
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.utils.compaction import merge_competitors
+
+# Tavily credits of an advanced search. Follow-ups are paid from the report's SEARCH_FOLLOWUP_CREDITS.
+ADVANCED_SEARCH_CREDITS = 2
+
+# Competitor fields checked after the planned searches, with the words a follow-up query uses for them.
+COVERAGE_FIELDS = {
+    "product.pricing.plans": "pricing plans",
+    "market.market_presence": "markets countries",
+    "swot_analysis": "strengths weaknesses",
+}
+
+
+def _field(data: dict, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def missing_fields(competitor: dict) -> list[str]:
+    return [path for path in COVERAGE_FIELDS if _field(competitor, path) in (None, "", [], {})]
+
+
+def coverage(competitors: list[dict]) -> float:
+    """Share of the `COVERAGE_FIELDS` of all competitors that are filled."""
+    if not competitors:
+        return 0.0
+    missing = sum(len(missing_fields(competitor)) for competitor in competitors)
+    return 1 - missing / (len(competitors) * len(COVERAGE_FIELDS))
+
+
+@dataclass
+class SearchBudget:
+    """Tavily credits and wall time a report may still spend on follow-up searches."""
+
+    credits: int
+    deadline: float
+    "`time.monotonic()` after which no follow-up is started or waited for."
+
+    def remaining_time(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def spend(self, credits: int) -> bool:
+        if credits > self.credits or self.remaining_time() <= 0:
+            return False
+        self.credits -= credits
+        return True
+
+
+def plan_followups(
+    results: list[CompetitorAnalysisResponse], budget: SearchBudget
+) -> list[tuple[WebSearchItem, Optional[str]]]:
+    """One targeted search per competitor with empty coverage fields, most relevant competitors first.
+
+    Returns the search items with the competitor's website, which the search is restricted to,
+    for as many competitors as the budget allows.
+    """
+    competitors = merge_competitors([result.self_analysis for result in results])
+    followups = []
+    for competitor in sorted(competitors, key=lambda c: -(c.get("score_affinity") or 0)):
+        missing = missing_fields(competitor)
+        if not missing:
+            continue
+        if not budget.spend(ADVANCED_SEARCH_CREDITS):
+            break
+        name = competitor.get("name", "")
+        item = WebSearchItem(
+            query=f"{name} {' '.join(COVERAGE_FIELDS[path] for path in missing)}",
+            reason=f"Fill in the missing {', '.join(missing)} of {name}",
+        )
+        followups.append((item, competitor.get("website")))
+    logging.info(
+        f"Search coverage {coverage(competitors):.0%} over {len(competitors)} competitors, "
+        f"{len(followups)} follow-up searches"
+    )
+    return followups
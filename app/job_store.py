@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.schemas.job import JobStatus
+from app.schemas.request import CompetitorAnalysisRequest
+from app.utils.cache import make_cache_key
+
+T = TypeVar("T")
+
+# Seconds a claimed job stays reserved for its worker after the worker last renewed its claim.
+DEFAULT_LEASE = 60.0
+
+
+class JobLeaseLost(RuntimeError):
+    """The worker's claim on a job lapsed and the job may be running elsewhere."""
+
+
+class JobStore:
+    """SQLite record of analysis jobs and of the checkpointed outputs of their stages.
+
+    A job's id is derived from its request, so submitting the same request again finds the same
+    job. A worker claims a job before running it and renews the claim while it runs; the claim
+    lapses `lease` seconds after the last renewal, so the job of a worker that died is claimed
+    again by the next one (at-least-once). Only the worker holding the claim can checkpoint or
+    complete the job. The search plan, every search result and the report are checkpointed as they
+    complete, and a job that is run again starts from them.
+    """
+
+    def __init__(self, path: str, lease: float = DEFAULT_LEASE):
+        self.path = path
+        self.lease = lease
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, request TEXT NOT NULL, direct_search INTEGER NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, owner TEXT, lease_until REAL, created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL, result TEXT, error TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "job_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (job_id, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def job_id(request: CompetitorAnalysisRequest, direct_search: bool = False) -> str:
+        return make_cache_key(
+            "job",
+            website=request.website.strip().lower(),
+            description=" ".join(request.description.split()),
+            direct_search=direct_search,
+        )
+
+    def submit(self, request: CompetitorAnalysisRequest, direct_search: bool = False, restart: bool = False) -> str:
+        """Record a queued job for `request` unless there already is one, and return its id.
+
+        With `restart`, an existing job that no live worker holds is queued again without its
+        checkpoints and result.
+        """
+        job_id = self.job_id(request, direct_search)
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, request, direct_search, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, request.model_dump_json(), int(direct_search), JobStatus.QUEUED.value, now, now),
+            )
+            if restart:
+                restarted = conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, result = NULL, error = NULL, "
+                    "updated_at = ? WHERE id = ? AND NOT (status = ? AND lease_until >= ?)",
+                    (JobStatus.QUEUED.value, now, job_id, JobStatus.RUNNING.value, now),
+                )
+                if restarted.rowcount:
+                    conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Reserve an unfinished job for `owner`, unless another worker holds a live claim on it."""
+        now = time.time()
+        claimed = self._connection().execute(
+            "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+            "WHERE id = ? AND status != ? AND NOT (status = ? AND lease_until >= ?)",
+            (
+                JobStatus.RUNNING.value,
+                owner,
+                now + self.lease,
+                now,
+                job_id,
+                JobStatus.COMPLETED.value,
+                JobStatus.RUNNING.value,
+                now,
+            ),
+        )
+        return claimed.rowcount == 1
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        """Extend `owner`'s claim on a job. False if the claim was lost."""
+        now = time.time()
+        renewed = self._connection().execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+            (now + self.lease, now, job_id, owner, JobStatus.RUNNING.value),
+        )
+        return renewed.rowcount == 1
+
+    def lease_remaining(self, job_id: str) -> float:
+        """Seconds until the current claim on a running job lapses, 0 if it is not held."""
+        row = self._connection().execute(
+            "SELECT lease_until FROM jobs WHERE id = ? AND status = ?", (job_id, JobStatus.RUNNING.value)
+        ).fetchone()
+        return max(0.0, row[0] - time.time()) if row and row[0] is not None else 0.0
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        row = self._connection().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return JobStatus(row[0]) if row else None
+
+    def result(self, job_id: str) -> Optional[str]:
+        """The stored result of a completed job, or None."""
+        row = self._connection().execute(
+            "SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, JobStatus.COMPLETED.value)
+        ).fetchone()
+        return row[0] if row else None
+
+    def complete(self, job_id: str, owner: str, result: str) -> None:
+        completed = self._connection().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, result = ?, error = NULL, updated_at = ? "
+            "WHERE id = ? AND owner = ? AND status = ?",
+            (JobStatus.COMPLETED.value, result, time.time(), job_id, owner, JobStatus.RUNNING.value),
+        )
+        if completed.rowcount != 1:
+            raise JobLeaseLost(f"Job {job_id} is no longer claimed by {owner}")
+
+    def fail(self, job_id: str, owner: str, error: str) -> None:
+        """Mark a job failed and release it. Its checkpoints are kept for the next attempt."""
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, error = ?, updated_at = ? "
+            "WHERE id = ? AND owner = ?",
+            (JobStatus.FAILED.value, error, time.time(), job_id, owner),
+        )
+
+    def save_checkpoint(self, job_id: str, owner: str, key: str, value: str) -> None:
+        """Store the output of a stage and extend the owner's claim on the job."""
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            renewed = conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (now + self.lease, now, job_id, owner, JobStatus.RUNNING.value),
+            )
+            if renewed.rowcount != 1:
+                raise JobLeaseLost(f"Job {job_id} is no longer claimed by {owner}")
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, key, value, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load_checkpoints(self, job_id: str) -> dict[str, str]:
+        rows = self._connection().execute("SELECT key, value FROM checkpoints WHERE job_id = ?", (job_id,))
+        return dict(rows.fetchall())
+
+    def checkpoints(self, job_id: str, owner: str) -> JobCheckpoints:
+        return JobCheckpoints(self, job_id, owner)
+
+
+class JobCheckpoints:
+    """The checkpoints of one claimed job, read once and written through as stages complete."""
+
+    def __init__(self, store: JobStore, job_id: str, owner: str):
+        self.store = store
+        self.job_id = job_id
+        self.owner = owner
+        self.values = store.load_checkpoints(job_id)
+        if self.values:
+            logging.info(f"Resuming job {job_id} from {len(self.values)} checkpoints")
+
+    def get(self, key: str, output_type: Type[T]) -> Optional[T]:
+        value = self.values.get(key)
+        if value is None:
+            return None
+        if output_type is dict:
+            return json.loads(value)
+        return output_type.model_validate_json(value)
+
+    def set(self, key: str, value: BaseModel | dict) -> None:
+        text = value.model_dump_json() if isinstance(value, BaseModel) else json.dumps(value, ensure_ascii=False)
+        self.store.save_checkpoint(self.job_id, self.owner, key, text)
+        self.values[key] = text
+
+
+_default_job_store: Optional[JobStore] = None
+
+
+def get_default_job_store() -> Optional[JobStore]:
+    """Process-wide store at JOB_STORE_PATH. An empty path disables it."""
+    global _default_job_store
+    settings = get_settings()
+    path = settings.job_store_path
+    if not path:
+        return None
+    if _default_job_store is None:
+        try:
+            _default_job_store = JobStore(path, lease=settings.job_lease_seconds)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not open job store {path}: {str(e)}")
+            return None
+    return _default_job_store
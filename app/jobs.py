@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from app.manager import ResearchManager
+from app.schemas.common import ErrorDetail
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.job import JobEvent, JobResponse, JobStatus
+from app.schemas.metrics import ReportMetrics
+from app.schemas.request import CompetitorAnalysisRequest
+from app.utils.printer import CallbackPrinter
+from app.utils.resilience import error_detail
+
+
+class Job:
+    """State of one analysis job, including its progress events for streaming clients."""
+
+    def __init__(self, request: CompetitorAnalysisRequest, refresh: bool = False, direct_search: bool = False):
+        self.id = str(uuid.uuid4())
+        self.request = request
+        self.refresh = refresh
+        self.direct_search = direct_search
+        self.status = JobStatus.QUEUED
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self.report: CompetitorAnalysisResponse | None = None
+        self.error: str | None = None
+        self.errors: list[ErrorDetail] = []
+        self.metrics: ReportMetrics | None = None
+        self.events: list[JobEvent] = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def add_event(self, item: str, content: str, is_done: bool = False, data: Any = None) -> None:
+        self.events.append(JobEvent(sequence=len(self.events), item=item, content=content, is_done=is_done, data=data))
+        self.updated_at = datetime.utcnow()
+        # Wake every waiting subscriber, then arm a fresh event for the next change.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def add_partial(self, path: str, value: Any) -> None:
+        self.add_event("partial", path, data=value)
+
+    def set_status(self, status: JobStatus) -> None:
+        self.status = status
+        self.add_event("status", status.value, is_done=self.finished)
+
+    async def stream_events(self, start: int = 0) -> AsyncIterator[JobEvent]:
+        """Yield events from `start` onwards, waiting for new ones until the job has finished."""
+        position = start
+        while True:
+            changed = self._changed
+            while position < len(self.events):
+                yield self.events[position]
+                position += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_response(self) -> JobResponse:
+        return JobResponse(
+            id=self.id,
+            status=self.status,
+            request=self.request,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            report=self.report,
+            error=self.error,
+            errors=self.errors,
+            metrics=self.metrics,
+        )
+
+
+class JobQueue:
+    """In-process async job queue served by a fixed number of worker tasks."""
+
+    def __init__(self, concurrency: int = 4, max_jobs: int = 1000):
+        self.concurrency = concurrency
+        self.max_jobs = max_jobs
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, request: CompetitorAnalysisRequest, refresh: bool = False, direct_search: bool = False) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() must be awaited before submitting jobs")
+        job = Job(request, refresh=refresh, direct_search=direct_search)
+        self.jobs[job.id] = job
+        self._evict()
+        job.set_status(JobStatus.QUEUED)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def _evict(self) -> None:
+        # Forget the oldest finished jobs once more than `max_jobs` are tracked.
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].finished:
+                del self.jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.set_status(JobStatus.RUNNING)
+        manager = ResearchManager(
+            printer=CallbackPrinter(job.add_event, partial_callback=job.add_partial),
+            refresh=job.refresh,
+            direct_search=job.direct_search,
+        )
+        try:
+            job.report = await manager.run(job.request)
+            job.errors = manager.errors
+            job.metrics = manager.metrics
+            job.set_status(JobStatus.COMPLETED)
+        except Exception as e:
+            logging.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.errors = manager.errors + [error_detail("research", e)]
+            job.metrics = manager.metrics
+            job.set_status(JobStatus.FAILED)
@@ -3,28 +3,147 @@ from __future__ import annotations
 import asyncio
 import time
 import logging
+from datetime import datetime, timezone
+from typing import Callable, Type, TypeVar
 
-from rich.console import Console
+from pydantic import BaseModel, ValidationError
 
-from agents import Runner, custom_span, gen_trace_id, trace, RunConfig
+from agents import custom_span, gen_trace_id, trace, RunConfig
+from openai.types.responses import ResponseTextDeltaEvent
 
-from app.agents.planner_agent import WebSearchItem, WebSearchPlan, planner_agent
-from app.agents.search_agent import search_agent
+from app.agents.planner_agent import WebSearchItem, WebSearchPlan, get_planner_agent
+from app.agents.search_agent import cached_tavily_search, format_search_response, get_search_agent
 from app.schemas.competitor import CompetitorAnalysisResponse
 from app.schemas.competitor import Competitor
 from app.schemas.request import CompetitorAnalysisRequest
-from app.agents.writer_agent import writer_agent
-from app.utils.printer import Printer
+from app.agents.writer_agent import get_writer_agent, get_writer_shard_agents, merge_sections
+from app.config import get_settings
+from app.coverage import SearchBudget, plan_followups
+from app.job_store import JobCheckpoints
+from app.competitor_index import CompetitorIndex, get_default_competitor_index
+from app.report_store import ReportStore, get_default_report_store, merge_reports
+from app.utils.cache import make_cache_key
+from app.utils.compaction import compact_search_results
+from app.utils.output_schema import Runner
+from app.utils.metrics import MetricsCollector, emit_metrics, record_cache_hit, record_first_content, stage
+from app.utils.partial_json import IncrementalJsonParser
+from app.utils.printer import CallbackPrinter, JsonLinesPrinter, NullPrinter, Printer, make_printer
+from app.utils.ranking import SeenResults, process_search_responses
+from app.utils.routing import ModelRouter, completeness, get_default_router
+from app.utils.run_cache import AgentRunCache, get_default_run_cache
+from app.utils.resilience import (
+    agent_retry_policy,
+    error_detail,
+    is_retryable,
+    with_retries,
+    writer_retry_policy,
+)
+from app.utils.scheduler import get_scheduled_model_provider
+from app.utils.singleflight import SingleFlight
+from app.schemas.common import ErrorDetail
+from app.schemas.metrics import ReportMetrics
+from app.schemas.report import StoredReport, StoredSearch
+
+research_flights = SingleFlight()
+
+T = TypeVar("T")
 
 
 class ResearchManager:
-    def __init__(self):
-        self.console = Console()
-        self.printer = Printer(self.console)
+    def __init__(
+        self,
+        quiet: bool = False,
+        run_cache: AgentRunCache | None = None,
+        refresh: bool = False,
+        direct_search: bool = False,
+        printer: Printer | NullPrinter | CallbackPrinter | JsonLinesPrinter | None = None,
+        store: ReportStore | None = None,
+        max_age: float | None = None,
+        competitor_index: CompetitorIndex | None = None,
+        sharded_writer: bool | None = None,
+        router: ModelRouter | None = None,
+        adaptive_search: bool | None = None,
+        checkpoints: JobCheckpoints | None = None,
+    ):
+        # `refresh` skips cached agent outputs; fresh outputs are still written back to the cache.
+        self.run_cache = run_cache or get_default_run_cache()
+        self.refresh = refresh
+        # `direct_search` calls Tavily for each planned query without a search_agent LLM turn and
+        # hands the deduplicated raw results straight to the writer.
+        self.direct_search = direct_search
+        # Reports are kept in the store. Unless `refresh` is set, a later run for the same request only
+        # re-researches the searches older than `max_age` seconds and merges them into the stored report.
+        self.store = store or get_default_report_store()
+        settings = get_settings()
+        self.max_age = settings.report_max_age if max_age is None else max_age
+        # Searches that name a competitor already known from any earlier report reuse its data.
+        self.competitor_index = competitor_index or get_default_competitor_index()
+        # The sharded writer writes each section of the report with its own, concurrent call.
+        self.sharded_writer = settings.writer_sharded if sharded_writer is None else sharded_writer
+        # Description of the company being analyzed, used to rank search results.
+        self.description: str | None = None
+        # Search results already passed to a search agent during this report.
+        self.seen_results = SeenResults()
+        # The planned searches of the last run and what each of them found.
+        self.searches: list[StoredSearch] = []
+        # Picks the model of each agent call and escalates to stronger ones on bad outputs.
+        self.router = router or get_default_router()
+        # Competitors the planned searches left without pricing, market presence or a SWOT analysis
+        # get one advanced follow-up search each, within the credit and time budget of the report.
+        self.adaptive_search = settings.search_adaptive if adaptive_search is None else adaptive_search
+        self.started = time.monotonic()
+        # Outputs of the stages of a durable job: restored instead of run again, saved as they complete.
+        self.checkpoints = checkpoints
+        # Every LLM request made by the agents goes through the shared OpenAI rate limiter.
+        self.run_config = RunConfig(model_provider=get_scheduled_model_provider())
+        # Failures that did not stop the run (e.g. a single search) are collected here.
+        self.errors: list[ErrorDetail] = []
+        # Stage timings, tokens, retries and cache hits of the last run.
+        self.metrics: ReportMetrics | None = None
+        if printer is not None:
+            self.printer = printer
+        elif quiet:
+            self.printer = NullPrinter()
+        else:
+            # rich, json or none, from the PROGRESS environment variable.
+            self.printer = make_printer()
+
+    async def run(self, request: CompetitorAnalysisRequest) -> CompetitorAnalysisResponse:
+        # Concurrent runs for the same request share one analysis, keyed like the caches. A refresh
+        # must not join a run that may answer from caches or the store.
+        key = make_cache_key(
+            "research",
+            website=request.website.strip().lower(),
+            description=" ".join(request.description.split()),
+            direct_search=self.direct_search,
+            refresh=self.refresh,
+        )
+        if key in research_flights:
+            self.printer.update_item(
+                "starting",
+                "Joining an identical analysis that is already running...",
+                is_done=True,
+                hide_checkmark=True,
+            )
+        try:
+            report, errors, metrics = await research_flights.do(key, lambda: self._run(request))
+        finally:
+            self.printer.end()
+        self.errors = list(errors)
+        self.metrics = metrics
+        return report
 
-    async def run(self, request: CompetitorAnalysisRequest) -> None:
+    async def _run(
+        self, request: CompetitorAnalysisRequest
+    ) -> tuple[CompetitorAnalysisResponse, list[ErrorDetail], ReportMetrics]:
+        self.errors = []
+        self.searches = []
+        self.description = request.description
+        self.seen_results = SeenResults()
+        self.started = time.monotonic()
         trace_id = gen_trace_id()
-        with trace("Research trace", trace_id=trace_id):
+        collector = MetricsCollector(request.website, trace_id=trace_id)
+        with trace("Research trace", trace_id=trace_id), collector.activate():
             self.printer.update_item(
                 "trace_id",
                 f"View trace: https://platform.openai.com/traces/{trace_id}",
@@ -38,87 +157,485 @@ class ResearchManager:
                 is_done=True,
                 hide_checkmark=True,
             )
-            search_plan = await self._plan_searches(request)
-            search_results = await self._perform_searches(search_plan, self_url=request.website)
-            report = await self._write_report(request, search_results)
+            try:
+                report = self._restore("report", CompetitorAnalysisResponse)
+                if report is None:
+                    previous = self._load_previous(request)
+                    if previous is not None:
+                        report = await self._refresh_report(request, previous)
+                    else:
+                        search_results = await self._plan_and_search(request)
+                        report = await self._write_report(request, search_results)
+                        self._save(request, report)
+                    self._checkpoint("report", report)
+                else:
+                    self.printer.update_item("writing", "Restored the report of an earlier attempt", is_done=True)
+            except Exception:
+                self.metrics = collector.finish("failed")
+                emit_metrics(self.metrics)
+                raise
 
-            return report
+            self.metrics = collector.finish()
+            emit_metrics(self.metrics)
+            return report, self.errors, self.metrics
 
-    async def _plan_searches(self, query: str) -> WebSearchPlan:
-        self.printer.update_item("planning", "Planning searches...")
-        result = await Runner.run(
-            planner_agent,
-            f"Query: {query}",
-            max_turns=2
+    def _restore(self, key: str, output_type: Type[T]) -> T | None:
+        if self.checkpoints is None:
+            return None
+        try:
+            return self.checkpoints.get(key, output_type)
+        except Exception as e:
+            logging.warning(f"Error reading checkpoint {key}: {str(e)}")
+            return None
+
+    def _checkpoint(self, key: str, value: BaseModel | dict) -> None:
+        if self.checkpoints is None:
+            return
+        try:
+            self.checkpoints.set(key, value)
+        except Exception as e:
+            logging.warning(f"Error saving checkpoint {key}: {str(e)}")
+
+    def _load_previous(self, request: CompetitorAnalysisRequest) -> StoredReport | None:
+        if self.store is None or self.refresh:
+            return None
+        with stage("store"):
+            try:
+                return self.store.latest(request, self.direct_search)
+            except Exception as e:
+                logging.warning(f"Error reading the report store: {str(e)}")
+                self.errors.append(error_detail("store", e))
+                return None
+
+    def _save(self, request: CompetitorAnalysisRequest, report: CompetitorAnalysisResponse) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.save(request, report, self.searches, self.direct_search)
+        except Exception as e:
+            logging.warning(f"Error saving the report: {str(e)}")
+            self.errors.append(error_detail("store", e))
+
+    @staticmethod
+    def _stored_search(item: WebSearchItem, result: CompetitorAnalysisResponse | dict | None) -> StoredSearch:
+        return StoredSearch(
+            query=item.query,
+            reason=item.reason,
+            competitor=result.self_analysis if isinstance(result, CompetitorAnalysisResponse) else None,
+            response=result if isinstance(result, dict) else None,
+        )
+
+    @staticmethod
+    def _search_result(search: StoredSearch) -> CompetitorAnalysisResponse | dict | None:
+        if search.competitor is not None:
+            return CompetitorAnalysisResponse(self_analysis=search.competitor)
+        return search.response
+
+    async def _refresh_report(self, request: CompetitorAnalysisRequest, previous: StoredReport) -> CompetitorAnalysisResponse:
+        """Re-research the stale searches of a stored report and merge the new report into it.
+
+        The stored search plan is reused. Searches without a result count as stale; if one still
+        fails, its previous result is kept and it is tried again on the next refresh.
+        """
+        now = datetime.now(timezone.utc)
+        stale = [
+            index
+            for index, search in enumerate(previous.searches)
+            if self._search_result(search) is None or (now - search.researched_at).total_seconds() > self.max_age
+        ]
+        if not stale:
+            with stage("store", "reuse"):
+                record_cache_hit()
+            self.printer.update_item(
+                "searching",
+                f"Reusing the report from {previous.record.created_at:%Y-%m-%d %H:%M}, nothing is stale",
+                is_done=True,
+            )
+            return previous.report
+
+        self.printer.update_item(
+            "searching",
+            f"Refreshing {len(stale)} of {len(previous.searches)} searches from the report of "
+            f"{previous.record.created_at:%Y-%m-%d %H:%M}...",
+        )
+        self.searches = list(previous.searches)
+        with custom_span("Search the web"):
+            items = [WebSearchItem(query=previous.searches[i].query, reason=previous.searches[i].reason) for i in stale]
+            results = await asyncio.gather(*(self._start_search(item, request.website, refresh=True) for item in items))
+        for index, item, result in zip(stale, items, results):
+            if result is not None:
+                self.searches[index] = self._stored_search(item, result)
+        self.printer.mark_item_done("searching")
+        await self._follow_up_searches()
+
+        search_results = [self._search_result(search) for search in self.searches]
+        report = await self._write_report(request, self._writer_inputs([r for r in search_results if r is not None]))
+        report = merge_reports(previous.report, report)
+        self._save(request, report)
+        return report
+
+    async def _plan_and_search(self, request: CompetitorAnalysisRequest) -> list[CompetitorAnalysisResponse | str]:
+        """Streams the planner output and starts each search as soon as its item is complete."""
+        with custom_span("Search the web"):
+            started: list[tuple[WebSearchItem, asyncio.Task]] = []
+
+            def start_search(item: WebSearchItem) -> None:
+                started.append((item, asyncio.create_task(self._start_search(item, request.website))))
+                self.printer.update_item("searching", f"Searching... {len(started)} started")
+
+            try:
+                await self._plan_searches(request, on_search=start_search)
+            except BaseException:
+                # Searches started from the streamed plan would keep spending budget for a failed run.
+                for _, task in started:
+                    task.cancel()
+                await asyncio.gather(*(task for _, task in started), return_exceptions=True)
+                raise
+            results = await self._collect_searches([task for _, task in started])
+            self.searches = [self._stored_search(item, task.result()) for item, task in started]
+            return results + await self._follow_up_searches()
+
+    async def _follow_up_searches(self) -> list[CompetitorAnalysisResponse]:
+        """Search again, in depth, for the competitor fields the planned searches left empty.
+
+        The follow-ups are added to `self.searches` and returned. Those still running when the time
+        budget of the report runs out are cancelled.
+        """
+        if self.direct_search or not self.adaptive_search:
+            return []
+        results = [
+            result
+            for result in map(self._search_result, self.searches)
+            if isinstance(result, CompetitorAnalysisResponse)
+        ]
+        settings = get_settings()
+        budget = SearchBudget(
+            credits=settings.search_followup_credits, deadline=self.started + settings.search_time_budget
+        )
+        followups = plan_followups(results, budget)
+        if not followups:
+            return []
+        self.printer.update_item("followup", f"Following up on {len(followups)} competitors with missing data...")
+        tasks = [
+            asyncio.create_task(self._search(item, website or "", refresh=self.refresh, search_depth="advanced"))
+            for item, website in followups
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=budget.remaining_time())
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logging.info(f"Cancelled {len(pending)} follow-up searches at the end of the time budget")
+        found = []
+        for (item, _), task in zip(followups, tasks):
+            if task in done and task.result() is not None:
+                self.searches.append(self._stored_search(item, task.result()))
+                found.append(task.result())
+        self.printer.update_item(
+            "followup", f"Followed up on {len(found)} of {len(followups)} competitors", is_done=True
         )
+        return found
+
+    async def _plan_searches(
+        self,
+        query: str,
+        on_search: Callable[[WebSearchItem], None] | None = None,
+    ) -> WebSearchPlan:
+        self.printer.update_item("planning", "Planning searches...")
+        with stage("planning"):
+            input = f"Query: {query}"
+            planner_agent = get_planner_agent()
+            cache_key = self.run_cache.make_key(planner_agent, input, WebSearchPlan)
+            search_plan = self._restore("plan", WebSearchPlan)
+            restored = search_plan is not None
+            if search_plan is None and not self.refresh:
+                search_plan = self.run_cache.get(cache_key, WebSearchPlan)
+            if search_plan is not None:
+                record_cache_hit()
+
+            started: set[int] = set()
+
+            async def stream_plan(agent) -> WebSearchPlan:
+                result = Runner.run_streamed(agent, input, max_turns=2, run_config=self.run_config)
+                parser = IncrementalJsonParser(max_depth=2)
+                async for event in result.stream_events():
+                    if event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+                        continue
+                    for path, value in parser.feed(event.data.delta):
+                        if on_search is None or len(path) != 2 or path[0] != "searches":
+                            continue
+                        try:
+                            item = WebSearchItem.model_validate(value)
+                        except ValidationError:
+                            # Left for the final plan below, which is validated as a whole.
+                            continue
+                        started.add(path[1])
+                        on_search(item)
+                return result.final_output_as(WebSearchPlan)
+
+            if search_plan is None:
+                # Once a search has been started from a streamed item, a retried plan could disagree with it.
+                search_plan = await self.router.run(
+                    planner_agent,
+                    input,
+                    lambda agent: with_retries(
+                        lambda: stream_plan(agent),
+                        agent_retry_policy(),
+                        stage="planning",
+                        retry_if=lambda e: not started and is_retryable(e),
+                    ),
+                    confidence=completeness,
+                    escalate_if=lambda: not started,
+                )
+                self.run_cache.set(cache_key, search_plan)
+            if not restored:
+                self._checkpoint("plan", search_plan)
+
+            if on_search is not None:
+                for index, item in enumerate(search_plan.searches):
+                    if index not in started:
+                        on_search(item)
+
         self.printer.update_item(
             "planning",
-            f"Will perform {len(result.final_output.searches)} searches",
+            f"Will perform {len(search_plan.searches)} searches",
             is_done=True,
         )
-        return result.final_output_as(WebSearchPlan)
+        return search_plan
 
+    def _start_search(self, item: WebSearchItem, self_url: str, refresh: bool | None = None):
+        refresh = self.refresh if refresh is None else refresh
+        if self.direct_search:
+            return self._direct_search(item, self_url, refresh)
+        return self._search(item, self_url, refresh)
 
-    async def _perform_searches(self, search_plan: WebSearchPlan, self_url: str) -> list[str]:
-        with custom_span("Search the web"):
-            self.printer.update_item("searching", "Searching...")
-            num_completed = 0
-            tasks = [
-                asyncio.create_task(self._search(item, self_url)) for item in search_plan.searches
+    async def _collect_searches(self, tasks: list[asyncio.Task]) -> list[CompetitorAnalysisResponse | str]:
+        self.printer.update_item("searching", "Searching...")
+        num_completed = 0
+        results = []
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if result is not None:
+                results.append(result)
+            num_completed += 1
+            self.printer.update_item(
+                "searching", f"Searching... {num_completed}/{len(tasks)} completed"
+            )
+        self.printer.mark_item_done("searching")
+        return self._writer_inputs(results)
+
+    def _writer_inputs(self, results: list[CompetitorAnalysisResponse | dict]) -> list[CompetitorAnalysisResponse | str]:
+        if self.direct_search:
+            # In query order rather than completion order, so the writer input (and its cache key) is stable.
+            responses = sorted(results, key=lambda response: response.get("query") or "")
+            return [
+                f"Search term: {response.get('query')}\n{format_search_response(response)}"
+                for response in process_search_responses(responses, self.description)
             ]
-            results = []
-            for task in asyncio.as_completed(tasks):
-                result = await task
-                if result is not None:
-                    results.append(result)
-                num_completed += 1
-                self.printer.update_item(
-                    "searching", f"Searching... {num_completed}/{len(tasks)} completed"
-                )
-            self.printer.mark_item_done("searching")
-            return results
+        return results
 
-    async def _search(self, item: WebSearchItem, self_url: str) -> str | None:
+    async def _search(
+        self, item: WebSearchItem, self_url: str, refresh: bool = False, search_depth: str = "basic"
+    ) -> CompetitorAnalysisResponse | None:
         input = f"Search term: {item.query}\nReason for searching: {item.reason}"
         try:
-            result = await Runner.run(
-                search_agent,
-                input,
-                max_turns=2, #IMPORTANT: This is to avoid calling the search tool more than once
-                context={
-                    "self_domain_url": self_url
+            with stage("search", item.query):
+                checkpoint_key = f"search:{search_depth}:{item.query}"
+                restored = self._restore(checkpoint_key, CompetitorAnalysisResponse)
+                if restored is not None:
+                    record_cache_hit()
+                    return restored
+                # Follow-ups look for what the indexed competitor is missing, so they skip the index.
+                indexed = None
+                if not refresh and search_depth == "basic":
+                    indexed = self._lookup_competitor(item.query, self_url)
+                if indexed is not None:
+                    record_cache_hit()
+                    return indexed
+                context = {
+                    "self_domain_url": self_url,
+                    "description": self.description,
+                    "_seen_results": self.seen_results,
                 }
-            )
-            return str(result.final_output)
+                if search_depth != "basic":
+                    # Only set when needed, so basic searches keep their run cache keys.
+                    context["search_depth"] = search_depth
+                result = await self.router.run(
+                    get_search_agent(),
+                    input,
+                    lambda agent: with_retries(
+                        lambda: self.run_cache.run(
+                            agent,
+                            input,
+                            CompetitorAnalysisResponse,
+                            refresh=refresh,
+                            run_config=self.run_config,
+                            max_turns=2, #IMPORTANT: This is to avoid calling the search tool more than once
+                            context=context,
+                        ),
+                        agent_retry_policy(),
+                        stage="search",
+                    ),
+                    confidence=completeness,
+                )
+            self._checkpoint(checkpoint_key, result)
+            self._index_competitor(result.self_analysis, item.query, self_url)
+            return result
         except Exception as e:
             logging.error(f"Error during search: {str(e)}")
+            self.errors.append(error_detail("search", e))
             return None
         
 
-    async def _write_report(self, query: str, search_results: list[str]) -> CompetitorAnalysisResponse:
+    def _lookup_competitor(self, query: str, self_url: str) -> CompetitorAnalysisResponse | None:
+        if self.competitor_index is None:
+            return None
+        try:
+            entry = self.competitor_index.lookup(query, scope=self_url)
+        except Exception as e:
+            logging.warning(f"Error reading the competitor index: {str(e)}")
+            return None
+        if entry is None:
+            return None
+        logging.info(f"Competitor index hit for query: {query} -> {entry.domain}")
+        return CompetitorAnalysisResponse(self_analysis=entry.competitor)
+
+    def _index_competitor(self, competitor: Competitor, query: str, self_url: str) -> None:
+        if self.competitor_index is None:
+            return
+        try:
+            self.competitor_index.upsert(competitor, query=query, scope=self_url)
+        except Exception as e:
+            logging.warning(f"Error updating the competitor index: {str(e)}")
+
+    async def _direct_search(self, item: WebSearchItem, self_url: str, refresh: bool = False) -> dict | None:
+        try:
+            with stage("direct_search", item.query):
+                checkpoint_key = f"direct_search:{item.query}"
+                restored = self._restore(checkpoint_key, dict)
+                if restored is not None:
+                    record_cache_hit()
+                    return restored
+                response = await cached_tavily_search(
+                    query=item.query,
+                    include_domains=[self_url] if self_url else None,
+                    search_depth="basic",
+                    max_results=5,
+                    refresh=refresh,
+                )
+            # Label each response with the planned query so the writer knows what it answers.
+            response = {**response, "query": item.query}
+            self._checkpoint(checkpoint_key, response)
+            return response
+        except Exception as e:
+            logging.error(f"Error during direct search: {str(e)}")
+            self.errors.append(error_detail("direct_search", e))
+            return None
+
+    async def _write_report(
+        self, query: str, search_results: list[CompetitorAnalysisResponse | str]
+    ) -> CompetitorAnalysisResponse:
         self.printer.update_item("writing", "Thinking about report...")
-        input = f"Original query: {query}\nSummarized search results: {search_results}"
-        result = Runner.run_streamed(
-            writer_agent,
-            input,
-        )
-        update_messages = [
-            "Thinking about report...",
-            "Planning report structure...",
-            "Writing outline...",
-            "Creating sections...",
-            "Cleaning up formatting...",
-            "Finalizing report...",
-            "Finishing report...",
-        ]
+        with stage("writing"):
+            writer_agent = get_writer_agent()
+            # Merged, deduplicated competitors as compact JSON, trimmed to the writer's token budget.
+            compacted = compact_search_results(search_results, model=str(writer_agent.model))
+            input = f"Original query: {query}\nSummarized search results: {compacted}"
+            if self.sharded_writer:
+                report = await self._write_sections(input)
+                self.printer.mark_item_done("writing")
+                return report
+            cache_key = self.run_cache.make_key(writer_agent, input, CompetitorAnalysisResponse)
+            if not self.refresh:
+                cached = self.run_cache.get(cache_key, CompetitorAnalysisResponse)
+                if cached is not None:
+                    record_cache_hit()
+                    self.printer.update_item("writing", "Reusing cached report", is_done=True)
+                    return cached
 
-        last_update = time.time()
-        next_message = 0
-        async for _ in result.stream_events():
-            if time.time() - last_update > 5 and next_message < len(update_messages):
-                self.printer.update_item("writing", update_messages[next_message])
-                next_message += 1
+            update_messages = [
+                "Thinking about report...",
+                "Planning report structure...",
+                "Writing outline...",
+                "Creating sections...",
+                "Cleaning up formatting...",
+                "Finalizing report...",
+                "Finishing report...",
+            ]
+
+            async def stream_report(agent) -> CompetitorAnalysisResponse:
+                result = Runner.run_streamed(
+                    agent,
+                    input,
+                    run_config=self.run_config,
+                )
                 last_update = time.time()
+                next_message = 0
+                # Fields of the report are passed on as soon as they are complete, nested ones first.
+                parser = IncrementalJsonParser(max_depth=3)
+                async for event in result.stream_events():
+                    if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                        for path, value in parser.feed(event.data.delta):
+                            if len(path) >= 2:
+                                record_first_content()
+                                self.printer.update_partial(".".join(str(part) for part in path), value)
+                    if time.time() - last_update > 5 and next_message < len(update_messages):
+                        self.printer.update_item("writing", update_messages[next_message])
+                        next_message += 1
+                        last_update = time.time()
+                return result.final_output_as(CompetitorAnalysisResponse)
 
+            report = await self.router.run(
+                writer_agent,
+                input,
+                lambda agent: with_retries(lambda: stream_report(agent), writer_retry_policy(), stage="writing"),
+                confidence=completeness,
+            )
         self.printer.mark_item_done("writing")
-        return result.final_output_as(CompetitorAnalysisResponse)
\ No newline at end of file
+        self.run_cache.set(cache_key, report)
+        return report
+
+    async def _write_sections(self, input: str) -> CompetitorAnalysisResponse:
+        """Write every section of the report concurrently with the shard agents and merge them.
+
+        A failed section is left empty and reported in `errors`; the overview section is required.
+        """
+        shard_agents = get_writer_shard_agents()
+        total = len(shard_agents)
+        self.printer.update_item("writing", f"Writing {total} sections in parallel...")
+        completed = 0
+
+        async def write(shard: str, agent) -> BaseModel:
+            nonlocal completed
+            with stage("writing_shard", shard):
+                section = await self.router.run(
+                    agent,
+                    input,
+                    lambda routed: with_retries(
+                        lambda: self.run_cache.run(
+                            routed, input, agent.output_type, refresh=self.refresh, run_config=self.run_config
+                        ),
+                        writer_retry_policy(),
+                        stage=f"writing_{shard}",
+                    ),
+                )
+            record_first_content()
+            for key, value in section.model_dump(mode="json").items():
+                self.printer.update_partial(f"self_analysis.{key}", value)
+            completed += 1
+            self.printer.update_item("writing", f"Writing sections... {completed}/{total} completed")
+            return section
+
+        results = await asyncio.gather(
+            *(write(shard, agent) for shard, agent in shard_agents.items()), return_exceptions=True
+        )
+        sections = {}
+        for shard, result in zip(shard_agents, results):
+            if isinstance(result, BaseException):
+                if shard == "overview":
+                    raise result
+                logging.error(f"Error writing the {shard} section: {str(result)}")
+                self.errors.append(error_detail(f"writing_{shard}", result))
+                continue
+            sections[shard] = result
+        return merge_sections(sections)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.config import get_settings
+from app.schemas.competitor import Competitor, CompetitorAnalysisResponse
+from app.schemas.report import ReportInDB, StoredReport, StoredSearch
+from app.schemas.request import CompetitorAnalysisRequest
+from app.utils.cache import make_cache_key
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class ReportStore:
+    """SQLite history of reports and of the searches behind them.
+
+    Every run appends a new version, so older reports stay available. Each search is stored
+    with the time it was researched, which lets a refresh redo only the stale ones.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                "id TEXT PRIMARY KEY, request_key TEXT NOT NULL, website TEXT NOT NULL, direct_search INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, request TEXT NOT NULL, record TEXT NOT NULL, report TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_request_key ON reports (request_key, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                "report_id TEXT NOT NULL, position INTEGER NOT NULL, query TEXT NOT NULL, reason TEXT NOT NULL, "
+                "researched_at REAL NOT NULL, competitor TEXT, response TEXT, PRIMARY KEY (report_id, position))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def request_key(request: CompetitorAnalysisRequest, direct_search: bool = False) -> str:
+        return make_cache_key(
+            "report",
+            website=request.website.strip().lower(),
+            description=" ".join(request.description.split()),
+            direct_search=direct_search,
+        )
+
+    def save(
+        self,
+        request: CompetitorAnalysisRequest,
+        report: CompetitorAnalysisResponse,
+        searches: list[StoredSearch],
+        direct_search: bool = False,
+    ) -> ReportInDB:
+        record = ReportInDB(
+            title=request.website,
+            description=request.description,
+            competitors=[search.competitor.id for search in searches if search.competitor is not None],
+        )
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO reports (id, request_key, website, direct_search, created_at, request, record, report) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(record.id),
+                    self.request_key(request, direct_search),
+                    request.website,
+                    int(direct_search),
+                    record.created_at.timestamp(),
+                    request.model_dump_json(),
+                    record.model_dump_json(),
+                    report.model_dump_json(),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO searches (report_id, position, query, reason, researched_at, competitor, response) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(record.id),
+                        position,
+                        search.query,
+                        search.reason,
+                        search.researched_at.timestamp(),
+                        search.competitor.model_dump_json() if search.competitor is not None else None,
+                        json.dumps(search.response, ensure_ascii=False) if search.response is not None else None,
+                    )
+                    for position, search in enumerate(searches)
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def latest(self, request: CompetitorAnalysisRequest, direct_search: bool = False) -> Optional[StoredReport]:
+        """The most recent report for the same request, or None."""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT id, request, record, report FROM reports WHERE request_key = ? ORDER BY created_at DESC LIMIT 1",
+            (self.request_key(request, direct_search),),
+        ).fetchone()
+        if row is None:
+            return None
+        report_id, stored_request, record, report = row
+        searches = [
+            StoredSearch(
+                query=query,
+                reason=reason,
+                researched_at=datetime.fromtimestamp(researched_at, timezone.utc),
+                competitor=Competitor.model_validate_json(competitor) if competitor else None,
+                # Raw Tavily responses stay dicts, so they are parsed rather than validated.
+                response=(orjson.loads(response) if orjson is not None else json.loads(response)) if response else None,
+            )
+            for query, reason, researched_at, competitor, response in conn.execute(
+                "SELECT query, reason, researched_at, competitor, response FROM searches "
+                "WHERE report_id = ? ORDER BY position",
+                (report_id,),
+            )
+        ]
+        return StoredReport(
+            record=ReportInDB.model_validate_json(record),
+            request=CompetitorAnalysisRequest.model_validate_json(stored_request),
+            direct_search=direct_search,
+            report=CompetitorAnalysisResponse.model_validate_json(report),
+            searches=searches,
+        )
+
+    def history(self, website: str, limit: int = 20) -> list[ReportInDB]:
+        """Stored versions of the reports for `website`, newest first."""
+        rows = self._connection().execute(
+            "SELECT record FROM reports WHERE website = ? ORDER BY created_at DESC LIMIT ?",
+            (website, limit),
+        )
+        return [ReportInDB.model_validate_json(record) for (record,) in rows]
+
+
+def _merge_fresh(previous: Any, new: Any) -> Any:
+    # New values win; fields the new run left empty keep their previous value.
+    if new in (None, "", [], {}):
+        return previous
+    if isinstance(previous, dict) and isinstance(new, dict):
+        merged = dict(previous)
+        for key, value in new.items():
+            merged[key] = _merge_fresh(previous.get(key), value)
+        return merged
+    return new
+
+
+def merge_reports(previous: CompetitorAnalysisResponse, new: CompetitorAnalysisResponse) -> CompetitorAnalysisResponse:
+    """Merge a refreshed report into the previous one, keeping the previous id."""
+    merged = _merge_fresh(previous.model_dump(mode="json"), new.model_dump(mode="json"))
+    merged["self_analysis"]["id"] = previous.self_analysis.id
+    return CompetitorAnalysisResponse.model_validate(merged)
+
+
+_default_report_store: Optional[ReportStore] = None
+
+
+def get_default_report_store() -> Optional[ReportStore]:
+    """Process-wide store at REPORT_STORE_PATH. An empty path disables it."""
+    global _default_report_store
+    path = get_settings().report_store_path
+    if not path:
+        return None
+    if _default_report_store is None:
+        try:
+            _default_report_store = ReportStore(path)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not open report store {path}: {str(e)}")
+            return None
+    return _default_report_store
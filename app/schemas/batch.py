@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.common import ErrorDetail
+from app.schemas.metrics import ReportMetrics
+
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.request import CompetitorAnalysisRequest
+
+
+class BatchResult(BaseModel):
+    index: int = Field(..., description="Zero-based line number of the request in the input file.")
+    request: Optional[CompetitorAnalysisRequest] = None
+    report: Optional[CompetitorAnalysisResponse] = None
+    error: Optional[str] = None
+    errors: List[ErrorDetail] = Field(default_factory=list, description="Every failure seen during the analysis.")
+    metrics: Optional[ReportMetrics] = None
+
+
+class BatchSummary(BaseModel):
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Generic, List, Optional, TypeVar
 
 T = TypeVar('T')
@@ -19,4 +19,14 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
 class SingleResponse(BaseModel, Generic[T]):
     data: T
-    message: Optional[str] = None 
\ No newline at end of file
+    message: Optional[str] = None 
+
+class ErrorDetail(BaseModel):
+    # Only built when a call fails, so the validator is not built at import.
+    model_config = ConfigDict(defer_build=True)
+
+    stage: str
+    error_type: str
+    message: str
+    retryable: bool = False
+    attempts: int = 1
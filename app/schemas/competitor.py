@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Dict, List, Optional, Union
 from datetime import datetime
 import uuid
@@ -118,4 +118,17 @@ class CompetitorAnalysisResponse(BaseModel):
     self_analysis: Competitor = Field(
         ...,
         description="The analysis of the original query website."
-    )
\ No newline at end of file
+    )
+
+
+# Index entries are only read or written once a run reaches the competitor index, so the validator is built on first
+# use rather than at import.
+class CompetitorIndexEntry(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    domain: str = Field(..., description="Canonical domain of the competitor website.")
+    competitor: Competitor
+    product_updated_at: Optional[datetime] = None
+    market_updated_at: Optional[datetime] = None
+    swot_updated_at: Optional[datetime] = None
+    updated_at: datetime
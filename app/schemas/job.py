@@ -0,0 +1,42 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
+from datetime import datetime
+from enum import Enum
+
+from app.schemas.common import ErrorDetail
+from app.schemas.metrics import ReportMetrics
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.request import CompetitorAnalysisRequest
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# Only the API uses these models, so their validators are built on first use rather than at import.
+class JobEvent(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    sequence: int
+    item: str = Field(..., description="Progress item, e.g. planning, searching, writing or status.")
+    content: str
+    is_done: bool = False
+    data: Optional[Any] = Field(None, description="For `partial` events, the completed report value at the path in `content`.")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class JobResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    id: str
+    status: JobStatus
+    request: CompetitorAnalysisRequest
+    created_at: datetime
+    updated_at: datetime
+    report: Optional[CompetitorAnalysisResponse] = None
+    error: Optional[str] = None
+    errors: List[ErrorDetail] = Field(default_factory=list)
+    metrics: Optional[ReportMetrics] = None
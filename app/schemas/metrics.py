@@ -0,0 +1,37 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+
+# Metrics are recorded while a report runs, not at import, so the validators are built on first use.
+
+
+class StageMetric(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    stage: str = Field(..., description="store, planning, search, direct_search, tavily, writing or writing_shard.")
+    label: Optional[str] = Field(None, description="What the stage worked on, e.g. the search query.")
+    started_at: float = Field(..., description="Unix timestamp when the stage started.")
+    wall_time: float = 0.0
+    queue_wait: float = Field(0.0, description="Seconds spent waiting for rate limits and concurrency slots.")
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    cache_hit: bool = False
+    first_content: Optional[float] = Field(None, description="Seconds from the stage start to its first streamed output.")
+    model: Optional[str] = Field(None, description="Model the router picked for the stage's last LLM call.")
+    escalations: int = Field(0, description="Times the router moved the stage to a stronger model.")
+    error: Optional[str] = None
+
+
+class ReportMetrics(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    website: str
+    trace_id: Optional[str] = None
+    status: str = "completed"
+    started_at: float
+    wall_time: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    stages: List[StageMetric] = Field(default_factory=list)
@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 
+from app.schemas.competitor import Competitor, CompetitorAnalysisResponse
+from app.schemas.request import CompetitorAnalysisRequest
+
 
 class Insight(BaseModel):
     topic: str
@@ -27,7 +30,7 @@ class ReportUpdate(BaseModel):
 
 class ReportInDB(ReportBase):
     id: uuid.UUID = Field(default_factory=uuid.uuid4)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     insights: Optional[List[Insight]] = None
 
     class Config:
@@ -35,4 +38,26 @@ class ReportInDB(ReportBase):
 
 
 class Report(ReportInDB):
-    pass
\ No newline at end of file
+    pass
+
+
+# The stored report models embed the whole competitor schema. They are only needed once a report is saved or
+# loaded, so their validators are built on first use rather than at import.
+class StoredSearch(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    query: str
+    reason: str
+    researched_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    competitor: Optional[Competitor] = Field(None, description="The competitor found by the search agent.")
+    response: Optional[dict] = Field(None, description="The raw Tavily response, in direct search mode.")
+
+
+class StoredReport(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    record: ReportInDB
+    request: CompetitorAnalysisRequest
+    direct_search: bool = False
+    report: CompetitorAnalysisResponse
+    searches: List[StoredSearch] = Field(default_factory=list, description="The planned searches, in plan order.")
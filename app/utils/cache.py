@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def make_cache_key(namespace: str, **parts: Any) -> str:
+    """Build a content-addressed key from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.time() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """On-disk LRU cache with a per-entry TTL, shared between processes through one SQLite file.
+
+    Values must be JSON-serializable. The database runs in WAL mode so several worker processes
+    can read while one of them writes. Counting the rows is a full scan, so the size limit is only
+    enforced every `max_entries // 100` writes (at most every 1000); the cache can briefly exceed it
+    by that many entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: float = 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._evict_every = max(1, min(1000, max_entries // 100))
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads, so keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        text = self.get_text(key)
+        return json.loads(text) if text is not None else None
+
+    def get_text(self, key: str) -> Optional[str]:
+        """The stored JSON text of a value, for callers that parse it themselves."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[tuple[str, float]]:
+        """The stored JSON text of a value and the time it expires at."""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            now = time.time()
+            if expires_at < now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value, expires_at
+        except sqlite3.Error as e:
+            logging.warning(f"Error reading from cache {self.path}: {str(e)}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_text(key, json.dumps(value, ensure_ascii=False), ttl)
+
+    def set_text(self, key: str, text: str, ttl: Optional[float] = None) -> None:
+        """Store a value that is already serialized to JSON text."""
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, text, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % self._evict_every == 0:
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logging.warning(f"Error writing to cache {self.path}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logging.warning(f"Error deleting from cache {self.path}: {str(e)}")
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()
+        return count
+
+
+class TieredCache:
+    """Memory tier in front of an optional on-disk tier.
+
+    Disk hits are promoted to memory for the rest of their TTL, so they never outlive the disk entry.
+
+    `get_text`/`set_text` keep values as JSON text in both tiers, for callers that validate the
+    text directly instead of going through a parsed dict.
+    """
+
+    def __init__(self, memory: MemoryCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_entry(self, key: str) -> Optional[tuple[str, float]]:
+        entry = self.disk.get_entry(key) if self.disk is not None else None
+        if entry is None:
+            return None
+        text, expires_at = entry
+        return text, max(0.0, expires_at - time.time())
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            entry = self._disk_entry(key)
+            if entry is not None:
+                value = json.loads(entry[0])
+                self.memory.set(key, value, ttl=entry[1])
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def get_text(self, key: str) -> Optional[str]:
+        text = self.memory.get(key)
+        if text is None:
+            entry = self._disk_entry(key)
+            if entry is not None:
+                text = entry[0]
+                self.memory.set(key, text, ttl=entry[1])
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def set_text(self, key: str, text: str, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, text, ttl)
+        if self.disk is not None:
+            self.disk.set_text(key, text, ttl)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def build_cache(
+    disk_path: Optional[str],
+    ttl: float,
+    memory_entries: int,
+    disk_entries: int,
+) -> TieredCache:
+    """Build a `TieredCache`; an empty `disk_path` disables the disk tier."""
+    disk = SQLiteCache(disk_path, max_entries=disk_entries, ttl=ttl) if disk_path else None
+    return TieredCache(MemoryCache(max_entries=memory_entries, ttl=ttl), disk)
@@ -0,0 +1,166 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import tiktoken
+
+from app.config import get_settings
+from app.schemas.competitor import Competitor
+
+# Caps tried in order on every list field until the serialized competitors fit the budget.
+_LIST_CAPS = (10, 6, 4, 2, 1)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads its encodings on first use; without them, estimate 4 characters per token.
+        logging.warning(f"Could not load tiktoken encoding for {model}, estimating tokens: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+def _truncate(text: str, max_tokens: int, model: str) -> str:
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[: max_tokens * 4]
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+
+def canonical_domain(website: Optional[str]) -> Optional[str]:
+    if not website:
+        return None
+    parsed = urlparse(website if "://" in website else f"https://{website}")
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+def _merge_values(current: Any, new: Any) -> Any:
+    if current in (None, "", [], {}):
+        return new
+    if new in (None, "", [], {}):
+        return current
+    if isinstance(current, dict) and isinstance(new, dict):
+        merged = dict(current)
+        for key, value in new.items():
+            merged[key] = _merge_values(merged.get(key), value)
+        return merged
+    if isinstance(current, list) and isinstance(new, list):
+        merged = list(current)
+        seen = {json.dumps(item, sort_keys=True, default=str) for item in current}
+        for item in new:
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(item)
+        return merged
+    return current
+
+
+def merge_competitors(competitors: list[Competitor]) -> list[dict]:
+    """Merge competitors that share a canonical domain (or, without a website, a name).
+
+    The random `id` and empty fields are dropped. Lists are unioned, nested objects merged field
+    by field, and the highest `score_affinity` is kept. Searches finish in any order, so the
+    competitors are merged and returned in key order; the same results always give the same output.
+    """
+    items = []
+    for competitor in competitors:
+        data = competitor.model_dump(mode="json", exclude={"id"}, exclude_none=True)
+        key = canonical_domain(data.get("website")) or " ".join(data.get("name", "").lower().split())
+        items.append((key, json.dumps(data, sort_keys=True, ensure_ascii=False), data))
+    merged: dict[str, dict] = {}
+    for key, _, data in sorted(items, key=lambda item: item[:2]):
+        if key not in merged:
+            merged[key] = data
+            continue
+        existing = merged[key]
+        score = max(existing.get("score_affinity") or 0, data.get("score_affinity") or 0)
+        merged[key] = _merge_values(existing, data)
+        if score:
+            merged[key]["score_affinity"] = score
+    return [merged[key] for key in sorted(merged)]
+
+
+def _cap_lists(value: Any, cap: int) -> Any:
+    if isinstance(value, dict):
+        return {key: _cap_lists(item, cap) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_cap_lists(item, cap) for item in value[:cap]]
+    return value
+
+
+def _dump(items: list[dict]) -> str:
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+
+def fit_competitors_to_budget(competitors: list[dict], budget: int, model: str = "gpt-4o-mini") -> str:
+    """Serialize merged competitors as compact JSON that fits in `budget` tokens.
+
+    Long lists are shortened first; if that is not enough, the competitors with the lowest
+    `score_affinity` are dropped.
+    """
+    text = _dump(competitors)
+    if count_tokens(text, model) <= budget:
+        return text
+    for cap in _LIST_CAPS:
+        capped = [_cap_lists(item, cap) for item in competitors]
+        text = _dump(capped)
+        if count_tokens(text, model) <= budget:
+            return text
+    ranked = sorted(capped, key=lambda item: item.get("score_affinity") or 0, reverse=True)
+    while len(ranked) > 1:
+        ranked.pop()
+        text = _dump(ranked)
+        if count_tokens(text, model) <= budget:
+            break
+    return text
+
+
+def fit_texts_to_budget(texts: list[str], budget: int, model: str = "gpt-4o-mini") -> str:
+    """Join plain-text search blocks, giving each an equal share of the budget when they do not fit."""
+    joined = "\n\n".join(texts)
+    if not texts or count_tokens(joined, model) <= budget:
+        return joined
+    share = max(1, budget // len(texts))
+    return "\n\n".join(_truncate(text, share, model) for text in texts)
+
+
+def compact_search_results(
+    search_results: list,
+    budget: Optional[int] = None,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """Build the writer's view of the search results within a token budget (by default WRITER_INPUT_TOKEN_BUDGET).
+
+    Accepts the `CompetitorAnalysisResponse` outputs of the search agent, or plain-text blocks
+    from direct search mode.
+    """
+    budget = get_settings().writer_input_token_budget if budget is None else budget
+    competitors = [result.self_analysis for result in search_results if not isinstance(result, str)]
+    texts = [result for result in search_results if isinstance(result, str)]
+    parts = []
+    if competitors:
+        merged = merge_competitors(competitors)
+        parts.append(fit_competitors_to_budget(merged, budget, model))
+    if texts:
+        used = count_tokens(parts[0], model) if parts else 0
+        parts.append(fit_texts_to_budget(texts, max(1, budget - used), model))
+    compacted = "\n\n".join(parts)
+    logging.info(f"Writer context compacted to {count_tokens(compacted, model)} tokens (budget {budget})")
+    return compacted
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+import httpx
+import openai
+from agents import set_default_openai_client
+
+from app.config import get_settings
+
+# Connection pools shared by every OpenAI and Tavily request of a process.
+_clients: dict[str, httpx.AsyncClient] = {}
+_http2: Optional[bool] = None
+
+
+def http2_enabled() -> bool:
+    """Whether HTTP2=true is set and the optional `h2` package is installed."""
+    global _http2
+    if _http2 is None:
+        _http2 = get_settings().http2
+        if _http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logging.warning("HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+                _http2 = False
+    return _http2
+
+
+def http_limits() -> httpx.Limits:
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+def http_timeout(read: float) -> httpx.Timeout:
+    return httpx.Timeout(read, connect=get_settings().http_connect_timeout)
+
+
+class _LoopPoolTransport(httpx.AsyncBaseTransport):
+    """Keeps one connection pool per event loop.
+
+    Pooled connections only work on the loop that opened them, and batch workers, tests and the
+    benchmarks call `asyncio.run` more than once in a process. Pools of closed loops are dropped.
+    """
+
+    def __init__(self):
+        self._pools: dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+
+    def _get_pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            for closed in [other for other in self._pools if other.is_closed()]:
+                del self._pools[closed]
+            pool = httpx.AsyncHTTPTransport(limits=http_limits(), http2=http2_enabled())
+            self._pools[loop] = pool
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._get_pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # Only the running loop's pool can be closed; the others are left to their loops.
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+def get_http_client(name: str, **kwargs: Any) -> httpx.AsyncClient:
+    """The process-wide client called `name`, created with `kwargs` on first use.
+
+    Connections are kept alive between requests, so concurrent searches and agent turns reuse
+    open TLS connections (and their DNS lookups) instead of opening one per request. Each event
+    loop gets its own pool, so the client keeps working after `asyncio.run` is called again.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(transport=_LoopPoolTransport(), **kwargs)
+        _clients[name] = client
+    return client
+
+
+async def aclose_http_clients() -> None:
+    """Close the pools of the running loop. The clients are recreated if used again."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def configure_openai_client(api_key: Optional[str]) -> Optional[openai.AsyncOpenAI]:
+    """Make the agents runner (and trace export) use an OpenAI client on the shared pool."""
+    if not api_key:
+        logging.warning("No OpenAI API key found, falling back to the OPENAI_API_KEY environment variable")
+        return None
+    client = openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=get_http_client(
+            "openai",
+            timeout=http_timeout(openai.DEFAULT_TIMEOUT.read),
+            follow_redirects=True,
+        ),
+    )
+    set_default_openai_client(client)
+    return client
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Protocol
+
+from app.config import get_settings
+from app.schemas.metrics import ReportMetrics, StageMetric
+
+# The collector of the report being produced and the stage currently running in this task.
+# Lower layers (scheduler, caches, retries) record into them without being passed anything.
+_current_collector: ContextVar[Optional["MetricsCollector"]] = ContextVar("metrics_collector", default=None)
+_current_stage: ContextVar[Optional[StageMetric]] = ContextVar("metrics_stage", default=None)
+
+
+class MetricsCollector:
+    """Collects the stage metrics of one report."""
+
+    def __init__(self, website: str, trace_id: Optional[str] = None):
+        self.metrics = ReportMetrics(website=website, trace_id=trace_id, started_at=time.time())
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def activate(self) -> Iterator["MetricsCollector"]:
+        token = _current_collector.set(self)
+        try:
+            yield self
+        finally:
+            _current_collector.reset(token)
+
+    def finish(self, status: str = "completed") -> ReportMetrics:
+        metrics = self.metrics
+        metrics.status = status
+        metrics.wall_time = time.perf_counter() - self._started
+        metrics.input_tokens = sum(stage.input_tokens for stage in metrics.stages)
+        metrics.output_tokens = sum(stage.output_tokens for stage in metrics.stages)
+        metrics.retries = sum(stage.retries for stage in metrics.stages)
+        metrics.cache_hits = sum(1 for stage in metrics.stages if stage.cache_hit)
+        return metrics
+
+
+@contextmanager
+def stage(name: str, label: Optional[str] = None) -> Iterator[Optional[StageMetric]]:
+    """Time a pipeline stage of the current report. Does nothing outside `MetricsCollector.activate`."""
+    collector = _current_collector.get()
+    if collector is None:
+        yield None
+        return
+    metric = StageMetric(stage=name, label=label, started_at=time.time())
+    collector.metrics.stages.append(metric)
+    token = _current_stage.set(metric)
+    started = time.perf_counter()
+    try:
+        yield metric
+    except BaseException as e:
+        metric.error = type(e).__name__
+        raise
+    finally:
+        metric.wall_time = time.perf_counter() - started
+        _current_stage.reset(token)
+
+
+def record_queue_wait(seconds: float) -> None:
+    metric = _current_stage.get()
+    if metric is not None:
+        metric.queue_wait += seconds
+
+
+def record_tokens(input_tokens: int, output_tokens: int) -> None:
+    metric = _current_stage.get()
+    if metric is not None:
+        metric.input_tokens += input_tokens or 0
+        metric.output_tokens += output_tokens or 0
+
+
+def record_retry() -> None:
+    metric = _current_stage.get()
+    if metric is not None:
+        metric.retries += 1
+
+
+def record_first_content() -> None:
+    metric = _current_stage.get()
+    if metric is not None and metric.first_content is None:
+        metric.first_content = time.time() - metric.started_at
+
+
+def record_model(model: str, escalated: bool = False) -> None:
+    metric = _current_stage.get()
+    if metric is not None:
+        metric.model = model
+        if escalated:
+            metric.escalations += 1
+
+
+def record_cache_hit() -> None:
+    metric = _current_stage.get()
+    if metric is not None:
+        metric.cache_hit = True
+
+
+class MetricsSink(Protocol):
+    def emit(self, metrics: ReportMetrics) -> None: ...
+
+
+class JsonlMetricsSink:
+    """Appends one `ReportMetrics` JSON line per report to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def emit(self, metrics: ReportMetrics) -> None:
+        line = metrics.model_dump_json() + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class PrometheusMetricsSink:
+    """Aggregates report metrics and renders them in the Prometheus text exposition format."""
+
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reports: dict[str, int] = defaultdict(int)
+        self.report_seconds = [0] * (len(self.BUCKETS) + 1)
+        self.report_seconds_sum = 0.0
+        self.stage_seconds: dict[str, list[int]] = defaultdict(lambda: [0] * (len(self.BUCKETS) + 1))
+        self.stage_seconds_sum: dict[str, float] = defaultdict(float)
+        self.stage_queue_wait_sum: dict[str, float] = defaultdict(float)
+        self.stage_tokens: dict[tuple[str, str], int] = defaultdict(int)
+        self.stage_retries: dict[str, int] = defaultdict(int)
+        self.stage_escalations: dict[str, int] = defaultdict(int)
+        self.stage_cache_hits: dict[str, int] = defaultdict(int)
+        self.stage_errors: dict[str, int] = defaultdict(int)
+
+    def _observe(self, buckets: list[int], value: float) -> None:
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+        buckets[-1] += 1
+
+    def emit(self, metrics: ReportMetrics) -> None:
+        with self._lock:
+            self.reports[metrics.status] += 1
+            self._observe(self.report_seconds, metrics.wall_time)
+            self.report_seconds_sum += metrics.wall_time
+            for metric in metrics.stages:
+                self._observe(self.stage_seconds[metric.stage], metric.wall_time)
+                self.stage_seconds_sum[metric.stage] += metric.wall_time
+                self.stage_queue_wait_sum[metric.stage] += metric.queue_wait
+                self.stage_tokens[(metric.stage, "input")] += metric.input_tokens
+                self.stage_tokens[(metric.stage, "output")] += metric.output_tokens
+                self.stage_retries[metric.stage] += metric.retries
+                self.stage_escalations[metric.stage] += metric.escalations
+                self.stage_cache_hits[metric.stage] += int(metric.cache_hit)
+                self.stage_errors[metric.stage] += int(metric.error is not None)
+
+    def _histogram(self, lines: list[str], name: str, labels: str, buckets: list[int], total: float) -> None:
+        separator = "," if labels else ""
+        for bound, count in zip(self.BUCKETS, buckets):
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {buckets[-1]}')
+        lines.append(f"{name}_sum{{{labels}}} {total}")
+        lines.append(f"{name}_count{{{labels}}} {buckets[-1]}")
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP research_reports_total Reports produced, by status.",
+                "# TYPE research_reports_total counter",
+            ]
+            lines += [f'research_reports_total{{status="{status}"}} {count}' for status, count in self.reports.items()]
+            lines += [
+                "# HELP research_report_seconds End-to-end report latency.",
+                "# TYPE research_report_seconds histogram",
+            ]
+            self._histogram(lines, "research_report_seconds", "", self.report_seconds, self.report_seconds_sum)
+            lines += [
+                "# HELP research_stage_seconds Wall time of each pipeline stage.",
+                "# TYPE research_stage_seconds histogram",
+            ]
+            for name, buckets in self.stage_seconds.items():
+                self._histogram(lines, "research_stage_seconds", f'stage="{name}"', buckets, self.stage_seconds_sum[name])
+            counters = (
+                ("research_stage_queue_wait_seconds_total", "Time spent waiting for rate limits.", self.stage_queue_wait_sum),
+                ("research_stage_retries_total", "Retried calls.", self.stage_retries),
+                ("research_stage_escalations_total", "Calls moved to a stronger model.", self.stage_escalations),
+                ("research_stage_cache_hits_total", "Stages served from a cache.", self.stage_cache_hits),
+                ("research_stage_errors_total", "Stages that raised an error.", self.stage_errors),
+            )
+            for name, help_text, values in counters:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [f'{name}{{stage="{stage_name}"}} {value}' for stage_name, value in values.items()]
+            lines += [
+                "# HELP research_stage_tokens_total LLM tokens used, by stage and direction.",
+                "# TYPE research_stage_tokens_total counter",
+            ]
+            lines += [
+                f'research_stage_tokens_total{{stage="{stage_name}",direction="{direction}"}} {value}'
+                for (stage_name, direction), value in self.stage_tokens.items()
+            ]
+            return "\n".join(lines) + "\n"
+
+
+_prometheus_sink: Optional[PrometheusMetricsSink] = None
+_sinks: Optional[list[MetricsSink]] = None
+
+
+def get_prometheus_sink() -> PrometheusMetricsSink:
+    global _prometheus_sink
+    if _prometheus_sink is None:
+        _prometheus_sink = PrometheusMetricsSink()
+    return _prometheus_sink
+
+
+def _get_sinks() -> list[MetricsSink]:
+    # Built on first use: the Prometheus sink, and a JSONL file when METRICS_JSONL_PATH is set.
+    global _sinks
+    if _sinks is None:
+        _sinks = [get_prometheus_sink()]
+        path = get_settings().metrics_jsonl_path
+        if path:
+            _sinks.append(JsonlMetricsSink(path))
+    return _sinks
+
+
+def add_sink(sink: MetricsSink) -> None:
+    _get_sinks().append(sink)
+
+
+def emit_metrics(metrics: ReportMetrics) -> None:
+    for sink in _get_sinks():
+        try:
+            sink.emit(metrics)
+        except Exception as e:
+            logging.warning(f"Error emitting metrics to {type(sink).__name__}: {str(e)}")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from agents import Agent
+from agents import Runner as _Runner
+from agents.agent_output import AgentOutputSchema
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def json_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """`model.model_json_schema()`, computed once per model. Callers must not mutate the result."""
+    return model.model_json_schema()
+
+
+@lru_cache(maxsize=None)
+def output_schema(output_type: Any) -> AgentOutputSchema:
+    """The agents SDK's output schema and validator for `output_type`, built once per type.
+
+    Building it generates and post-processes the whole JSON schema, which takes about 10ms for
+    `CompetitorAnalysisResponse`. The SDK otherwise does this again on every agent turn.
+    """
+    return AgentOutputSchema(output_type)
+
+
+class Runner(_Runner):
+    """`agents.Runner` that reuses the output schema of each output type across runs and turns."""
+
+    @classmethod
+    def _get_output_schema(cls, agent: Agent[Any]) -> Optional[AgentOutputSchema]:
+        if agent.output_type is None or agent.output_type is str:
+            return None
+        return output_schema(agent.output_type)
+
+
+def dump_json(model: BaseModel, indent: bool = False) -> bytes:
+    """Serialize `model` to UTF-8 JSON, with orjson when it is installed."""
+    if orjson is None:
+        return model.model_dump_json(indent=2 if indent else None).encode("utf-8")
+    option = orjson.OPT_INDENT_2 if indent else 0
+    return orjson.dumps(model.model_dump(), default=str, option=option)
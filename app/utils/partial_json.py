@@ -0,0 +1,118 @@
+import json
+from typing import Any, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "index", "expecting_key")
+
+    def __init__(self, kind: str, start: int, path: tuple):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key: Optional[str] = None
+        self.index = 0
+        self.expecting_key = kind == "object"
+
+
+class IncrementalJsonParser:
+    """Parses a JSON document that arrives in chunks and reports every value as soon as it is complete.
+
+    `feed` returns `(path, value)` pairs, where `path` is a tuple of object keys and array indexes
+    from the root (the root itself has path `()`). Only values whose path is at most `max_depth`
+    long are decoded, so deep documents do not pay for decoding every nested leaf.
+
+    Example:
+        parser = IncrementalJsonParser(max_depth=2)
+        parser.feed('{"searches": [{"query": "a"}, {"qu')  # -> [(("searches", 0), {"query": "a"})]
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._token_start = -1
+        self._token_is_string = False
+        self.done = False
+
+    def feed(self, chunk: str) -> list[tuple[tuple, Any]]:
+        self._buffer += chunk
+        completed: list[tuple[tuple, Any]] = []
+        buffer = self._buffer
+        i = self._pos
+        end = len(buffer)
+        while i < end and not self.done:
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(i, completed)
+                i += 1
+                continue
+
+            if self._token_start >= 0 and not self._token_is_string:
+                # Inside a number / true / false / null literal.
+                if char in _WHITESPACE or char in ",}]":
+                    self._emit(self._value_path(), self._token_start, i, completed)
+                    self._token_start = -1
+                else:
+                    i += 1
+                    continue
+
+            if char in _WHITESPACE:
+                pass
+            elif char == '"':
+                self._in_string = True
+                self._token_start = i
+                self._token_is_string = True
+            elif char in "{[":
+                kind = "object" if char == "{" else "array"
+                self._stack.append(_Frame(kind, i, self._value_path()))
+            elif char in "}]":
+                frame = self._stack.pop()
+                self._emit(frame.path, frame.start, i + 1, completed)
+                if not self._stack:
+                    self.done = True
+            elif char == ":":
+                self._stack[-1].expecting_key = False
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.kind == "object":
+                    frame.expecting_key = True
+                else:
+                    frame.index += 1
+            else:
+                self._token_start = i
+                self._token_is_string = False
+            i += 1
+        self._pos = i
+        return completed
+
+    def _value_path(self) -> tuple:
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        if frame.kind == "object":
+            return frame.path + (frame.key,)
+        return frame.path + (frame.index,)
+
+    def _close_string(self, end: int, completed: list) -> None:
+        start = self._token_start
+        self._token_start = -1
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame.kind == "object" and frame.expecting_key:
+            frame.key = json.loads(self._buffer[start : end + 1])
+            return
+        self._emit(self._value_path(), start, end + 1, completed)
+
+    def _emit(self, path: tuple, start: int, end: int, completed: list) -> None:
+        if len(path) <= self.max_depth:
+            completed.append((path, json.loads(self._buffer[start:end])))
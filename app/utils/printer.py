@@ -1,20 +1,40 @@
-from typing import Any
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional, TextIO
 
 from rich.console import Console, Group
 from rich.live import Live
 from rich.spinner import Spinner
 from rich.table import Table
 
+from app.config import get_settings
+
 
 class Printer:
-    def __init__(self, console: Console):
-        self.live = Live(console=console)
+    """Rich live view of one analysis.
+
+    Updates only record the new state; the view is rebuilt by the `Live` refresh thread a few
+    times per second, so frequent updates stay cheap. The console and display start on first use.
+    """
+
+    def __init__(self, console: Optional[Console] = None):
+        self.console = console
+        self.live: Optional[Live] = None
         self.items: dict[str, tuple[str, bool]] = {}
         self.hide_done_ids: set[str] = set()
-        self.live.start()
+        self.partial: dict[str, Any] = {}
+
+    def _start(self) -> None:
+        if self.live is None:
+            self.live = Live(console=self.console or Console(), get_renderable=self._render, refresh_per_second=4)
+            self.live.start()
 
     def end(self) -> None:
-        self.live.stop()
+        if self.live is not None:
+            self.live.stop()
+            self.live = None
 
     def hide_done_checkmark(self, item_id: str) -> None:
         self.hide_done_ids.add(item_id)
@@ -25,18 +45,205 @@ class Printer:
         self.items[item_id] = (content, is_done)
         if hide_checkmark:
             self.hide_done_ids.add(item_id)
-        self.flush()
+        self._start()
 
     def mark_item_done(self, item_id: str) -> None:
         self.items[item_id] = (self.items[item_id][0], True)
-        self.flush()
+
+    def update_partial(self, path: str, value: Any) -> None:
+        """Show which report fields the writer has finished so far."""
+        self.partial[path] = value
+        fields = [key.split(".", 1)[1] for key in self.partial if key.count(".") == 1]
+        content = f"Report so far: {', '.join(fields)}" if fields else "Report so far: ..."
+        description = self.partial.get("self_analysis.description")
+        if isinstance(description, str):
+            content += f"\n  {description[:300]}"
+        self.update_item("partial", content, is_done=True, hide_checkmark=True)
 
     def flush(self) -> None:
+        if self.live is not None:
+            self.live.refresh()
+
+    def _render(self) -> Group:
         renderables: list[Any] = []
-        for item_id, (content, is_done) in self.items.items():
+        for item_id, (content, is_done) in list(self.items.items()):
             if is_done:
                 prefix = "✅ " if item_id not in self.hide_done_ids else ""
                 renderables.append(prefix + content)
             else:
                 renderables.append(Spinner("dots", text=content))
-        self.live.update(Group(*renderables))
\ No newline at end of file
+        return Group(*renderables)
+
+
+class NullPrinter:
+    """Printer with the same interface that renders nothing, used for batch runs."""
+
+    def end(self) -> None:
+        pass
+
+    def hide_done_checkmark(self, item_id: str) -> None:
+        pass
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        pass
+
+    def mark_item_done(self, item_id: str) -> None:
+        pass
+
+    def update_partial(self, path: str, value: Any) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+class CallbackPrinter(NullPrinter):
+    """Printer that forwards every item update to `callback(item_id, content, is_done)`.
+
+    Completed parts of the report are passed to `partial_callback(path, value)`, if given.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str, str, bool], None],
+        partial_callback: Optional[Callable[[str, Any], None]] = None,
+    ):
+        self.callback = callback
+        self.partial_callback = partial_callback
+        self.items: dict[str, tuple[str, bool]] = {}
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        self.items[item_id] = (content, is_done)
+        self.callback(item_id, content, is_done)
+
+    def mark_item_done(self, item_id: str) -> None:
+        content = self.items.get(item_id, ("", False))[0]
+        self.update_item(item_id, content, is_done=True)
+
+    def update_partial(self, path: str, value: Any) -> None:
+        if self.partial_callback is not None:
+            self.partial_callback(path, value)
+
+
+# JSON lines from concurrent runs that share a stream must not interleave.
+_stream_lock = threading.Lock()
+
+
+class JsonLinesPrinter(NullPrinter):
+    """Writes every progress update as one compact JSON line, for logs and machines rather than terminals.
+
+    Each line has `ts`, `run` (the label given at construction), `item`, `content` and `done`;
+    partial report fields are written with `item` set to `partial`, their `path` and `value`.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, label: Optional[str] = None):
+        self.stream = stream or sys.stderr
+        self.label = label
+        self.items: dict[str, str] = {}
+
+    def _write(self, event: dict) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), "run": self.label, **event}, ensure_ascii=False, separators=(",", ":"), default=str)
+        with _stream_lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        self.items[item_id] = content
+        self._write({"item": item_id, "content": content, "done": is_done})
+
+    def mark_item_done(self, item_id: str) -> None:
+        self._write({"item": item_id, "content": self.items.get(item_id, ""), "done": True})
+
+    def update_partial(self, path: str, value: Any) -> None:
+        self._write({"item": "partial", "path": path, "value": value})
+
+
+class BatchProgressView:
+    """One rich live view shared by every run of a batch.
+
+    Shows the totals and the latest step of each run in progress. Runs report through the
+    printers returned by `printer()`; the view is rebuilt only on the `Live` refresh.
+    """
+
+    def __init__(self, console: Optional[Console] = None, total: Optional[int] = None, max_rows: int = 20):
+        self.total = total
+        self.max_rows = max_rows
+        self.completed = 0
+        self.failed = 0
+        self.runs: dict[str, str] = {}
+        self.live = Live(console=console or Console(), get_renderable=self._render, refresh_per_second=4)
+
+    def start(self) -> None:
+        self.live.start()
+
+    def stop(self) -> None:
+        self.live.stop()
+
+    def printer(self, label: str) -> "BatchRunPrinter":
+        self.runs[label] = "Starting..."
+        return BatchRunPrinter(self, label)
+
+    def record(self, succeeded: bool) -> None:
+        if succeeded:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def _render(self) -> Table:
+        total = f"/{self.total}" if self.total is not None else ""
+        runs = list(self.runs.items())
+        table = Table(
+            title=f"{self.completed + self.failed}{total} done, {self.failed} failed, {len(runs)} running",
+            show_header=False,
+            box=None,
+        )
+        for label, content in runs[: self.max_rows]:
+            table.add_row(Spinner("dots"), label, content.splitlines()[0] if content else "")
+        if len(runs) > self.max_rows:
+            table.add_row("", f"... and {len(runs) - self.max_rows} more", "")
+        return table
+
+
+class BatchRunPrinter(NullPrinter):
+    """Printer for one run of a batch that updates its row in a `BatchProgressView`."""
+
+    def __init__(self, view: BatchProgressView, label: str):
+        self.view = view
+        self.label = label
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        if item_id != "trace_id":
+            self.view.runs[self.label] = content
+
+    def end(self) -> None:
+        self.view.runs.pop(self.label, None)
+
+
+PROGRESS_MODES = ("auto", "rich", "json", "none")
+
+
+def resolve_progress_mode(mode: Optional[str] = None) -> str:
+    """`mode`, or the PROGRESS setting; `auto` is `rich` on a terminal and `json` otherwise."""
+    mode = (mode or get_settings().progress).lower()
+    if mode not in PROGRESS_MODES:
+        raise ValueError(f"Unknown progress mode {mode!r}, expected one of {', '.join(PROGRESS_MODES)}")
+    if mode == "auto":
+        return "rich" if sys.stdout.isatty() else "json"
+    return mode
+
+
+def make_printer(mode: Optional[str] = None, label: Optional[str] = None) -> Printer | JsonLinesPrinter | NullPrinter:
+    mode = resolve_progress_mode(mode)
+    if mode == "none":
+        return NullPrinter()
+    if mode == "json":
+        return JsonLinesPrinter(label=label)
+    return Printer()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from app.config import get_settings
+
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "source"}
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "de la el en et le les los las des du un une y".split()
+)
+
+
+def canonical_url(url: str) -> str:
+    """Key under which different spellings of the same page compare equal.
+
+    Drops the scheme, `www.`, default ports, fragments, tracking parameters and trailing slashes,
+    and sorts the query parameters.
+    """
+    parsed = urlparse(url.strip() if "://" in url else f"https://{url.strip()}")
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parsed.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def shingles(text: str) -> frozenset[str]:
+    words = tokenize(text)
+    if not words:
+        return frozenset()
+    return frozenset(" ".join(words[i : i + 3]) for i in range(max(1, len(words) - 2)))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Jaccard similarity of two shingle sets.
+
+    A search returns a few dozen snippets at most, so comparing the sets exactly is cheaper than
+    estimating the same value with MinHash or SimHash signatures, and it is exact on short texts.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus of token lists."""
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+        document_frequency = Counter(term for document in documents for term in set(document))
+        self.idf = {
+            term: math.log((len(documents) - count + 0.5) / (count + 0.5) + 1)
+            for term, count in document_frequency.items()
+        }
+
+    def score(self, query: list[str], index: int) -> float:
+        frequencies = self.frequencies[index]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+        score = 0.0
+        for term in query:
+            frequency = frequencies.get(term)
+            if frequency:
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+        return score
+
+
+def rank_results(
+    results: list[dict],
+    query: str,
+    description: Optional[str] = None,
+    top_k: Optional[int] = None,
+) -> list[dict]:
+    """The `top_k` results most relevant to `query` and, with half the weight, to the company description.
+
+    `top_k` defaults to the SEARCH_TOP_K setting; 0 keeps all of them.
+
+    Tavily's own relevance score is added, so it decides between results the terms do not tell apart.
+    """
+    if not results:
+        return results
+    bm25 = BM25([tokenize(f"{result.get('title', '')} {result.get('content', '')}") for result in results])
+    query_terms = tokenize(query)
+    description_terms = tokenize(description or "")
+    scores = [
+        bm25.score(query_terms, i) + 0.5 * bm25.score(description_terms, i) + (result.get("score") or 0.0)
+        for i, result in enumerate(results)
+    ]
+    order = sorted(range(len(results)), key=lambda i: -scores[i])
+    top_k = get_settings().search_top_k if top_k is None else top_k
+    if top_k > 0:
+        order = order[:top_k]
+    return [results[i] for i in order]
+
+
+class SeenResults:
+    """Canonical URLs and shingles of the search results already passed on.
+
+    One instance is shared by all searches of a report, so a page found by an earlier query is not
+    passed on again.
+    """
+
+    def __init__(self):
+        self.urls: set[str] = set()
+        self.texts: list[frozenset[str]] = []
+
+    def contains(self, url: str, text: frozenset[str], max_similarity: float) -> bool:
+        return url in self.urls or any(similarity(text, seen) >= max_similarity for seen in self.texts)
+
+    def add(self, url: str, text: frozenset[str]) -> None:
+        self.urls.add(url)
+        self.texts.append(text)
+
+
+def process_search_responses(
+    responses: list[dict],
+    description: Optional[str] = None,
+    top_k: Optional[int] = None,
+    max_similarity: Optional[float] = None,
+    seen: Optional[SeenResults] = None,
+) -> list[dict]:
+    """Deduplicate the results of several Tavily responses and keep the best of each.
+
+    A result is dropped when its canonical URL, or content nearly identical to its own, already
+    appeared earlier in the same response or among the results kept from earlier responses (and
+    from `seen`, which is updated). The rest of each response is ranked against its query with
+    `rank_results`. Responses left without results or an answer are dropped.
+
+    Results whose word 3-grams overlap at least `max_similarity` (Jaccard similarity, by default
+    the SEARCH_NEAR_DUPLICATE_SIMILARITY setting) are treated as the same content.
+    """
+    if max_similarity is None:
+        max_similarity = get_settings().search_near_duplicate_similarity
+    seen = seen if seen is not None else SeenResults()
+    processed = []
+    for response in responses:
+        candidates = SeenResults()
+        keys = {}
+        results = []
+        for result in response.get("results", []):
+            url = canonical_url(result.get("url", ""))
+            text = shingles(f"{result.get('title', '')} {result.get('content', '')}")
+            if seen.contains(url, text, max_similarity) or candidates.contains(url, text, max_similarity):
+                continue
+            candidates.add(url, text)
+            keys[id(result)] = (url, text)
+            results.append(result)
+        # Only the results that survive the cut count as seen, so a later query can still keep the others.
+        results = rank_results(results, response.get("query", ""), description, top_k)
+        for result in results:
+            seen.add(*keys[id(result)])
+        if results or response.get("answer"):
+            processed.append({**response, "results": results})
+    return processed
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import openai
+
+from app.config import get_settings
+from app.schemas.common import ErrorDetail
+from app.utils.metrics import record_retry
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    timeout: Optional[float] = None
+    "Deadline for each attempt, in seconds. None means no deadline."
+
+
+class CallError(Exception):
+    """Raised when a call still fails after its retries. `detail` is safe to serialize."""
+
+    def __init__(self, detail: ErrorDetail):
+        super().__init__(f"{detail.stage} failed after {detail.attempts} attempt(s): {detail.message}")
+        self.detail = detail
+
+
+def is_retryable(error: BaseException) -> bool:
+    # Rate limits are already retried by the provider scheduler, so they are not retried again here.
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return False
+
+
+def error_detail(stage: str, error: BaseException, attempts: int = 1) -> ErrorDetail:
+    if isinstance(error, CallError):
+        return error.detail
+    return ErrorDetail(
+        stage=stage,
+        error_type=type(error).__name__,
+        message=str(error) or type(error).__name__,
+        retryable=is_retryable(error),
+        attempts=attempts,
+    )
+
+
+async def with_retries(
+    fn: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    stage: str,
+    retry_if: Callable[[BaseException], bool] = is_retryable,
+) -> T:
+    """Await `fn()` with a per-attempt deadline and exponential backoff with full jitter.
+
+    Raises `CallError` with a structured `ErrorDetail` once the attempts are used up or the
+    error is not retryable.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if policy.timeout is not None:
+                return await asyncio.wait_for(fn(), policy.timeout)
+            return await fn()
+        except Exception as e:
+            if attempt >= policy.max_attempts or not retry_if(e):
+                raise CallError(error_detail(stage, e, attempt)) from e
+            delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1)))
+            record_retry()
+            logging.warning(f"{stage} attempt {attempt} failed ({type(e).__name__}: {str(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedging threshold."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float],
+    started: Optional[asyncio.Event] = None,
+    can_hedge: Callable[[], bool] = lambda: True,
+) -> T:
+    """Await `fn()`; if it has not finished after `hedge_after` seconds, start a second copy.
+
+    With `started`, the timer starts once `fn` sets it, e.g. when a rate limiter admits the call,
+    so time spent queueing does not count. No copy is started while `can_hedge()` is false, e.g.
+    when the limiter has no free slot and the copy would only queue behind other calls.
+
+    The first copy to succeed wins and the other is cancelled. If both fail, the first error is raised.
+    """
+    if hedge_after is None:
+        return await fn()
+
+    first = asyncio.ensure_future(fn())
+    tasks = [first]
+    try:
+        if started is not None:
+            admitted = asyncio.ensure_future(started.wait())
+            try:
+                await asyncio.wait([first, admitted], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                admitted.cancel()
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done and can_hedge():
+            logging.info(f"Hedging call still running after {hedge_after:.2f}s")
+            tasks.append(asyncio.ensure_future(fn()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return task.result()
+        return first.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def tavily_retry_policy() -> RetryPolicy:
+    settings = get_settings()
+    return RetryPolicy(max_attempts=settings.tavily_max_attempts, timeout=settings.tavily_timeout)
+
+
+def agent_retry_policy() -> RetryPolicy:
+    settings = get_settings()
+    return RetryPolicy(
+        max_attempts=settings.agent_max_attempts, base_delay=1.0, max_delay=30.0, timeout=settings.agent_timeout
+    )
+
+
+def writer_retry_policy() -> RetryPolicy:
+    settings = get_settings()
+    return RetryPolicy(
+        max_attempts=settings.writer_max_attempts, base_delay=1.0, max_delay=30.0, timeout=settings.writer_timeout
+    )
+
+
+tavily_latency = LatencyTracker()
+
+
+def tavily_hedge_after() -> Optional[float]:
+    """Seconds after which a Tavily request is hedged; None while hedging is off or few latencies are known."""
+    settings = get_settings()
+    return tavily_latency.quantile(settings.tavily_hedge_quantile) if settings.tavily_hedging else None
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from agents import Agent
+from agents.exceptions import ModelBehaviorError
+
+from app.config import get_settings
+from app.utils.compaction import count_tokens
+from app.utils.metrics import record_model
+from app.utils.resilience import LatencyTracker
+
+T = TypeVar("T")
+
+# Share of non-ASCII characters above which an input is treated as hard (non-Latin scripts).
+_NON_ASCII_SHARE = 0.3
+
+
+def _invalid_output(error: BaseException) -> Optional[BaseException]:
+    # `with_retries` wraps the model's error in a `CallError`, so look through the cause chain.
+    while error is not None:
+        if isinstance(error, (ModelBehaviorError, ValidationError)):
+            return error
+        error = error.__cause__
+    return None
+
+
+def completeness(output: BaseModel) -> float:
+    """Share of the output's fields that are filled, used as a cheap confidence score.
+
+    Wrappers with a single model field (like `CompetitorAnalysisResponse.self_analysis`) are
+    looked through.
+    """
+    while len(type(output).model_fields) == 1:
+        value = getattr(output, next(iter(type(output).model_fields)))
+        if not isinstance(value, BaseModel):
+            break
+        output = value
+    values = [getattr(output, name) for name in type(output).model_fields]
+    if not values:
+        return 1.0
+    return sum(1 for value in values if value not in (None, "", [], {})) / len(values)
+
+
+class ModelRouter:
+    """Picks the model of every agent call from an ordered list of tiers, cheapest first.
+
+    A call starts on the agent's own model, or one tier up when its input is large or mostly
+    non-Latin text, and moves down again while that tier's observed p95 latency breaks the latency
+    SLO. It escalates to the next tier when the output does not validate or its confidence is below
+    `min_confidence`, unless that tier's p95 no longer fits in the SLO. Every decision is logged.
+    """
+
+    def __init__(
+        self,
+        tiers: list[str],
+        large_input_tokens: int = 20_000,
+        min_confidence: float = 0.5,
+        latency_slo: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = tiers
+        self.large_input_tokens = large_input_tokens
+        self.min_confidence = min_confidence
+        self.latency_slo = latency_slo
+        self.enabled = enabled
+        self.latency: dict[str, LatencyTracker] = {tier: LatencyTracker() for tier in tiers}
+
+    def _p95(self, tier: int) -> Optional[float]:
+        return self.latency[self.tiers[tier]].quantile(0.95)
+
+    def initial_tier(self, agent: Agent, input: str) -> tuple[int, str]:
+        """The tier a call starts on, and why."""
+        base = self.tiers.index(agent.model) if agent.model in self.tiers else 0
+        tier, reason = base, "default tier"
+        tokens = count_tokens(input, model=self.tiers[base])
+        non_ascii = sum(1 for char in input if ord(char) > 127) / max(1, len(input))
+        if tokens > self.large_input_tokens:
+            tier, reason = base + 1, f"large input ({tokens} tokens)"
+        elif non_ascii > _NON_ASCII_SHARE:
+            tier, reason = base + 1, f"mostly non-Latin input ({non_ascii:.0%})"
+        tier = min(tier, len(self.tiers) - 1)
+        while self.latency_slo is not None and tier > 0:
+            p95 = self._p95(tier)
+            if p95 is None or p95 <= self.latency_slo:
+                break
+            tier, reason = tier - 1, f"{self.tiers[tier]} p95 {p95:.1f}s is over the {self.latency_slo:.1f}s SLO"
+        return tier, reason
+
+    def _can_escalate(self, tier: int, started: float) -> bool:
+        if tier + 1 >= len(self.tiers):
+            return False
+        if self.latency_slo is None:
+            return True
+        p95 = self._p95(tier + 1)
+        return p95 is None or time.perf_counter() - started + p95 <= self.latency_slo
+
+    async def run(
+        self,
+        agent: Agent,
+        input: str,
+        call: Callable[[Agent], Awaitable[T]],
+        confidence: Optional[Callable[[T], float]] = None,
+        escalate_if: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """Run `call` with a copy of `agent` on the routed model, escalating as needed.
+
+        Only invalid outputs (`ModelBehaviorError`, `ValidationError`, also when wrapped by
+        `with_retries`) escalate; other errors are raised as they are.
+
+        `escalate_if` can veto escalation, e.g. once part of a streamed output has been used.
+        """
+        if not self.enabled:
+            return await call(agent)
+        started = time.perf_counter()
+        tier, reason = self.initial_tier(agent, input)
+        escalated = False
+        while True:
+            model = self.tiers[tier]
+            logging.info(f"Routing {agent.name} to {model}: {reason}")
+            record_model(model, escalated=escalated)
+            call_started = time.perf_counter()
+            try:
+                output = await call(agent.clone(model=model) if model != agent.model else agent)
+            except Exception as e:
+                invalid = _invalid_output(e)
+                if invalid is None or not (self._can_escalate(tier, started) and escalate_if()):
+                    raise
+                tier, reason, escalated = tier + 1, f"invalid output from {model}: {' '.join(str(invalid).split())[:200]}", True
+                continue
+            self.latency[model].record(time.perf_counter() - call_started)
+            score = confidence(output) if confidence is not None else 1.0
+            if score >= self.min_confidence or not (self._can_escalate(tier, started) and escalate_if()):
+                return output
+            tier, reason, escalated = tier + 1, f"low confidence {score:.2f} from {model}", True
+
+
+_default_router: Optional[ModelRouter] = None
+
+
+def get_default_router() -> ModelRouter:
+    """Process-wide router configured from the MODEL_TIERS and ROUTING_* environment variables."""
+    global _default_router
+    if _default_router is None:
+        settings = get_settings()
+        _default_router = ModelRouter(
+            tiers=list(settings.model_tiers),
+            large_input_tokens=settings.routing_large_input_tokens,
+            min_confidence=settings.routing_min_confidence,
+            latency_slo=settings.routing_latency_slo,
+            enabled=settings.model_routing,
+        )
+    return _default_router
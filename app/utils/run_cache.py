@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+from typing import Any, Optional, Protocol, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from agents import Agent
+
+from app.config import get_settings
+from app.utils.cache import build_cache, make_cache_key
+from app.utils.metrics import record_cache_hit
+from app.utils.output_schema import Runner
+from app.utils.singleflight import SingleFlight
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class CacheBackend(Protocol):
+    def get_text(self, key: str) -> Optional[str]: ...
+
+    def set_text(self, key: str, text: str, ttl: Optional[float] = None) -> None: ...
+
+
+class AgentRunCache:
+    """Memoizes the validated `final_output` of agent runs.
+
+    The key covers everything that changes the answer: agent name, instructions, model, model
+    settings, output type, input and run context. Context entries whose names start with an
+    underscore hold per-run state rather than inputs and are left out of the key. Any object with
+    `get_text`/`set_text` can be used as the backend; outputs are stored as JSON text and
+    validated from that text on read.
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        # Identical runs that overlap in time share one Runner.run call.
+        self.flights = SingleFlight()
+
+    @staticmethod
+    def make_key(agent: Agent, input: str, output_type: Type[BaseModel], context: Any = None) -> str:
+        model_settings = agent.model_settings
+        if isinstance(context, dict):
+            context = {name: value for name, value in context.items() if not str(name).startswith("_")}
+        return make_cache_key(
+            "agent_run",
+            agent=agent.name,
+            instructions=agent.instructions if isinstance(agent.instructions, str) else repr(agent.instructions),
+            model=str(agent.model),
+            model_settings=dataclasses.asdict(model_settings) if model_settings else None,
+            output_type=f"{output_type.__module__}.{output_type.__qualname__}",
+            input=input,
+            context=context,
+        )
+
+    def get(self, key: str, output_type: Type[T]) -> Optional[T]:
+        if not self.enabled:
+            return None
+        text = self.backend.get_text(key)
+        if text is None:
+            self.misses += 1
+            return None
+        try:
+            output = output_type.model_validate_json(text)
+        except ValidationError as e:
+            logging.warning(f"Discarding cached agent output that no longer validates: {str(e)}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return output
+
+    def set(self, key: str, output: BaseModel) -> None:
+        if self.enabled:
+            self.backend.set_text(key, output.model_dump_json())
+
+    async def run(
+        self,
+        agent: Agent,
+        input: str,
+        output_type: Type[T],
+        refresh: bool = False,
+        **runner_kwargs: Any,
+    ) -> T:
+        """`Runner.run` that returns a cached output when one exists.
+
+        With `refresh=True` the cache is not read, but the fresh output still replaces the entry.
+        """
+        key = self.make_key(agent, input, output_type, runner_kwargs.get("context"))
+        if not refresh:
+            cached = self.get(key, output_type)
+            if cached is not None:
+                logging.info(f"Agent run cache hit for {agent.name}")
+                record_cache_hit()
+                return cached
+
+        async def run_agent() -> T:
+            result = await Runner.run(agent, input, **runner_kwargs)
+            output = result.final_output_as(output_type)
+            self.set(key, output)
+            return output
+
+        # A refresh only joins other refreshes, which do not read the cache either.
+        return await self.flights.do(f"{key}:refresh" if refresh else key, run_agent)
+
+
+_default_run_cache: Optional[AgentRunCache] = None
+
+
+def get_default_run_cache() -> AgentRunCache:
+    """Process-wide run cache configured from the AGENT_CACHE_* environment variables."""
+    global _default_run_cache
+    if _default_run_cache is None:
+        settings = get_settings()
+        backend = build_cache(
+            disk_path=settings.agent_cache_path,
+            ttl=settings.agent_cache_ttl,
+            memory_entries=settings.agent_cache_memory_entries,
+            disk_entries=settings.agent_cache_disk_entries,
+        )
+        _default_run_cache = AgentRunCache(backend, enabled=settings.agent_cache_enabled)
+    return _default_run_cache
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import openai
+from tavily.errors import UsageLimitExceededError
+
+from agents.models.interface import Model, ModelProvider, ModelTracing
+from agents.models.openai_provider import OpenAIProvider
+
+from app.config import get_settings
+from app.utils.metrics import record_queue_wait, record_tokens
+
+T = TypeVar("T")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    if isinstance(error, (openai.RateLimitError, UsageLimitExceededError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429
+    return False
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second, holding at most `capacity`.
+
+    A request for more tokens than the capacity waits for a full bucket and then drives the
+    balance negative, so oversized requests are delayed instead of rejected. No lock is needed:
+    the check-and-take in `acquire` never awaits, so it is atomic on the event loop.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Take `amount` tokens, waiting for the bucket to refill. Returns the time spent waiting."""
+        started = time.monotonic()
+        while True:
+            self._refill()
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return time.monotonic() - started
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the real cost of a call is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit.
+
+    Every successful call grows the limit by `1 / limit` (about +1 per full window). A rate-limit
+    error halves it, and a call slower than `target_latency` shrinks it by `latency_backoff`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        target_latency: Optional[float] = None,
+        backoff: float = 0.5,
+        latency_backoff: float = 0.9,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Batch workers may call asyncio.run more than once, so bind to the loop that is running now.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    async def acquire(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < max(self.min_limit, int(self.limit)))
+            self.in_flight += 1
+
+    async def release(self, latency: float, throttled: bool = False) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            if throttled:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            elif self.target_latency is not None and latency > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.latency_backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            condition.notify_all()
+
+
+class ProviderScheduler:
+    """Rate limits and adaptive concurrency for one upstream provider.
+
+    Calls wait for a concurrency slot, a request token and (optionally) enough tokens in the
+    token-per-minute bucket before they run. Rate-limit errors shrink the concurrency limit and are
+    retried up to `max_rate_limit_retries` times before being raised.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        tokens_per_second: Optional[float] = None,
+        max_concurrency: int = 16,
+        target_latency: Optional[float] = None,
+        max_rate_limit_retries: int = 3,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.tokens = TokenBucket(tokens_per_second, tokens_per_second * 60) if tokens_per_second else None
+        self.limiter = AdaptiveLimiter(
+            initial=max(1, max_concurrency // 2),
+            max_limit=max_concurrency,
+            target_latency=target_latency,
+        )
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.throttled = 0
+
+    @property
+    def saturated(self) -> bool:
+        """Whether every concurrency slot is taken, so a new call would have to queue."""
+        return self.limiter.in_flight >= max(self.limiter.min_limit, int(self.limiter.limit))
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        """Hold one scheduled call. Yields a dict where the caller may put the real `tokens` used."""
+        queued = time.monotonic()
+        await self.limiter.acquire()
+        started = time.monotonic()
+        throttled = False
+        usage: dict[str, Any] = {}
+        try:
+            await self.requests.acquire()
+            if self.tokens is not None and tokens:
+                await self.tokens.acquire(tokens)
+            started = time.monotonic()
+            record_queue_wait(started - queued)
+            yield usage
+        except BaseException as e:
+            throttled = is_rate_limit_error(e)
+            raise
+        finally:
+            if self.tokens is not None and "tokens" in usage:
+                self.tokens.adjust(usage["tokens"] - tokens)
+            await self.limiter.release(time.monotonic() - started, throttled=throttled)
+            if throttled:
+                self.throttled += 1
+                logging.warning(f"{self.name} rate limited, concurrency limit now {self.limiter.limit:.1f}")
+
+    async def call(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        tokens: int = 0,
+        usage_tokens: Optional[Callable[[T], int]] = None,
+        **kwargs: Any,
+    ) -> T:
+        """Run `fn` in a scheduled slot. `usage_tokens` reads the real token cost from its result."""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(tokens) as usage:
+                    result = await fn(*args, **kwargs)
+                    if usage_tokens is not None:
+                        usage["tokens"] = usage_tokens(result)
+                    return result
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_rate_limit_retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(min(30.0, 2.0**attempt))
+
+
+def estimate_tokens(system_instructions: Optional[str], input: Any, max_tokens: Optional[int]) -> int:
+    """Rough token count (4 characters per token) used to pre-charge the token bucket."""
+    text = (system_instructions or "") + (input if isinstance(input, str) else json.dumps(input, default=str))
+    return len(text) // 4 + (max_tokens or 1_000)
+
+
+class ScheduledModel(Model):
+    """Wraps a `Model` so every LLM request goes through a `ProviderScheduler`."""
+
+    def __init__(self, model: Model, scheduler: ProviderScheduler):
+        self.model = model
+        self.scheduler = scheduler
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing: ModelTracing,
+    ):
+        response = await self.scheduler.call(
+            self.model.get_response,
+            system_instructions,
+            input,
+            model_settings,
+            tools,
+            output_schema,
+            handoffs,
+            tracing,
+            tokens=estimate_tokens(system_instructions, input, model_settings.max_tokens),
+            usage_tokens=lambda response: response.usage.total_tokens,
+        )
+        record_tokens(response.usage.input_tokens, response.usage.output_tokens)
+        return response
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing: ModelTracing,
+    ) -> AsyncIterator:
+        tokens = estimate_tokens(system_instructions, input, model_settings.max_tokens)
+        async with self.scheduler.slot(tokens) as usage:
+            async for event in self.model.stream_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing
+            ):
+                if getattr(event, "type", None) == "response.completed" and event.response.usage:
+                    usage["tokens"] = event.response.usage.total_tokens
+                    record_tokens(event.response.usage.input_tokens, event.response.usage.output_tokens)
+                yield event
+
+
+class ScheduledModelProvider(ModelProvider):
+    def __init__(self, provider: ModelProvider, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return ScheduledModel(self.provider.get_model(model_name), self.scheduler)
+
+
+# Process-wide schedulers and model provider, built from the settings on first use.
+_openai_scheduler: Optional[ProviderScheduler] = None
+_tavily_scheduler: Optional[ProviderScheduler] = None
+_scheduled_model_provider: Optional[ScheduledModelProvider] = None
+
+
+def get_openai_scheduler() -> ProviderScheduler:
+    global _openai_scheduler
+    if _openai_scheduler is None:
+        settings = get_settings()
+        _openai_scheduler = ProviderScheduler(
+            "OpenAI",
+            requests_per_second=settings.openai_rpm / 60,
+            tokens_per_second=settings.openai_tpm / 60,
+            max_concurrency=settings.openai_max_concurrency,
+            target_latency=settings.openai_target_latency,
+        )
+    return _openai_scheduler
+
+
+def get_tavily_scheduler() -> ProviderScheduler:
+    global _tavily_scheduler
+    if _tavily_scheduler is None:
+        settings = get_settings()
+        _tavily_scheduler = ProviderScheduler(
+            "Tavily",
+            requests_per_second=settings.tavily_rps,
+            max_concurrency=settings.tavily_max_concurrency,
+            target_latency=settings.tavily_target_latency,
+        )
+    return _tavily_scheduler
+
+
+def get_scheduled_model_provider() -> ScheduledModelProvider:
+    """The OpenAI model provider behind the shared OpenAI scheduler, used by every agent run."""
+    global _scheduled_model_provider
+    if _scheduled_model_provider is None:
+        _scheduled_model_provider = ScheduledModelProvider(OpenAIProvider(), get_openai_scheduler())
+    return _scheduled_model_provider
@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts `fn()`; callers that arrive while it is running await the
+    same future instead of starting their own call. The key is forgotten as soon as the call
+    finishes, so later calls run again (caching is a separate concern). The shared call is
+    shielded, so one caller being cancelled does not cancel it for the others; it is cancelled
+    once every caller has left, so a caller that gave up (a timeout) and tries again starts a
+    new call instead of joining the abandoned one.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._waiters: dict[asyncio.Future, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._in_flight.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+                if not future.done():
+                    # The last caller was cancelled. Forget the key right away, so a retry does
+                    # not join the call while it is being cancelled.
+                    if self._in_flight.get(key) is future:
+                        del self._in_flight[key]
+                    future.cancel()
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled before it finished.
+            future.exception()
+
+    def stats(self) -> dict[str, Any]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
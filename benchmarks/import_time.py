@@ -0,0 +1,63 @@
+"""Import cost of the app's entry modules.
+
+Imports each module in a fresh interpreter with `-X importtime` and reports its cumulative import
+time, so regressions in startup cost (a heavy SDK imported at module level, work done at import)
+show up before they reach the CLI, the batch workers or the API:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --max-ms 500
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+DEFAULT_MODULES = ["main", "app.batch", "app.config", "app.manager", "app.api"]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of `module` in a new interpreter, in milliseconds."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(4) == module and len(match.group(3)) == 1:
+            return int(match.group(2)) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import cost of the app's entry modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the median is reported")
+    parser.add_argument("--max-ms", type=float, help="Exit with status 1 if `main` takes longer to import")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    times = {}
+    for module in args.modules:
+        times[module] = statistics.median(import_time_ms(module) for _ in range(args.repeat))
+        print(f"{module:<16} {times[module]:8.1f} ms")
+    if args.max_ms is not None and times.get("main", 0.0) > args.max_ms:
+        print(f"REGRESSION importing main took {times['main']:.1f} ms, budget {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Offline stand-ins for the OpenAI Responses API and `AsyncTavilyClient`.
+
+Both serve recorded responses from `benchmarks/fixtures` with synthetic latency and error rates,
+so the pipeline can be driven end to end without a network or API keys.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+import openai
+from agents import Model, ModelProvider
+from agents.items import ModelResponse
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from tavily.errors import UsageLimitExceededError
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@dataclass
+class LatencyProfile:
+    """Synthetic behaviour of a replayed provider."""
+
+    latency: float = 0.05
+    "Mean latency of one call before its first output token, in seconds."
+    token_latency: float = 0.0
+    "Seconds per generated output token, so longer outputs take longer."
+    jitter: float = 0.5
+    "Uniform spread around `latency`, as a fraction of it."
+    tail_rate: float = 0.0
+    "Share of calls that take `tail_factor` times longer."
+    tail_factor: float = 10.0
+    error_rate: float = 0.0
+    "Share of calls that fail with a retryable connection error."
+    rate_limit_rate: float = 0.0
+    "Share of calls that fail with HTTP 429."
+
+    def sample_latency(self, rng: random.Random) -> float:
+        latency = self.latency * rng.uniform(1 - self.jitter, 1 + self.jitter)
+        if rng.random() < self.tail_rate:
+            latency *= self.tail_factor
+        return max(0.0, latency)
+
+    def sample_error(self, rng: random.Random, provider: str) -> Optional[Exception]:
+        roll = rng.random()
+        request = httpx.Request("POST", f"https://replay.invalid/{provider}")
+        if roll < self.rate_limit_rate:
+            if provider == "openai":
+                response = httpx.Response(429, request=request)
+                return openai.RateLimitError("Replayed rate limit", response=response, body=None)
+            return UsageLimitExceededError("Replayed rate limit")
+        if roll < self.rate_limit_rate + self.error_rate:
+            return httpx.ConnectError("Replayed connection error", request=request)
+        return None
+
+
+def load_fixture(name: str) -> Any:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pick(options: list, *parts: str) -> Any:
+    # Deterministic per input, so the same request always replays the same recording.
+    return options[zlib.crc32("\x00".join(parts).encode("utf-8")) % len(options)]
+
+
+def _input_text(input: str | list) -> str:
+    if isinstance(input, str):
+        return input
+    texts = []
+    for item in input:
+        content = item.get("content") if isinstance(item, dict) else None
+        if isinstance(content, str):
+            texts.append(content)
+    return "\n".join(texts)
+
+
+def _has_tool_output(input: str | list) -> bool:
+    return not isinstance(input, str) and any(
+        isinstance(item, dict) and item.get("type") == "function_call_output" for item in input
+    )
+
+
+class ReplayModel(Model):
+    """Answers each agent with one of its recorded final outputs.
+
+    The agent is recognised by its instructions. Agents with tools first get a call to their
+    first tool (with the search term from the input as `query`), then the recorded output.
+    Agents listed in `projections` answer with some fields of another agent's `self_analysis`.
+    """
+
+    def __init__(
+        self,
+        outputs: dict[str, list[dict]],
+        agents_by_instructions: dict[str, str],
+        profile: LatencyProfile,
+        rng: random.Random,
+        projections: Optional[dict[str, tuple[str, list[str]]]] = None,
+    ):
+        self.outputs = outputs
+        self.agents_by_instructions = agents_by_instructions
+        self.projections = projections or {}
+        self.profile = profile
+        self.rng = rng
+        self.calls = 0
+
+    def _build_output(self, system_instructions: Optional[str], input: str | list, tools: list) -> list:
+        agent_name = self.agents_by_instructions.get(system_instructions or "")
+        fields = None
+        if agent_name in self.projections:
+            agent_name, fields = self.projections[agent_name]
+        if agent_name is None or agent_name not in self.outputs:
+            raise ValueError(f"No recorded outputs for agent with instructions {str(system_instructions)[:60]!r}")
+        text = _input_text(input)
+        if tools and not _has_tool_output(input):
+            query = text.split("\n", 1)[0].removeprefix("Search term:").strip()
+            return [
+                ResponseFunctionToolCall(
+                    id=f"fc_{uuid.uuid4().hex}",
+                    call_id=f"call_{uuid.uuid4().hex}",
+                    name=tools[0].name,
+                    arguments=json.dumps({"query": query}),
+                    type="function_call",
+                    status="completed",
+                )
+            ]
+        output = _pick(self.outputs[agent_name], agent_name, text)
+        if fields is not None:
+            output = {field: output["self_analysis"].get(field) for field in fields}
+        return [
+            ResponseOutputMessage(
+                id=f"msg_{uuid.uuid4().hex}",
+                content=[ResponseOutputText(annotations=[], text=json.dumps(output), type="output_text")],
+                role="assistant",
+                status="completed",
+                type="message",
+            )
+        ]
+
+    def _usage(self, system_instructions: Optional[str], input: str | list, output: list) -> ResponseUsage:
+        input_tokens = (len(system_instructions or "") + len(json.dumps(input, default=str))) // 4
+        output_tokens = sum(len(item.model_dump_json()) for item in output) // 4
+        return ResponseUsage(
+            input_tokens=input_tokens,
+            input_tokens_details={"cached_tokens": 0},
+            output_tokens=output_tokens,
+            output_tokens_details={"reasoning_tokens": 0},
+            total_tokens=input_tokens + output_tokens,
+        )
+
+    async def _delay(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.profile.sample_latency(self.rng))
+        error = self.profile.sample_error(self.rng, "openai")
+        if error is not None:
+            raise error
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing) -> ModelResponse:
+        await self._delay()
+        output = self._build_output(system_instructions, input, tools)
+        usage = self._usage(system_instructions, input, output)
+        await asyncio.sleep(usage.output_tokens * self.profile.token_latency)
+        return ModelResponse(
+            output=output,
+            usage=Usage(
+                requests=1,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                total_tokens=usage.total_tokens,
+            ),
+            referenceable_id=None,
+        )
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing) -> AsyncIterator:
+        await self._delay()
+        output = self._build_output(system_instructions, input, tools)
+        text = "".join(part.text for item in output if item.type == "message" for part in item.content)
+        chunks = [text[i : i + 64] for i in range(0, len(text), 64)]
+        for chunk in chunks:
+            await asyncio.sleep(len(chunk) / 4 * self.profile.token_latency)
+            yield ResponseTextDeltaEvent(content_index=0, delta=chunk, item_id="replay", output_index=0, type="response.output_text.delta")
+        yield ResponseCompletedEvent(
+            response=Response(
+                id=f"resp_{uuid.uuid4().hex}",
+                created_at=time.time(),
+                model="replay",
+                object="response",
+                output=output,
+                parallel_tool_calls=False,
+                tool_choice="auto",
+                tools=[],
+                usage=self._usage(system_instructions, input, output),
+            ),
+            type="response.completed",
+        )
+
+
+class ReplayModelProvider(ModelProvider):
+    def __init__(self, model: ReplayModel):
+        self.model = model
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
+
+
+class ReplayTavilyClient:
+    """Drop-in for `AsyncTavilyClient.search` that returns recorded responses."""
+
+    def __init__(self, responses: list[dict], profile: LatencyProfile, rng: random.Random):
+        self.responses = responses
+        self.profile = profile
+        self.rng = rng
+        self.calls = 0
+
+    async def search(self, query: str, **kwargs: Any) -> dict:
+        self.calls += 1
+        latency = self.profile.sample_latency(self.rng)
+        await asyncio.sleep(latency)
+        error = self.profile.sample_error(self.rng, "tavily")
+        if error is not None:
+            raise error
+        response = _pick(self.responses, query, json.dumps(kwargs, sort_keys=True, default=str))
+        return {**response, "query": query, "response_time": round(latency, 3)}
+
+
+@dataclass
+class Replay:
+    model: ReplayModel
+    tavily: ReplayTavilyClient
+
+
+def install_replay(openai_profile: LatencyProfile, tavily_profile: LatencyProfile, seed: int = 0) -> Replay:
+    """Route every OpenAI and Tavily call of the app through the replay stand-ins."""
+    from app.agents import search_agent as search_module
+    from app.agents.planner_agent import get_planner_agent
+    from app.agents.writer_agent import get_writer_agent, get_writer_shard_agents
+    from app.utils.scheduler import get_scheduled_model_provider
+
+    rng = random.Random(seed)
+    writer_agent = get_writer_agent()
+    agents = (get_planner_agent(), search_module.get_search_agent(), writer_agent)
+    agents_by_instructions = {agent.instructions: agent.name for agent in agents}
+    projections = {}
+    for agent in get_writer_shard_agents().values():
+        agents_by_instructions[agent.instructions] = agent.name
+        projections[agent.name] = (writer_agent.name, list(agent.output_type.model_fields))
+    model = ReplayModel(load_fixture("openai_outputs.json"), agents_by_instructions, openai_profile, rng, projections)
+    tavily = ReplayTavilyClient(load_fixture("tavily_responses.json"), tavily_profile, rng)
+    get_scheduled_model_provider().provider = ReplayModelProvider(model)
+    search_module.tavily_client = tavily
+    return Replay(model=model, tavily=tavily)
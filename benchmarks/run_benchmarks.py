@@ -0,0 +1,304 @@
+"""Offline benchmark of the research pipeline.
+
+Drives `ResearchManager.run` sequentially and `BatchRunner` at several concurrency levels against
+the replay stand-ins in `benchmarks/replay.py`, and reports throughput, latency percentiles and
+peak memory. Results can be saved as JSON and compared against a saved baseline:
+
+    python -m benchmarks.run_benchmarks --output baseline.json
+    python -m benchmarks.run_benchmarks --baseline baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+# No network or keys are needed, the caches are disabled unless --with-cache is given, and the rate
+# limits are raised so they do not dominate.
+os.environ.setdefault("KEY_TAVILY", "replay")
+os.environ.setdefault("OPENAI_API_KEY", "replay")
+os.environ.setdefault("OPENAI_RPM", "1000000")
+os.environ.setdefault("OPENAI_TPM", "1000000000")
+os.environ.setdefault("OPENAI_MAX_CONCURRENCY", "256")
+os.environ.setdefault("TAVILY_RPS", "100000")
+os.environ.setdefault("TAVILY_MAX_CONCURRENCY", "256")
+
+from benchmarks.replay import LatencyProfile, install_replay  # noqa: E402
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    requests: int
+    concurrency: int
+    succeeded: int
+    failed: int
+    elapsed: float
+    throughput: float
+    "Reports per second."
+    p50: float
+    p95: float
+    p99: float
+    peak_memory_mb: float
+    "Peak Python heap allocated during the scenario, from tracemalloc (0 with --no-trace-memory)."
+    openai_calls: int
+    tavily_calls: int
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def make_requests(count: int, offset: int = 0) -> list[dict]:
+    # Every request has its own website, so nothing is coalesced or served from another report.
+    return [
+        {
+            "website": f"https://company-{offset + i}.example.com",
+            "description": f"Company {offset + i} builds software for small businesses.",
+        }
+        for i in range(count)
+    ]
+
+
+async def run_sequential(requests: list[dict], direct_search: bool) -> tuple[list[float], int]:
+    from app.manager import ResearchManager
+    from app.schemas.request import CompetitorAnalysisRequest
+
+    latencies = []
+    failed = 0
+    for request in requests:
+        manager = ResearchManager(quiet=True, direct_search=direct_search)
+        started = time.perf_counter()
+        try:
+            await manager.run(CompetitorAnalysisRequest.model_validate(request))
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            logging.warning(f"Benchmark run failed: {str(e)}")
+            failed += 1
+    return latencies, failed
+
+
+def install_worker_replay(openai_profile: LatencyProfile, tavily_profile: LatencyProfile, seed: int) -> None:
+    """Initializer of the batch worker processes, which do not inherit the parent's replay."""
+    from agents import set_tracing_disabled
+
+    set_tracing_disabled(True)
+    install_replay(openai_profile, tavily_profile, seed=seed + os.getpid())
+    logging.getLogger().setLevel(logging.ERROR)
+
+
+async def run_batch(
+    requests: list[dict], concurrency: int, direct_search: bool, workdir: str, workers: int = 1, initializer=None
+) -> tuple[list[float], int]:
+    from app.batch import BatchRunner, ProcessBatchRunner
+
+    input_path = os.path.join(workdir, f"batch-{concurrency}.jsonl")
+    output_path = os.path.join(workdir, f"batch-{concurrency}-results.jsonl")
+    with open(input_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(request) + "\n" for request in requests)
+    if workers > 1:
+        runner = ProcessBatchRunner(
+            workers=workers, concurrency=concurrency, direct_search=direct_search, initializer=initializer
+        )
+    else:
+        runner = BatchRunner(concurrency=concurrency, direct_search=direct_search)
+    summary = await runner.run(input_path, output_path)
+    latencies = []
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line)
+            if result.get("report") is not None and result.get("metrics"):
+                latencies.append(result["metrics"]["wall_time"])
+    return latencies, summary.failed
+
+
+async def run_scenario(name: str, requests: list[dict], concurrency: int, replay, args, workdir: str) -> ScenarioResult:
+    openai_calls, tavily_calls = replay.model.calls, replay.tavily.calls
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if concurrency == 0:
+        latencies, failed = await run_sequential(requests, args.direct_search)
+    else:
+        latencies, failed = await run_batch(
+            requests, concurrency, args.direct_search, workdir, args.workers, args.worker_initializer
+        )
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if args.trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return ScenarioResult(
+        scenario=name,
+        requests=len(requests),
+        concurrency=max(concurrency, 1),
+        succeeded=len(latencies),
+        failed=failed,
+        elapsed=round(elapsed, 4),
+        throughput=round(len(latencies) / elapsed, 4) if elapsed else 0.0,
+        p50=round(percentile(latencies, 0.50), 4),
+        p95=round(percentile(latencies, 0.95), 4),
+        p99=round(percentile(latencies, 0.99), 4),
+        peak_memory_mb=round(peak / 2**20, 2),
+        openai_calls=replay.model.calls - openai_calls,
+        tavily_calls=replay.tavily.calls - tavily_calls,
+    )
+
+
+def compare(results: list[ScenarioResult], baseline_path: str, tolerance: float) -> list[str]:
+    """Regressions of `results` against a saved run: lower throughput, higher p95 or more memory."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {entry["scenario"]: entry for entry in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        base = baseline.get(result.scenario)
+        if base is None:
+            continue
+        if result.throughput < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{result.scenario}: throughput {result.throughput:.2f}/s < baseline {base['throughput']:.2f}/s")
+        if result.p95 > base["p95"] * (1 + tolerance):
+            regressions.append(f"{result.scenario}: p95 {result.p95:.3f}s > baseline {base['p95']:.3f}s")
+        if result.peak_memory_mb > base["peak_memory_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{result.scenario}: peak memory {result.peak_memory_mb:.1f}MB > baseline {base['peak_memory_mb']:.1f}MB"
+            )
+        if result.failed > base["failed"]:
+            regressions.append(f"{result.scenario}: {result.failed} failed > baseline {base['failed']}")
+    return regressions
+
+
+def print_table(results: list[ScenarioResult]) -> None:
+    header = f"{'scenario':<14}{'reqs':>6}{'ok':>6}{'fail':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'mem MB':>9}{'llm':>7}{'tavily':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.scenario:<14}{r.requests:>6}{r.succeeded:>6}{r.failed:>6}{r.throughput:>9.2f}"
+            f"{r.p50:>9.3f}{r.p95:>9.3f}{r.p99:>9.3f}{r.peak_memory_mb:>9.2f}{r.openai_calls:>7}{r.tavily_calls:>8}"
+        )
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the research pipeline.")
+    parser.add_argument("--requests", type=int, default=32, help="Reports per batch scenario")
+    parser.add_argument("--sequential-requests", type=int, default=8, help="Reports for the sequential scenario (0 to skip)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Batch concurrency levels")
+    parser.add_argument("--direct-search", action="store_true", help="Benchmark direct search mode")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run the batch scenarios on this many processes; LLM and Tavily call counts are then not reported",
+    )
+    parser.add_argument("--sharded-writer", action="store_true", help="Benchmark the sharded writer")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the search and agent caches enabled")
+    parser.add_argument("--openai-latency", type=float, default=0.2, help="Mean OpenAI call latency in seconds")
+    parser.add_argument(
+        "--openai-token-latency", type=float, default=0.005, help="Seconds per generated OpenAI output token"
+    )
+    parser.add_argument("--tavily-latency", type=float, default=0.1, help="Mean Tavily call latency in seconds")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Share of calls that are 10x slower")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls that fail with a connection error")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls that fail with HTTP 429")
+    parser.add_argument(
+        "--no-trace-memory",
+        dest="trace_memory",
+        action="store_false",
+        help="Skip tracemalloc, which slows CPU-bound code down, and report only the process peak RSS",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's INFO logging")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="research-bench-")
+    if args.sharded_writer:
+        os.environ.setdefault("WRITER_SHARDED", "true")
+    if args.with_cache:
+        os.environ.setdefault("SEARCH_CACHE_PATH", os.path.join(workdir, "search_cache.sqlite"))
+        os.environ.setdefault("AGENT_CACHE_PATH", os.path.join(workdir, "agent_cache.sqlite"))
+        os.environ.setdefault("REPORT_STORE_PATH", os.path.join(workdir, "reports.sqlite"))
+        os.environ.setdefault("COMPETITOR_INDEX_PATH", os.path.join(workdir, "competitors.sqlite"))
+        os.environ.setdefault("JOB_STORE_PATH", os.path.join(workdir, "jobs.sqlite"))
+    else:
+        os.environ.setdefault("SEARCH_CACHE_PATH", "")
+        os.environ.setdefault("SEARCH_CACHE_MEMORY_ENTRIES", "0")
+        os.environ.setdefault("AGENT_CACHE_ENABLED", "false")
+        os.environ.setdefault("REPORT_STORE_PATH", "")
+        os.environ.setdefault("COMPETITOR_INDEX_PATH", "")
+        os.environ.setdefault("JOB_STORE_PATH", "")
+
+    from agents import set_tracing_disabled
+
+    set_tracing_disabled(True)
+    openai_profile = LatencyProfile(
+        latency=args.openai_latency,
+        token_latency=args.openai_token_latency,
+        tail_rate=args.tail_rate,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    tavily_profile = LatencyProfile(
+        latency=args.tavily_latency,
+        tail_rate=args.tail_rate,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    replay = install_replay(openai_profile, tavily_profile, seed=args.seed)
+    args.worker_initializer = functools.partial(install_worker_replay, openai_profile, tavily_profile, args.seed)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+
+    results = []
+    offset = 0
+    if args.sequential_requests:
+        requests = make_requests(args.sequential_requests, offset)
+        offset += len(requests)
+        results.append(await run_scenario("sequential", requests, 0, replay, args, workdir))
+    for concurrency in args.concurrency:
+        requests = make_requests(args.requests, offset)
+        offset += len(requests)
+        name = f"batch-c{concurrency}" if args.workers == 1 else f"batch-w{args.workers}-c{concurrency}"
+        results.append(await run_scenario(name, requests, concurrency, replay, args, workdir))
+
+    print_table(results)
+    print(f"Process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            config = {key: value for key, value in vars(args).items() if key != "worker_initializer"}
+            json.dump({"config": config, "results": [asdict(r) for r in results]}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
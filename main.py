@@ -1,17 +1,33 @@
+import argparse
 import asyncio
-import validators
-import json
 from pathlib import Path
-from app.manager import ResearchManager
-from dotenv import load_dotenv, find_dotenv
-from app.schemas.request import CompetitorAnalysisRequest
-from agents import set_default_openai_key
-import os
-load_dotenv(find_dotenv('.env'))
+from app.batch import BatchRunner, DEFAULT_CONCURRENCY, ProcessBatchRunner
+from app.config import configure
+from app.utils.printer import PROGRESS_MODES, make_printer
 
-set_default_openai_key(os.getenv("KEY_OPENAI"))
+# The agents SDK, the API and the clients are only loaded by the entry point that needs them, so
+# importing this module (as spawned batch workers do) stays fast.
+
+
+def __getattr__(name: str):
+    # ASGI entry point used by the Dockerfile: `uvicorn main:app`
+    if name == "app":
+        from app.api import create_app
+
+        configure()
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def main(
+    refresh: bool = False, direct_search: bool = False, sharded_writer: bool | None = None, progress: str | None = None
+):
+    import validators
+    from app.manager import ResearchManager
+    from app.schemas.request import CompetitorAnalysisRequest
+    from app.utils.output_schema import dump_json
 
-async def main():
     print("Welcome to the Company Analysis Tool!")
     
     while True:
@@ -24,7 +40,9 @@ async def main():
 
     print(f"\nAnalyzing {url}...")
     
-    manager = ResearchManager()
+    manager = ResearchManager(
+        refresh=refresh, direct_search=direct_search, sharded_writer=sharded_writer, printer=make_printer(progress)
+    )
     request = CompetitorAnalysisRequest(website=url, description=description)
     
     try:
@@ -39,13 +57,121 @@ async def main():
         output_file = output_dir / f"company_analysis_{domain}.json"
         
         # Save report to JSON file
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(report.dict(), f, indent=2, ensure_ascii=False)
+        with open(output_file, "wb") as f:
+            f.write(dump_json(report, indent=True))
             
         print(f"\nAnalysis complete! Report saved to: {output_file}")
         
     except Exception as e:
         print(f"\nAn error occurred during analysis: {str(e)}")
 
+async def main_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int,
+    refresh: bool = False,
+    direct_search: bool = False,
+    workers: int = 1,
+    progress: str | None = None,
+    resume: bool = False,
+    sharded_writer: bool | None = None,
+):
+    if workers > 1:
+        print(f"Running batch analysis from {input_path} on {workers} processes with concurrency {concurrency} each...")
+        runner = ProcessBatchRunner(
+            workers=workers,
+            concurrency=concurrency,
+            refresh=refresh,
+            direct_search=direct_search,
+            progress=progress,
+            resume=resume,
+            sharded_writer=sharded_writer,
+        )
+    else:
+        print(f"Running batch analysis from {input_path} with concurrency {concurrency}...")
+        runner = BatchRunner(
+            concurrency=concurrency,
+            refresh=refresh,
+            direct_search=direct_search,
+            progress=progress,
+            resume=resume,
+            sharded_writer=sharded_writer,
+        )
+    summary = await runner.run(input_path, output_path)
+    print(
+        f"\nBatch complete! {summary.succeeded}/{summary.total} succeeded, {summary.failed} failed "
+        f"in {summary.elapsed:.1f} seconds. Results saved to: {output_path}"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Company Analysis Tool")
+    parser.add_argument("--batch", metavar="INPUT_JSONL", help="Analyze every request in a JSONL file.")
+    parser.add_argument(
+        "--output",
+        default="output/batch_results.jsonl",
+        help="JSONL file where batch results are written as they complete.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of analyses running at once in batch mode (per process with --workers).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Spread a batch over this many processes; results are then written in input order.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the results of batch requests that already completed and continue unfinished ones "
+        "from their checkpoints (JOB_STORE_PATH).",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached planner/search/writer outputs and stored reports and run the whole analysis again.",
+    )
+    parser.add_argument(
+        "--sharded-writer",
+        action="store_true",
+        default=None,
+        help="Write each section of the report with its own concurrent writer call (WRITER_SHARDED).",
+    )
+    parser.add_argument(
+        "--progress",
+        choices=PROGRESS_MODES,
+        default=None,
+        help="Progress display: rich live view, JSON lines on stderr, or none. Defaults to PROGRESS, "
+        "or auto (rich on a terminal, JSON lines otherwise).",
+    )
+    parser.add_argument(
+        "--direct-search",
+        action="store_true",
+        help="Call Tavily directly for each planned query instead of running the search agent.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    configure()
+    if args.batch:
+        asyncio.run(
+            main_batch(
+                args.batch,
+                args.output,
+                args.concurrency,
+                args.refresh,
+                args.direct_search,
+                args.workers,
+                args.progress,
+                args.resume,
+                args.sharded_writer,
+            )
+        )
+    else:
+        asyncio.run(main(args.refresh, args.direct_search, args.sharded_writer, args.progress))
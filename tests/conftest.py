@@ -0,0 +1,42 @@
+import os
+import sys
+
+# The tests run offline: no caches or stores on disk unless a test creates one, no cached agent outputs, and a
+# placeholder Tavily key so the search tool does not refuse to run, and no traces exported. Set before any app
+# module is imported.
+os.environ.update(
+    OPENAI_AGENTS_DISABLE_TRACING="true",
+    SEARCH_CACHE_PATH="",
+    SEARCH_CACHE_MEMORY_ENTRIES="0",
+    AGENT_CACHE_PATH="",
+    AGENT_CACHE_ENABLED="false",
+    REPORT_STORE_PATH="",
+    COMPETITOR_INDEX_PATH="",
+    JOB_STORE_PATH="",
+    KEY_TAVILY="test",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.schemas.competitor import Competitor
+
+
+@pytest.fixture(scope="session")
+def replay():
+    """Every OpenAI and Tavily call goes to the recorded responses in `benchmarks/fixtures`."""
+    from benchmarks.replay import LatencyProfile, install_replay
+
+    return install_replay(LatencyProfile(0.01), LatencyProfile(0.01))
+
+
+def make_competitor(name: str, website: str, **fields) -> Competitor:
+    fields = {
+        "description": f"{name} description",
+        "score_affinity": 5,
+        "product": None,
+        "market": None,
+        "swot_analysis": None,
+        **fields,
+    }
+    return Competitor(name=name, website=website, **fields)
@@ -13,6 +13,9 @@ SHARED_SECRET = os.getenv("API_SHARED_SECRET")
 if not SHARED_SECRET:
     raise ValueError("API_SHARED_SECRET environment variable is not set")
 
+# Server to call; a local one unless API_BASE_URL points elsewhere.
+BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
 def get_utc_timestamp() -> str:
     """Get current UTC timestamp in seconds."""
     return str(int(datetime.now(timezone.utc).timestamp()))
@@ -42,7 +45,7 @@ headers = {
 }
 
 response = requests.get(
-    'https://competitor-hunt-api-production.up.railway.app/api/v1/secure-endpoint',
+    f"{BASE_URL}{path}",
     headers=headers
 )
 print(response.json())
@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+
+from app import manager as manager_module
+from app.batch import BatchRunner
+from app.job_store import JobStore
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.job import JobStatus
+from app.schemas.request import CompetitorAnalysisRequest
+
+from conftest import make_competitor
+
+REQUESTS = [{"website": f"https://example{i}.com", "description": "Project management software"} for i in range(3)]
+
+
+@pytest.fixture
+def batch(tmp_path):
+    input_path = tmp_path / "requests.jsonl"
+    input_path.write_text("".join(json.dumps(request) + "\n" for request in REQUESTS))
+    return input_path, tmp_path / "results.jsonl", JobStore(str(tmp_path / "jobs.sqlite"))
+
+
+def read_results(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def run_batch(batch, resume: bool):
+    input_path, output_path, jobs = batch
+    return asyncio.run(BatchRunner(concurrency=3, resume=resume, job_store=jobs).run(input_path, output_path))
+
+
+def test_every_input_line_gets_a_result(batch, replay):
+    input_path, output_path, _ = batch
+    with open(input_path, "a") as f:
+        f.write("not json\n")
+    summary = asyncio.run(BatchRunner(concurrency=2).run(input_path, output_path))
+    assert (summary.total, summary.succeeded, summary.failed) == (4, 3, 1)
+    results = sorted(read_results(output_path), key=lambda result: result["index"])
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert all(result["report"] is not None for result in results[:3])
+    assert results[3]["error"]
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        BatchRunner(concurrency=0)
+
+
+def test_resume_continues_from_checkpoints(batch, replay, monkeypatch):
+    jobs = batch[2]
+    build_output = replay.model._build_output
+
+    def failing_writer(instructions, input, tools):
+        if replay.model.agents_by_instructions.get(instructions or "") == "WriterAgent":
+            raise RuntimeError("writer crashed")
+        return build_output(instructions, input, tools)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(replay.model, "_build_output", failing_writer)
+        summary = run_batch(batch, resume=False)
+    assert (summary.succeeded, summary.failed) == (0, 3)
+    job_ids = [jobs.job_id(CompetitorAnalysisRequest(**request)) for request in REQUESTS]
+    assert all(jobs.status(job_id) == JobStatus.FAILED for job_id in job_ids)
+    assert all("plan" in jobs.load_checkpoints(job_id) for job_id in job_ids)
+
+    # The plan and searches are restored, so only the writer runs again.
+    tavily_calls = replay.tavily.calls
+    summary = run_batch(batch, resume=True)
+    assert (summary.succeeded, summary.failed) == (3, 0)
+    assert replay.tavily.calls == tavily_calls
+    assert all(jobs.status(job_id) == JobStatus.COMPLETED for job_id in job_ids)
+
+    # Completed jobs return their stored results.
+    model_calls = replay.model.calls
+    summary = run_batch(batch, resume=True)
+    assert summary.succeeded == 3
+    assert replay.model.calls == model_calls
+    assert sorted(result["index"] for result in read_results(batch[1])) == [0, 1, 2]
+
+
+def test_without_resume_jobs_start_over(batch, replay):
+    run_batch(batch, resume=False)
+    tavily_calls = replay.tavily.calls
+    summary = run_batch(batch, resume=False)
+    assert summary.succeeded == 3
+    assert replay.tavily.calls > tavily_calls
+
+
+def test_duplicate_requests_share_one_job(tmp_path, replay):
+    # Regression: a request whose job was claimed by another worker ran again alongside it.
+    input_path = tmp_path / "requests.jsonl"
+    input_path.write_text(json.dumps(REQUESTS[0]) + "\n" + json.dumps(REQUESTS[0]) + "\n")
+    jobs = JobStore(str(tmp_path / "jobs.sqlite"))
+    model_calls = replay.model.calls
+    runner = BatchRunner(concurrency=2, job_store=jobs)
+    summary = asyncio.run(runner.run(input_path, tmp_path / "results.jsonl"))
+    assert summary.succeeded == 2
+    single_run = replay.model.calls - model_calls
+
+    model_calls = replay.model.calls
+    input_path.write_text(json.dumps(REQUESTS[0]) + "\n")
+    asyncio.run(BatchRunner(concurrency=1, job_store=JobStore(str(tmp_path / "other.sqlite"))).run(
+        input_path, tmp_path / "results.jsonl"
+    ))
+    assert single_run == replay.model.calls - model_calls
+
+
+def test_sharded_writer_option_reaches_the_manager(batch, monkeypatch):
+    # Regression: --sharded-writer was ignored in batch mode.
+    options = []
+
+    class RecordingManager(manager_module.ResearchManager):
+        def __init__(self, **kwargs):
+            options.append(kwargs.get("sharded_writer"))
+            super().__init__(**kwargs)
+
+        async def run(self, request):
+            return CompetitorAnalysisResponse(self_analysis=make_competitor("Example", request.website))
+
+    monkeypatch.setattr(manager_module, "ResearchManager", RecordingManager)
+    input_path, output_path, jobs = batch
+    summary = asyncio.run(BatchRunner(job_store=jobs, sharded_writer=True).run(input_path, output_path))
+    assert summary.succeeded == len(REQUESTS)
+    assert options == [True] * len(REQUESTS)
+
+
+def test_a_manager_that_cannot_be_built_fails_only_its_request(batch, monkeypatch):
+    # Regression: an error building the manager escaped the task, so no result was written and the batch aborted.
+    class BrokenManager(manager_module.ResearchManager):
+        def __init__(self, **kwargs):
+            raise RuntimeError("bad configuration")
+
+    monkeypatch.setattr(manager_module, "ResearchManager", BrokenManager)
+    input_path, output_path, jobs = batch
+    summary = asyncio.run(BatchRunner(job_store=jobs).run(input_path, output_path))
+    assert (summary.total, summary.failed) == (len(REQUESTS), len(REQUESTS))
+    results = sorted(read_results(output_path), key=lambda result: result["index"])
+    assert [result["index"] for result in results] == list(range(len(REQUESTS)))
+    assert all(result["error"] == "bad configuration" for result in results)
+    job_ids = [jobs.job_id(CompetitorAnalysisRequest(**request)) for request in REQUESTS]
+    assert all(jobs.status(job_id) == JobStatus.FAILED for job_id in job_ids)
@@ -0,0 +1,101 @@
+import time
+
+from app.utils.cache import MemoryCache, SQLiteCache, TieredCache, build_cache, make_cache_key
+
+
+def test_make_cache_key_ignores_argument_order():
+    assert make_cache_key("ns", a=1, b=[1, 2]) == make_cache_key("ns", b=[1, 2], a=1)
+    assert make_cache_key("ns", a=1) != make_cache_key("other", a=1)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(ttl=60)
+    cache.set("a", 1, ttl=-1)
+    cache.set("b", 2)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_sqlite_cache_roundtrip_and_expiry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"))
+    cache.set("a", {"x": [1, "é"]})
+    cache.set("b", {"x": 2}, ttl=-1)
+    assert cache.get("a") == {"x": [1, "é"]}
+    assert cache.get_text("a") == '{"x": [1, "é"]}'
+    assert cache.get("b") is None
+    assert len(cache) == 1
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path).set("a", 1)
+    assert SQLiteCache(path).get("a") == 1
+
+
+def test_sqlite_cache_evicts_least_recently_accessed(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=3)
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get("a")
+    cache.set("d", "d")
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+
+
+def test_sqlite_cache_enforces_the_limit_every_few_writes(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=1000)
+    assert cache._evict_every == 10
+    for i in range(1015):
+        cache.set(str(i), i)
+    assert 1000 <= len(cache) < 1010
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path).set("a", {"x": 1})
+    cache = TieredCache(MemoryCache(), SQLiteCache(path))
+    assert cache.get("a") == {"x": 1}
+    assert cache.memory.get("a") == {"x": 1}
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_tiered_cache_promotes_disk_hits_with_their_remaining_ttl(tmp_path):
+    # Regression: disk hits were promoted with the full memory TTL and outlived the disk entry.
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=3600)
+    disk.set("a", {"x": 1}, ttl=0.2)
+    cache = TieredCache(MemoryCache(ttl=3600), disk)
+    assert cache.get("a") == {"x": 1}
+    expires_at, _ = cache.memory._data["a"]
+    assert expires_at <= time.time() + 0.2
+    time.sleep(0.25)
+    assert cache.get("a") is None
+
+
+def test_tiered_cache_text_roundtrip(tmp_path):
+    cache = build_cache(str(tmp_path / "cache.sqlite"), ttl=60, memory_entries=10, disk_entries=10)
+    cache.set_text("a", '{"x": 1}')
+    cache.memory.clear()
+    assert cache.get_text("a") == '{"x": 1}'
+    assert cache.memory.get("a") == '{"x": 1}'
+    assert cache.get_text("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_build_cache_without_path_has_no_disk_tier():
+    assert build_cache("", ttl=60, memory_entries=10, disk_entries=10).disk is None
@@ -0,0 +1,38 @@
+import itertools
+
+from app.schemas.competitor import Product
+from app.utils.compaction import canonical_domain, merge_competitors
+
+from conftest import make_competitor
+
+
+def test_canonical_domain():
+    assert canonical_domain("https://www.Acme.com/pricing") == "acme.com"
+    assert canonical_domain("acme.com") == "acme.com"
+    assert canonical_domain("") is None
+
+
+def test_merge_competitors_unions_duplicates():
+    merged = merge_competitors(
+        [
+            make_competitor("Acme", "https://acme.com", score_affinity=40, product=Product(features=["a", "b"])),
+            make_competitor("Acme Inc", "www.acme.com/", score_affinity=70, product=Product(features=["b", "c"])),
+            make_competitor("Globex", "https://globex.com"),
+        ]
+    )
+    assert [canonical_domain(item["website"]) for item in merged] == ["acme.com", "globex.com"]
+    assert merged[0]["score_affinity"] == 70
+    assert sorted(merged[0]["product"]["features"]) == ["a", "b", "c"]
+    assert "id" not in merged[0]
+
+
+def test_merge_competitors_does_not_depend_on_completion_order():
+    # Regression: searches finish in any order, and the writer input used to follow that order.
+    competitors = [
+        make_competitor("Acme", "https://acme.com", product=Product(features=["a"])),
+        make_competitor("Acme", "acme.com", product=Product(features=["b"])),
+        make_competitor("Globex", "https://globex.com"),
+        make_competitor("Initech", ""),
+    ]
+    outputs = {str(merge_competitors(list(order))) for order in itertools.permutations(competitors)}
+    assert len(outputs) == 1
@@ -0,0 +1,77 @@
+import time
+from datetime import timezone
+
+import pytest
+
+from app.competitor_index import CompetitorIndex
+from app.schemas.competitor import Market, Product, SwotAnalysis
+
+from conftest import make_competitor
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = CompetitorIndex(str(tmp_path / "competitors.sqlite"))
+    index.upsert(make_competitor("Stripe", "https://www.stripe.com/"), query="Stripe payments", scope="https://a.com")
+    return index
+
+
+def test_lookup_by_recorded_query_website_or_name(index):
+    for query in ("stripe  PAYMENTS", "Stripe", "stripe.com", "https://stripe.com/pricing", "www.stripe.com"):
+        entry = index.lookup(query, scope="www.a.com")
+        assert entry is not None and entry.domain == "stripe.com", query
+
+
+def test_recorded_queries_only_answer_searches_for_the_same_website(index):
+    # Regression: a query recorded for one website answered the same query for every other website.
+    index.upsert(make_competitor("Acme", "https://acme.com"), query="pricing plans", scope="a.com")
+    assert index.lookup("pricing plans", scope="https://a.com/").domain == "acme.com"
+    assert index.lookup("pricing plans", scope="b.com") is None
+    assert index.lookup("pricing plans") is None
+    assert index.lookup("Stripe payments", scope="b.com") is None
+    assert index.lookup("Stripe", scope="b.com").domain == "stripe.com"
+
+
+def test_queries_that_only_mention_a_competitor_are_not_answered(index):
+    # Regression: any query containing a known name or domain used to return that competitor.
+    for query in (
+        "alternatives to Stripe for small businesses",
+        "Adyen vs Stripe fees",
+        "competitors of stripe.com",
+        "stripe payments europe",
+    ):
+        assert index.lookup(query) is None, query
+
+
+def test_upsert_keeps_sections_the_new_data_left_empty(index):
+    index.upsert(make_competitor("Stripe", "stripe.com", product=Product(features=["payments"])))
+    index.upsert(make_competitor("Stripe", "stripe.com", swot_analysis=SwotAnalysis(strengths=["api"])))
+    entry = index.get("stripe.com")
+    assert entry.competitor.product.features == ["payments"]
+    assert entry.competitor.swot_analysis.strengths == ["api"]
+    assert entry.market_updated_at is None
+
+
+def test_timestamps_are_utc_and_fresh(index, monkeypatch):
+    # Regression: naive local timestamps made fresh entries look hours old outside UTC.
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        index.upsert(make_competitor("Stripe", "stripe.com", market=Market(business_segments=["fintech"])))
+        entry = index.lookup("Stripe", max_age=60)
+        assert entry is not None
+        assert entry.updated_at.tzinfo == timezone.utc
+        assert entry.market_updated_at.tzinfo == timezone.utc
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_stale_entries_are_not_returned(index):
+    time.sleep(0.05)
+    assert index.lookup("Stripe", max_age=0.01) is None
+    assert index.lookup("Stripe", max_age=60) is not None
+
+
+def test_competitors_without_a_website_are_not_indexed(index):
+    assert index.upsert(make_competitor("Nameless", "")) is None
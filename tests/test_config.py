@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from app.config import Settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_settings_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("OPENAI_RPM", "60")
+    monkeypatch.setenv("TAVILY_TIMEOUT", "")
+    monkeypatch.setenv("WRITER_SHARDED", "false")
+    monkeypatch.setenv("MODEL_TIERS", "small, large")
+    monkeypatch.delenv("SEARCH_TOP_K", raising=False)
+    settings = Settings.from_env()
+    assert settings.openai_rpm == 60
+    assert settings.tavily_timeout is None
+    assert settings.writer_sharded is False
+    assert settings.model_tiers == ("small", "large")
+    assert settings.search_top_k == Settings().search_top_k
+
+
+def test_importing_the_manager_builds_nothing():
+    # Regression: the schedulers, the model provider, the agents and the metrics sinks were built (and the metrics
+    # directory created) at import, before `configure` could change the settings they were built from.
+    code = (
+        "import app.manager, app.config\n"
+        "from app.agents import planner_agent, search_agent, writer_agent\n"
+        "from app.utils import metrics, scheduler\n"
+        "built = [scheduler._openai_scheduler, scheduler._tavily_scheduler, scheduler._scheduled_model_provider,\n"
+        "         planner_agent._planner_agent, search_agent._search_agent, writer_agent._writer_agent,\n"
+        "         metrics._sinks, metrics._prometheus_sink, app.config._settings]\n"
+        "print(sum(item is not None for item in built))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.split()[-1] == "0"
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from app.coverage import SearchBudget, coverage, missing_fields, plan_followups
+from app.schemas.competitor import CompetitorAnalysisResponse, Market, MarketPresence, SwotAnalysis
+
+from conftest import make_competitor
+
+
+def response(name: str, score: int, **fields) -> CompetitorAnalysisResponse:
+    return CompetitorAnalysisResponse(
+        self_analysis=make_competitor(name, f"https://{name.lower()}.com", score_affinity=score, **fields)
+    )
+
+
+def test_missing_fields_and_coverage():
+    full = make_competitor(
+        "Full",
+        "full.com",
+        market=Market(market_presence=MarketPresence(countries=["FR"])),
+        swot_analysis=SwotAnalysis(strengths=["x"]),
+    ).model_dump(exclude_none=True)
+    empty = make_competitor("Empty", "empty.com").model_dump(exclude_none=True)
+    assert missing_fields(full) == ["product.pricing.plans"]
+    assert len(missing_fields(empty)) == 3
+    assert coverage([full, empty]) == pytest.approx(2 / 6)
+    assert coverage([]) == 0.0
+
+
+def test_followups_go_to_the_most_relevant_competitors_within_the_credits():
+    results = [response("Low", 10), response("High", 90), response("Mid", 50)]
+    followups = plan_followups(results, SearchBudget(credits=4, deadline=time.monotonic() + 60))
+    assert [website for _, website in followups] == ["https://high.com", "https://mid.com"]
+    assert followups[0][0].query.startswith("High pricing plans")
+
+
+def test_no_followups_once_the_time_budget_is_spent():
+    assert plan_followups([response("High", 90)], SearchBudget(credits=4, deadline=time.monotonic() - 1)) == []
+
+
+def test_competitors_with_full_coverage_are_not_searched_again():
+    swot = SwotAnalysis(strengths=["x"])
+    market = Market(market_presence=MarketPresence(countries=["FR"]))
+    complete = response("Done", 90, market=market, swot_analysis=swot)
+    complete.self_analysis.product = None
+    budget = SearchBudget(credits=4, deadline=time.monotonic() + 60)
+    followups = plan_followups([complete], budget)
+    assert [item.reason for item, _ in followups] == ["Fill in the missing product.pricing.plans of Done"]
+    assert budget.credits == 2
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils import http
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so that connections are kept alive in the pool between requests.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_the_shared_client_works_across_event_loops(server_url, monkeypatch):
+    # Regression: the second asyncio.run reused connections of the first loop and failed with "Event loop is closed".
+    monkeypatch.setattr(http, "_clients", {})
+
+    async def fetch() -> str:
+        response = await http.get_http_client("test", base_url=server_url).get("/")
+        return response.text
+
+    assert asyncio.run(fetch()) == "ok"
+    assert asyncio.run(fetch()) == "ok"
+    assert len(http._clients) == 1
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from app.job_store import JobLeaseLost, JobStore
+from app.schemas.job import JobStatus
+from app.schemas.request import CompetitorAnalysisRequest
+
+REQUEST = CompetitorAnalysisRequest(website="https://example.com", description="Project management software")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite"), lease=60)
+
+
+def test_the_same_request_is_the_same_job(store):
+    job_id = store.submit(REQUEST)
+    same = CompetitorAnalysisRequest(website="https://EXAMPLE.com ", description="Project  management software")
+    assert store.submit(same) == job_id
+    assert store.submit(REQUEST, direct_search=True) != job_id
+    assert store.status(job_id) == JobStatus.QUEUED
+
+
+def test_only_one_worker_holds_a_claim(store):
+    job_id = store.submit(REQUEST)
+    assert store.claim(job_id, "a")
+    assert not store.claim(job_id, "b")
+    assert store.renew(job_id, "a")
+    assert not store.renew(job_id, "b")
+    assert 59 < store.lease_remaining(job_id) <= 60
+
+
+def test_a_lapsed_claim_is_taken_over(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"), lease=0.05)
+    job_id = store.submit(REQUEST)
+    assert store.claim(job_id, "a")
+    time.sleep(0.1)
+    assert store.lease_remaining(job_id) == 0.0
+    assert store.claim(job_id, "b")
+    # Regression: a worker whose claim lapsed could still checkpoint and complete the job.
+    with pytest.raises(JobLeaseLost):
+        store.save_checkpoint(job_id, "a", "plan", "{}")
+    with pytest.raises(JobLeaseLost):
+        store.complete(job_id, "a", "stale")
+    store.complete(job_id, "b", "done")
+    assert store.result(job_id) == "done"
+
+
+def test_a_completed_job_is_not_claimed_again(store):
+    job_id = store.submit(REQUEST)
+    store.claim(job_id, "a")
+    store.complete(job_id, "a", "done")
+    assert store.status(job_id) == JobStatus.COMPLETED
+    assert not store.claim(job_id, "b")
+    with pytest.raises(JobLeaseLost):
+        store.complete(job_id, "a", "again")
+
+
+def test_a_failed_job_keeps_its_checkpoints(store):
+    job_id = store.submit(REQUEST)
+    store.claim(job_id, "a")
+    checkpoints = store.checkpoints(job_id, "a")
+    checkpoints.set("search:basic:q", {"results": [1]})
+    store.fail(job_id, "a", "boom")
+    assert store.status(job_id) == JobStatus.FAILED
+    assert store.result(job_id) is None
+    assert store.claim(job_id, "b")
+    assert store.checkpoints(job_id, "b").get("search:basic:q", dict) == {"results": [1]}
+
+
+def test_checkpoints_roundtrip_models(store):
+    job_id = store.submit(REQUEST)
+    store.claim(job_id, "a")
+    store.checkpoints(job_id, "a").set("request", REQUEST)
+    restored = store.checkpoints(job_id, "a")
+    assert restored.get("request", CompetitorAnalysisRequest) == REQUEST
+    assert restored.get("missing", dict) is None
+
+
+def test_restart_clears_an_idle_job_but_not_a_running_one(store):
+    job_id = store.submit(REQUEST)
+    store.claim(job_id, "a")
+    store.save_checkpoint(job_id, "a", "plan", "{}")
+    store.submit(REQUEST, restart=True)
+    assert store.status(job_id) == JobStatus.RUNNING
+    assert store.load_checkpoints(job_id) == {"plan": "{}"}
+
+    store.complete(job_id, "a", "done")
+    store.submit(REQUEST, restart=True)
+    assert store.status(job_id) == JobStatus.QUEUED
+    assert store.result(job_id) is None
+    assert store.load_checkpoints(job_id) == {}
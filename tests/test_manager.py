@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.agents.planner_agent import WebSearchItem
+from app.manager import ResearchManager
+from app.schemas.competitor import CompetitorAnalysisResponse
+from app.schemas.request import CompetitorAnalysisRequest
+
+from conftest import make_competitor
+
+REQUEST = CompetitorAnalysisRequest(website="https://example.com", description="Project management software")
+
+
+def test_searches_are_cancelled_when_planning_fails():
+    # Regression: searches started from a partially streamed plan kept running after the planner failed.
+    manager = ResearchManager(quiet=True, adaptive_search=False)
+    cancelled = []
+
+    async def slow_search(item, self_url, refresh=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(item.query)
+            raise
+
+    async def failing_plan(request, on_search):
+        on_search(WebSearchItem(query="a", reason="r"))
+        on_search(WebSearchItem(query="b", reason="r"))
+        await asyncio.sleep(0.01)
+        raise RuntimeError("planner failed")
+
+    manager._start_search = slow_search
+    manager._plan_searches = failing_plan
+    with pytest.raises(RuntimeError):
+        asyncio.run(manager._plan_and_search(REQUEST))
+    assert sorted(cancelled) == ["a", "b"]
+
+
+def test_a_refresh_does_not_join_a_running_analysis():
+    # Regression: a refresh that overlapped a plain run returned the plain run's report.
+    calls = []
+
+    def make_manager(refresh: bool) -> ResearchManager:
+        manager = ResearchManager(quiet=True, refresh=refresh)
+
+        async def run(request):
+            calls.append(refresh)
+            await asyncio.sleep(0.05)
+            competitor = make_competitor("Example", request.website, description=str(refresh))
+            return CompetitorAnalysisResponse(self_analysis=competitor), [], None
+
+        manager._run = run
+        return manager
+
+    async def main(*refreshes):
+        return await asyncio.gather(*(make_manager(refresh).run(REQUEST) for refresh in refreshes))
+
+    reports = asyncio.run(main(False, False))
+    assert calls == [False]
+    assert reports[0] == reports[1]
+
+    calls.clear()
+    plain, refreshed = asyncio.run(main(False, True))
+    assert sorted(calls) == [False, True]
+    assert (plain.self_analysis.description, refreshed.self_analysis.description) == ("False", "True")
+
+
+def test_direct_search_writer_input_follows_query_order():
+    # Regression: the writer input followed search completion order, so identical runs missed the cache.
+    manager = ResearchManager(quiet=True, direct_search=True)
+    responses = [
+        {"query": query, "results": [{"url": f"https://{query}.com", "title": query, "content": f"{query} text"}]}
+        for query in ("b", "a", "c")
+    ]
+    expected = manager._writer_inputs(list(responses))
+    assert [text.splitlines()[0] for text in expected] == ["Search term: a", "Search term: b", "Search term: c"]
+    assert manager._writer_inputs(list(reversed(responses))) == expected
+
+
+def test_full_run_against_replayed_providers(replay):
+    calls = replay.tavily.calls
+    manager = ResearchManager(quiet=True)
+    report = asyncio.run(manager.run(REQUEST))
+    assert isinstance(report, CompetitorAnalysisResponse)
+    assert replay.tavily.calls > calls
+    assert manager.metrics.status == "completed"
+
+
+def test_direct_search_run_against_replayed_providers(replay):
+    manager = ResearchManager(quiet=True, direct_search=True)
+    report = asyncio.run(manager.run(REQUEST))
+    assert isinstance(report, CompetitorAnalysisResponse)
+    assert manager.metrics.status == "completed"
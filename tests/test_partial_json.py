@@ -0,0 +1,48 @@
+import json
+
+from app.utils.partial_json import IncrementalJsonParser
+
+PLAN = {
+    "searches": [
+        {"query": "a \"quoted\" {query}", "reason": "b"},
+        {"query": "c", "reason": "d [e]"},
+    ],
+    "x": 1,
+}
+
+
+def feed_all(text: str, chunk_size: int, max_depth: int = 2) -> list:
+    parser = IncrementalJsonParser(max_depth=max_depth)
+    completed = []
+    for start in range(0, len(text), chunk_size):
+        completed.extend(parser.feed(text[start : start + chunk_size]))
+    return completed
+
+
+def test_emits_each_value_once_it_is_complete():
+    completed = feed_all(json.dumps(PLAN), chunk_size=1)
+    assert completed == [
+        (("searches", 0), PLAN["searches"][0]),
+        (("searches", 1), PLAN["searches"][1]),
+        (("searches",), PLAN["searches"]),
+        (("x",), 1),
+        ((), PLAN),
+    ]
+
+
+def test_chunking_does_not_change_the_result():
+    text = json.dumps(PLAN, indent=2)
+    expected = feed_all(text, chunk_size=len(text))
+    for chunk_size in (1, 2, 3, 7, 64):
+        assert feed_all(text, chunk_size) == expected
+
+
+def test_nothing_is_emitted_before_an_item_closes():
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"searches": [{"query": "a", "reas') == []
+    assert parser.feed('on": "b"}') == [(("searches", 0), {"query": "a", "reason": "b"})]
+
+
+def test_max_depth_limits_the_emitted_paths():
+    paths = [path for path, _ in feed_all(json.dumps(PLAN), chunk_size=5, max_depth=1)]
+    assert paths == [("searches",), ("x",), ()]
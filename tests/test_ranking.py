@@ -0,0 +1,83 @@
+from app.utils.ranking import (
+    SeenResults,
+    canonical_url,
+    process_search_responses,
+    rank_results,
+    shingles,
+    similarity,
+)
+
+
+def result(url: str, title: str, content: str = "", score: float = 0.0) -> dict:
+    return {"url": url, "title": title, "content": content or f"{title} body text words here", "score": score}
+
+
+def urls(response: dict) -> list[str]:
+    return [item["url"] for item in response["results"]]
+
+
+def test_canonical_url_ignores_spelling_differences():
+    expected = canonical_url("https://example.com/pricing?a=1&b=2")
+    for url in (
+        "http://www.example.com/pricing/?b=2&a=1",
+        "https://EXAMPLE.com:443/pricing?a=1&b=2&utm_source=x#plans",
+        "example.com/pricing?gclid=1&a=1&b=2",
+    ):
+        assert canonical_url(url) == expected
+    assert canonical_url("https://example.com:8080/pricing") != canonical_url("https://example.com/pricing")
+
+
+def test_similarity_of_near_duplicates():
+    text = "Acme sells project management software for small teams with a free plan"
+    assert similarity(shingles(text), shingles(text + " today")) >= 0.8
+    assert similarity(shingles(text), shingles("Globex builds industrial robots for car factories")) == 0.0
+
+
+def test_rank_results_prefers_matching_terms():
+    results = [
+        result("a.com", "Company history", "Founded in 1999 by two friends"),
+        result("b.com", "Acme pricing plans", "Acme pricing starts at 10 dollars per seat"),
+        result("c.com", "Careers", "Join our team"),
+    ]
+    ranked = rank_results(results, "acme pricing", top_k=2)
+    assert len(ranked) == 2
+    assert ranked[0]["url"] == "b.com"
+    assert rank_results(results, "join team", top_k=1)[0]["url"] == "c.com"
+    assert len(rank_results(results, "acme pricing", top_k=0)) == 3
+
+
+def test_duplicates_within_and_across_responses_are_dropped():
+    first = {"query": "alpha", "results": [result("https://a.com/1", "alpha one"), result("a.com/1/", "alpha one")]}
+    second = {"query": "alpha", "results": [result("https://www.a.com/1", "alpha one"), result("d.com", "delta")]}
+    processed = process_search_responses([first, second], top_k=0)
+    assert urls(processed[0]) == ["https://a.com/1"]
+    assert urls(processed[1]) == ["d.com"]
+
+
+def test_results_cut_by_top_k_are_not_marked_seen():
+    # Regression: results dropped by the top-k cut used to count as seen, so a later query that
+    # found them was left with nothing.
+    first = {
+        "query": "alpha",
+        "results": [result("a.com/1", "alpha one"), result("a.com/2", "alpha two"), result("b.com/x", "beta page")],
+    }
+    second = {"query": "beta", "results": [result("b.com/x", "beta page")]}
+    processed = process_search_responses([first, second], top_k=2)
+    assert "b.com/x" not in urls(processed[0])
+    assert urls(processed[1]) == ["b.com/x"]
+
+
+def test_seen_results_are_shared_between_calls():
+    seen = SeenResults()
+    response = {"query": "beta", "results": [result("b.com/x", "beta page")]}
+    assert urls(process_search_responses([response], seen=seen)[0]) == ["b.com/x"]
+    assert process_search_responses([response], seen=seen) == []
+    assert urls(process_search_responses([response])[0]) == ["b.com/x"]
+
+
+def test_responses_with_only_an_answer_are_kept():
+    seen = SeenResults()
+    response = {"query": "beta", "answer": "Beta is a page.", "results": [result("b.com/x", "beta page")]}
+    process_search_responses([response], seen=seen)
+    processed = process_search_responses([response], seen=seen)
+    assert processed == [{**response, "results": []}]
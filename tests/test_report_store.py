@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.report_store import ReportStore, merge_reports
+from app.schemas.competitor import CompetitorAnalysisResponse, Product, SwotAnalysis
+from app.schemas.report import StoredSearch
+from app.schemas.request import CompetitorAnalysisRequest
+
+from conftest import make_competitor
+
+REQUEST = CompetitorAnalysisRequest(website="https://example.com", description="Project management software")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReportStore(str(tmp_path / "reports.sqlite"))
+
+
+def report(**fields) -> CompetitorAnalysisResponse:
+    return CompetitorAnalysisResponse(self_analysis=make_competitor("Example", "https://example.com", **fields))
+
+
+def test_latest_returns_the_newest_report_with_its_searches(store):
+    competitor = make_competitor("Acme", "https://acme.com")
+    store.save(REQUEST, report(score_affinity=10), [])
+    time.sleep(0.01)
+    store.save(
+        REQUEST,
+        report(score_affinity=20),
+        [
+            StoredSearch(query="acme", reason="rival", competitor=competitor),
+            StoredSearch(query="raw", reason="direct", response={"results": [{"url": "a.com", "title": "ü"}]}),
+        ],
+    )
+    latest = store.latest(REQUEST)
+    assert latest.report.self_analysis.score_affinity == 20
+    assert [search.query for search in latest.searches] == ["acme", "raw"]
+    assert latest.searches[0].competitor == competitor
+    assert latest.searches[1].response == {"results": [{"url": "a.com", "title": "ü"}]}
+    assert store.latest(REQUEST, direct_search=True) is None
+    assert len(store.history(REQUEST.website)) == 2
+
+
+def test_researched_at_roundtrips_as_utc(store, monkeypatch):
+    # Regression: naive timestamps were read back in local time, so searches looked stale or too fresh.
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        store.save(REQUEST, report(), [StoredSearch(query="q", reason="r")])
+        researched_at = store.latest(REQUEST).searches[0].researched_at
+        assert researched_at.tzinfo == timezone.utc
+        assert abs((datetime.now(timezone.utc) - researched_at).total_seconds()) < 5
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_merge_reports_keeps_the_previous_id_and_filled_fields():
+    previous = report(product=Product(features=["boards"]), swot_analysis=SwotAnalysis(strengths=["cheap"]))
+    new = report(score_affinity=80, product=Product(features=["gantt"]))
+    merged = merge_reports(previous, new)
+    assert merged.self_analysis.id == previous.self_analysis.id
+    assert merged.self_analysis.score_affinity == 80
+    assert merged.self_analysis.product.features == ["gantt"]
+    assert merged.self_analysis.swot_analysis.strengths == ["cheap"]
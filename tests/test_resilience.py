@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.resilience import CallError, LatencyTracker, RetryPolicy, hedged, with_retries
+
+
+class Calls:
+    """A call that sleeps `queued` seconds before it is admitted and `durations[n]` after."""
+
+    def __init__(self, durations: list[float], queued: float = 0.0):
+        self.durations = durations
+        self.queued = queued
+        self.count = 0
+
+    async def __call__(self, admitted: asyncio.Event) -> int:
+        self.count += 1
+        number = self.count
+        if number == 1:
+            await asyncio.sleep(self.queued)
+        admitted.set()
+        await asyncio.sleep(self.durations[number - 1])
+        return number
+
+
+def run_hedged(calls: Calls, hedge_after: float, **kwargs) -> int:
+    async def main():
+        admitted = asyncio.Event()
+        return await hedged(lambda: calls(admitted), hedge_after, started=admitted, **kwargs)
+
+    return asyncio.run(main())
+
+
+def test_slow_calls_are_hedged():
+    durations = [1.0, 0.01]
+    calls = []
+
+    async def call():
+        calls.append(1)
+        number = len(calls)
+        await asyncio.sleep(durations[number - 1])
+        return number
+
+    assert asyncio.run(hedged(call, 0.05)) == 2
+    assert len(calls) == 2
+
+
+def test_fast_calls_are_not_hedged():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    assert asyncio.run(hedged(call, 0.2)) == 1
+    assert asyncio.run(hedged(call, None)) == 2
+
+
+def test_time_spent_queueing_does_not_count():
+    # Regression: the hedge timer started before admission, so a queued call was hedged.
+    calls = Calls([0.05], queued=0.2)
+    assert run_hedged(calls, 0.1) == 1
+    assert calls.count == 1
+
+
+def test_no_hedge_while_saturated():
+    calls = Calls([0.2, 0.01])
+    assert run_hedged(calls, 0.05, can_hedge=lambda: False) == 1
+    assert calls.count == 1
+
+
+def test_latency_tracker_needs_enough_samples():
+    tracker = LatencyTracker(min_samples=5)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        tracker.record(latency)
+    assert tracker.quantile(0.95) is None
+    tracker.record(0.5)
+    assert 0.4 <= tracker.quantile(0.95) <= 0.5
+
+
+def test_with_retries_retries_transient_errors_only():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("down")
+        return "ok"
+
+    async def broken():
+        raise ValueError("bad input")
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    assert asyncio.run(with_retries(flaky, policy, stage="test")) == "ok"
+    with pytest.raises(CallError) as error:
+        asyncio.run(with_retries(broken, policy, stage="test"))
+    assert error.value.detail.attempts == 1
+    assert not error.value.detail.retryable
+
+
+def test_with_retries_times_out_each_attempt():
+    attempts = []
+
+    async def hangs():
+        attempts.append(1)
+        await asyncio.sleep(10)
+
+    with pytest.raises(CallError) as error:
+        asyncio.run(with_retries(hangs, RetryPolicy(max_attempts=2, base_delay=0.001, timeout=0.05), stage="test"))
+    assert len(attempts) == 2
+    assert error.value.detail.retryable
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from agents import Agent
+from pydantic import BaseModel
+
+from app.utils import run_cache as run_cache_module
+from app.utils.cache import build_cache
+from app.utils.resilience import CallError, RetryPolicy, with_retries
+from app.utils.run_cache import AgentRunCache
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeResult:
+    def __init__(self, output: BaseModel):
+        self.final_output = output
+
+    def final_output_as(self, output_type):
+        return self.final_output
+
+
+class FakeRunner:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def run(self, agent, input, **kwargs):
+        self.calls += 1
+        number = self.calls
+        await asyncio.sleep(self.delay)
+        return FakeResult(Answer(text=f"{input} #{number}"))
+
+
+AGENT = Agent(name="Test agent", instructions="Answer.", model="gpt-4o-mini")
+
+
+def make_cache(tmp_path=None) -> AgentRunCache:
+    path = str(tmp_path / "agents.sqlite") if tmp_path is not None else ""
+    return AgentRunCache(build_cache(path, ttl=60, memory_entries=10, disk_entries=10))
+
+
+def test_make_key_ignores_per_run_context_entries():
+    # Regression: the shared seen-results set in the context made every search agent run a cache miss.
+    key = AgentRunCache.make_key(AGENT, "q", Answer, {"self_domain_url": "a.com", "_seen_results": object()})
+    assert key == AgentRunCache.make_key(AGENT, "q", Answer, {"self_domain_url": "a.com", "_seen_results": None})
+    assert key != AgentRunCache.make_key(AGENT, "q", Answer, {"self_domain_url": "b.com"})
+    assert key != AgentRunCache.make_key(AGENT, "other", Answer, {"self_domain_url": "a.com"})
+
+
+def test_outputs_are_validated_from_the_stored_text(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("k", Answer(text="hi"))
+    cache.backend.memory.clear()
+    assert cache.get("k", Answer) == Answer(text="hi")
+    cache.backend.set_text("bad", '{"unexpected": 1}')
+    assert cache.get("bad", Answer) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_run_reuses_the_cached_output(monkeypatch):
+    runner = FakeRunner()
+    monkeypatch.setattr(run_cache_module, "Runner", runner)
+    cache = make_cache()
+
+    async def main():
+        first = await cache.run(AGENT, "q", Answer)
+        second = await cache.run(AGENT, "q", Answer)
+        refreshed = await cache.run(AGENT, "q", Answer, refresh=True)
+        return first, second, refreshed
+
+    first, second, refreshed = asyncio.run(main())
+    assert first == second == Answer(text="q #1")
+    assert refreshed == Answer(text="q #2")
+    assert cache.get(cache.make_key(AGENT, "q", Answer), Answer) == refreshed
+
+
+def test_identical_concurrent_runs_share_one_call(monkeypatch):
+    runner = FakeRunner()
+    monkeypatch.setattr(run_cache_module, "Runner", runner)
+    cache = make_cache()
+
+    async def main():
+        return await asyncio.gather(*(cache.run(AGENT, "q", Answer) for _ in range(3)))
+
+    assert asyncio.run(main()) == [Answer(text="q #1")] * 3
+    assert runner.calls == 1
+
+
+def test_a_refresh_does_not_join_a_plain_run(monkeypatch):
+    # Regression: a refresh that overlapped a plain run shared its (possibly cached) answer.
+    runner = FakeRunner()
+    monkeypatch.setattr(run_cache_module, "Runner", runner)
+    cache = make_cache()
+
+    async def main():
+        return await asyncio.gather(
+            cache.run(AGENT, "q", Answer),
+            cache.run(AGENT, "q", Answer),
+            cache.run(AGENT, "q", Answer, refresh=True),
+            cache.run(AGENT, "q", Answer, refresh=True),
+        )
+
+    plain, joined, refreshed, joined_refresh = asyncio.run(main())
+    assert runner.calls == 2
+    assert plain == joined
+    assert refreshed == joined_refresh
+    assert plain != refreshed
+
+
+def test_a_timed_out_run_is_not_joined_by_its_retries(monkeypatch):
+    # Regression: a retry after a per-attempt timeout joined the hung call, which was never cancelled.
+    runner = FakeRunner(delay=3600)
+    monkeypatch.setattr(run_cache_module, "Runner", runner)
+    cache = make_cache()
+    policy = RetryPolicy(max_attempts=3, base_delay=0, timeout=0.2)
+
+    async def main():
+        with pytest.raises(CallError):
+            await with_retries(lambda: cache.run(AGENT, "q", Answer), policy, stage="test")
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert runner.calls == 3
+    assert cache.flights.stats()["in_flight"] == 0
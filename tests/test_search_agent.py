@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from agents.run_context import RunContextWrapper
+
+from app.agents import search_agent as search_module
+from app.utils.ranking import SeenResults
+
+RESPONSE = {
+    "answer": "Acme sells boards.",
+    "results": [
+        {"url": "https://acme.com/pricing", "title": "Acme pricing", "content": "Acme boards cost 10 dollars a seat"},
+    ],
+}
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    calls = []
+
+    async def fake_search(**kwargs):
+        calls.append(kwargs)
+        return dict(RESPONSE)
+
+    monkeypatch.setattr(search_module, "cached_tavily_search", fake_search)
+    return calls
+
+
+def run_tool(context: dict, query: str = "acme pricing") -> str:
+    return asyncio.run(search_module.run_function(RunContextWrapper(context=context), f'{{"query": "{query}"}}'))
+
+
+def test_tool_passes_the_context_to_the_search(searches):
+    output = run_tool({"self_domain_url": "acme.com", "description": "boards", "search_depth": "advanced"})
+    assert searches == [
+        {"query": "acme pricing", "include_domains": ["acme.com"], "search_depth": "advanced", "max_results": 5}
+    ]
+    assert output.startswith("Tavily Summary: Acme sells boards.")
+    assert "Url:https://acme.com/pricing" in output
+
+
+def test_tool_skips_results_seen_by_earlier_searches_of_the_report(searches):
+    context = {"self_domain_url": None, "_seen_results": SeenResults()}
+    assert "Url:https://acme.com/pricing" in run_tool(context)
+    assert "Url:" not in run_tool(context, query="acme plans")
+    assert searches[0]["search_depth"] == "basic"
+
+
+def test_tool_does_not_print(searches, capsys):
+    # Regression: the tool printed its arguments to stdout, which corrupted JSON output on stdout.
+    run_tool({"self_domain_url": "acme.com"})
+    assert capsys.readouterr().out == ""
+
+
+def test_tool_errors_are_returned_to_the_model(monkeypatch):
+    async def failing_search(**kwargs):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(search_module, "cached_tavily_search", failing_search)
+    assert run_tool({}).startswith("Error performing search: ")
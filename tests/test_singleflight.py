@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(3))), await flights.do("k", work)
+
+    together, later = asyncio.run(main())
+    assert together == [1, 1, 1]
+    assert later == 2
+    assert flights.stats() == {"calls": 2, "coalesced": 2, "in_flight": 0}
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [type(error) for error in errors] == [ValueError, ValueError]
+    assert "k" not in flights
+
+
+def test_calls_on_another_event_loop_are_not_shared():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0)
+        return "done"
+
+    assert asyncio.run(flights.do("k", work)) == "done"
+    assert asyncio.run(flights.do("k", work)) == "done"
+    assert flights.calls == 2
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_the_call_is_cancelled_when_every_caller_has_left():
+    # Regression: a call whose callers all timed out kept running, and retries joined it.
+    flights = SingleFlight()
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.gather(flights.do("k", hang), flights.do("k", hang)), 0.01)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [1, 1]
+    assert flights.stats() == {"calls": 2, "coalesced": 2, "in_flight": 0}